@@ -1,4 +1,5 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 from autoscheduler.config import config
 
@@ -41,6 +42,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'social_django',
 
@@ -65,6 +67,36 @@ LOGOUT_REDIRECT_URL = '/'
 # SESSION_COOKIE_AGE must be an integer - make sessions take 10 years to expire
 SESSION_COOKIE_AGE = 10 * 365 * 24 * 60 * 60
 
+# Sessions are saved to both the database and a cache shared by the server processes on
+# each machine, and read from the cache by requests that don't change them. See
+# user_sessions/cached_db.py
+SESSION_ENGINE = 'user_sessions.cached_db'
+SESSION_CACHE_ALIAS = 'sessions'
+# How many seconds a session is cached for, which is how long another instance can serve
+# an out of date session
+SESSION_CACHE_TIMEOUT = int(os.getenv('SESSION_CACHE_TIMEOUT', '10'))
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'sessions': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv('SESSION_CACHE_DIR', os.path.join(
+            tempfile.gettempdir(), 'autoscheduler-sessions')),
+        'OPTIONS': {
+            # Sessions are only cached briefly, so this is plenty for one machine
+            'MAX_ENTRIES': 1000,
+        },
+    },
+    # Schedules generated in the background, see scheduler/speculative_generation.py
+    'generated': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv('GENERATED_CACHE_DIR', os.path.join(
+            tempfile.gettempdir(), 'autoscheduler-generated')),
+    },
+}
+
 SOCIAL_AUTH_GOOGLE_OAUTH2_KEY = os.getenv('GOOGLE_OAUTH2_CLIENT_ID')
 SOCIAL_AUTH_GOOGLE_OAUTH2_SECRET = os.getenv('GOOGLE_OAUTH2_SECRET')
 SOCIAL_AUTH_GOOGLE_OAUTH2_AUTH_EXTRA_ARGUMENTS = {
@@ -87,7 +119,7 @@ SOCIAL_AUTH_PIPELINE = (
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    'user_sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -187,6 +219,11 @@ USE_L10N = True
 
 USE_TZ = True
 
+# Directory used to coalesce identical concurrent requests between server processes.
+# See autoscheduler/single_flight.py
+SINGLE_FLIGHT_DIR = os.getenv(
+    'SINGLE_FLIGHT_DIR', os.path.join(tempfile.gettempdir(), 'autoscheduler-flights'))
+
 # Allows frontend/assets to be parsed for static files. Contains our logos/favicons.
 STATICFILES_DIRS = [
     os.path.join(BASE_DIR, "../frontend/assets/")
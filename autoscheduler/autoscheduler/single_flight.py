@@ -0,0 +1,268 @@
+""" Coalesces identical requests that are being handled at the same time, so only the
+    first one does the expensive work and the rest wait for its result.
+
+    Requests are first coalesced between the threads of a process. The thread doing the
+    work then coalesces with the other processes (i.e. other gunicorn workers) on the
+    same machine using lock and result files in settings.SINGLE_FLIGHT_DIR. If that
+    directory isn't set or can't be written to, requests are only coalesced within each
+    process. Each lock file contains a token unique to the process that holds it, which
+    names its result file, so a process only ever releases its own lock and waiting
+    processes only ever read the result of the computation they waited on.
+
+    Results are shared between processes as JSON, so only the owner of the directory
+    can affect what other processes return, and the directory isn't used if it's owned
+    by another user or others can write to it.
+
+    Usage:
+        class ScheduleView(APIView):
+            @single_flight
+            def post(self, request):
+                ...
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from functools import wraps
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from django.conf import settings
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+# How long a lock can be held before other processes assume its owner died
+_LOCK_TIMEOUT = 30
+# How long a finished result is kept around for the processes that waited on it
+_RESULT_TTL = 5
+# How often a waiting process checks whether the lock has been released
+_POLL_INTERVAL = 0.05
+# How often old result files are removed
+_SWEEP_INTERVAL = 60
+# The file whose mtime is when old result files were last removed
+_SWEEP_FILE = '.swept'
+# Response headers that are set when the response is rendered, so aren't shared
+_RENDERED_HEADERS = ('content-type',)
+
+class _Call:
+    """ A computation in progress that other threads in this process can wait on """
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+_calls: Dict[str, _Call] = {}
+_calls_lock = threading.Lock()
+
+def canonical_key(method: str, path: str, query: List[Tuple[str, List[str]]],
+                  body: Any) -> str:
+    """ Generates a key that's the same for requests with the same method, path,
+        query params and body, regardless of the order of the params or body keys
+    """
+    query = sorted((key, sorted(values)) for key, values in query)
+    canonical = json.dumps([method, path, query, body],
+                           sort_keys=True, separators=(',', ':'), default=str)
+
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+def canonical_request_key(request) -> str:
+    """ Generates the canonical key of a DRF request """
+    body = request.data if request.method not in ('GET', 'HEAD') else None
+    return canonical_key(request.method, request.path, request.query_params.lists(),
+                         body)
+
+def _store_dir() -> Optional[str]:
+    """ Gets the directory used to coalesce requests across processes, or None if
+        there isn't a usable one
+    """
+    directory = getattr(settings, 'SINGLE_FLIGHT_DIR', None)
+    if not directory:
+        return None
+
+    try:
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        stat = os.stat(directory)
+    except OSError:
+        return None
+
+    # Other users could make us return anything if they can write to it
+    if stat.st_uid != os.getuid() or stat.st_mode & 0o077:
+        return None
+
+    return directory if os.access(directory, os.W_OK) else None
+
+def _read_owner(lock_path: str) -> Optional[str]:
+    """ Gets the token of the process holding the lock, or None if it isn't held """
+    try:
+        with open(lock_path) as lock_file:
+            return lock_file.read()
+    except FileNotFoundError:
+        return None
+
+def _release_lock(lock_path: str, owner: str):
+    """ Removes the lock if it's still held by owner. It may have been broken and taken
+        by another process if owner took longer than _LOCK_TIMEOUT
+    """
+    try:
+        if _read_owner(lock_path) == owner:
+            os.remove(lock_path)
+    except FileNotFoundError:
+        pass # Released by another process in the meantime
+
+def _acquire_lock(directory: str, lock_path: str) -> Tuple[bool, Optional[str]]:
+    """ Attempts to create the lock file, breaking it if its owner seems to have died.
+        Returns whether the lock was acquired, and the token of the process holding it
+        (None if that isn't known)
+    """
+    token = uuid.uuid4().hex
+    descriptor, owner_path = tempfile.mkstemp(dir=directory, suffix='.owner')
+    with os.fdopen(descriptor, 'w') as owner_file:
+        owner_file.write(token)
+
+    try:
+        for _ in range(2):
+            try:
+                # Linking creates the lock with its token already in it, so other
+                # processes never see an empty lock
+                os.link(owner_path, lock_path)
+                return True, token
+            except FileExistsError:
+                owner = _read_owner(lock_path)
+                try:
+                    age = time.time() - os.path.getmtime(lock_path)
+                except FileNotFoundError:
+                    continue # Released while we were checking it, so try again
+                if owner is None:
+                    continue
+                if age < _LOCK_TIMEOUT:
+                    return False, owner
+                # Only removes the abandoned lock, not one another process just took
+                _release_lock(lock_path, owner)
+
+        return False, _read_owner(lock_path)
+    finally:
+        os.remove(owner_path)
+
+def _read_result(result_path: str) -> Any:
+    """ Reads the result left by another process, or None if there isn't a recent one """
+    try:
+        if time.time() - os.path.getmtime(result_path) > _RESULT_TTL:
+            return None
+        with open(result_path) as result_file:
+            return json.load(result_file)
+    except (OSError, ValueError):
+        return None
+
+def _write_result(directory: str, result_path: str, result: Any):
+    """ Atomically writes the result as JSON so other processes never read a partial
+        file. Encodes it like DRF's JSONRenderer, so it's rendered the same either way
+    """
+    descriptor, temp_path = tempfile.mkstemp(dir=directory, suffix='.partial')
+    with os.fdopen(descriptor, 'w') as result_file:
+        json.dump(result, result_file, cls=JSONEncoder)
+    os.replace(temp_path, result_path)
+
+def _sweep_results(directory: str):
+    """ Removes old result and lock token files so the directory doesn't grow forever.
+        Only done every _SWEEP_INTERVAL by any of the processes sharing the directory
+    """
+    sweep_path = os.path.join(directory, _SWEEP_FILE)
+    now = time.time()
+    try:
+        if now - os.path.getmtime(sweep_path) < _SWEEP_INTERVAL:
+            return
+    except FileNotFoundError:
+        pass
+    with open(sweep_path, 'w'):
+        pass # Updates its mtime
+
+    for entry in os.scandir(directory):
+        try:
+            if (entry.name.endswith(('.result', '.owner', '.partial'))
+                    and now - entry.stat().st_mtime > _RESULT_TTL):
+                os.remove(entry.path)
+        except OSError:
+            pass # Removed by another process
+
+def _coalesce_processes(key: str, compute: Callable[[], Any]) -> Any:
+    """ Computes the result, unless another process is already computing it, in which
+        case this waits for that process and returns its result instead
+    """
+    directory = _store_dir()
+    if directory is None:
+        return compute()
+
+    lock_path = os.path.join(directory, f'{key}.lock')
+    acquired, owner = _acquire_lock(directory, lock_path)
+    if owner is None:
+        return compute()
+    result_path = os.path.join(directory, f'{key}.{owner}.result')
+
+    if acquired:
+        try:
+            result = compute()
+            _write_result(directory, result_path, result)
+            _sweep_results(directory)
+            return result
+        finally:
+            _release_lock(lock_path, owner)
+
+    # Wait for the process that held the lock, even if another one has taken it since
+    deadline = time.monotonic() + _LOCK_TIMEOUT
+    while _read_owner(lock_path) == owner and time.monotonic() < deadline:
+        time.sleep(_POLL_INTERVAL)
+
+    result = _read_result(result_path)
+    # If the other process failed, compute it ourselves
+    return result if result is not None else compute()
+
+def coalesce(key: str, compute: Callable[[], Any]) -> Any:
+    """ Returns the result of compute(), sharing it with every other caller using the
+        same key while it's being computed. The result must be JSON serializable, and
+        is decoded from JSON (i.e. tuples become lists) if it's from another process.
+        Callers stop waiting on a computation after _LOCK_TIMEOUT and compute the
+        result themselves, so one that hangs doesn't hold up every request for it
+    """
+    with _calls_lock:
+        call = _calls.get(key)
+        is_leader = call is None
+        if is_leader:
+            call = _calls[key] = _Call()
+
+    if not is_leader:
+        if not call.done.wait(_LOCK_TIMEOUT):
+            return compute()
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    try:
+        call.result = _coalesce_processes(key, compute)
+        return call.result
+    except Exception as err:
+        call.error = err
+        raise
+    finally:
+        with _calls_lock:
+            del _calls[key]
+        call.done.set()
+
+def single_flight(view_method):
+    """ Decorator for an APIView's get/post method that coalesces identical requests """
+    @wraps(view_method)
+    def wrapper(view, request, *args, **kwargs):
+        def compute():
+            response = view_method(view, request, *args, **kwargs)
+            headers = [(header, value) for header, value in response.items()
+                       if header.lower() not in _RENDERED_HEADERS]
+            return (response.data, response.status_code, headers)
+
+        data, status, headers = coalesce(canonical_request_key(request), compute)
+        response = Response(data, status=status)
+        for header, value in headers:
+            response[header] = value
+        return response
+
+    return wrapper
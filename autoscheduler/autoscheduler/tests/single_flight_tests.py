@@ -0,0 +1,258 @@
+import json
+import os
+import threading
+import time
+from tempfile import TemporaryDirectory
+
+from unittest.mock import patch
+from django.test import SimpleTestCase, override_settings
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+from rest_framework.views import APIView
+
+from autoscheduler.single_flight import canonical_request_key, coalesce, single_flight
+
+def _request_key(method: str, path: str, data=None) -> str:
+    """ Creates a DRF request and returns its canonical key """
+    factory = APIRequestFactory()
+    if method == 'GET':
+        request = factory.get(path, data)
+    else:
+        request = factory.post(path, data, format='json')
+    return canonical_request_key(APIView().initialize_request(request))
+
+class SingleFlightTests(SimpleTestCase):
+    """ Tests for coalescing identical concurrent requests """
+
+    def setUp(self):
+        self.store = TemporaryDirectory()
+        self.addCleanup(self.store.cleanup)
+
+    def test_canonical_request_key_ignores_param_order(self):
+        """ Tests that query params and JSON keys in a different order give the same key
+        """
+        # Act
+        get_a = _request_key('GET', '/api/sections?dept=CSCE&course_num=121&term=201931')
+        get_b = _request_key('GET', '/api/sections?term=201931&dept=CSCE&course_num=121')
+        post_a = _request_key('POST', '/scheduler/generate', {'term': '1', 'courses': []})
+        post_b = _request_key('POST', '/scheduler/generate', {'courses': [], 'term': '1'})
+
+        # Assert
+        self.assertEqual(get_a, get_b)
+        self.assertEqual(post_a, post_b)
+
+    def test_canonical_request_key_differs_for_different_requests(self):
+        """ Tests that requests with different params or bodies get different keys """
+        # Act
+        get_a = _request_key('GET', '/api/sections?dept=CSCE&course_num=121')
+        get_b = _request_key('GET', '/api/sections?dept=CSCE&course_num=221')
+        post_a = _request_key('POST', '/scheduler/generate', {'term': '201931'})
+        post_b = _request_key('POST', '/scheduler/generate', {'term': '202011'})
+
+        # Assert
+        self.assertNotEqual(get_a, get_b)
+        self.assertNotEqual(post_a, post_b)
+
+    def test_coalesce_shares_result_between_threads(self):
+        """ Tests that concurrent calls with the same key only compute the result once
+        """
+        # Arrange
+        release = threading.Event()
+        calls = []
+        results = []
+
+        def compute():
+            calls.append(1)
+            release.wait(5)
+            return 'result'
+
+        def run():
+            results.append(coalesce('key', compute))
+
+        threads = [threading.Thread(target=run) for _ in range(4)]
+
+        # Act
+        with override_settings(SINGLE_FLIGHT_DIR=self.store.name):
+            for thread in threads:
+                thread.start()
+            # Give the other threads time to start waiting on the first one
+            time.sleep(0.2)
+            release.set()
+            for thread in threads:
+                thread.join(5)
+
+        # Assert
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ['result'] * 4)
+
+    def test_coalesce_computes_again_after_finishing(self):
+        """ Tests that results aren't reused by requests made after they've finished """
+        # Arrange
+        values = iter([1, 2])
+
+        # Act
+        with override_settings(SINGLE_FLIGHT_DIR=self.store.name):
+            first = coalesce('key', lambda: next(values))
+            second = coalesce('key', lambda: next(values))
+
+        # Assert
+        self.assertEqual((first, second), (1, 2))
+
+    def test_coalesce_waits_for_other_process(self):
+        """ Tests that a request uses the result of another process that was already
+            computing it
+        """
+        # Arrange
+        lock_path = os.path.join(self.store.name, 'key.lock')
+        result_path = os.path.join(self.store.name, 'key.other.result')
+        with open(lock_path, 'w') as lock_file:
+            lock_file.write('other')
+
+        def finish_other_process():
+            time.sleep(0.2)
+            with open(result_path, 'w') as result_file:
+                json.dump('other result', result_file)
+            os.remove(lock_path)
+
+        other_process = threading.Thread(target=finish_other_process)
+
+        # Act
+        with override_settings(SINGLE_FLIGHT_DIR=self.store.name):
+            other_process.start()
+            result = coalesce('key', lambda: 'own result')
+        other_process.join()
+
+        # Assert
+        self.assertEqual(result, 'other result')
+
+    def test_coalesce_ignores_results_of_earlier_computations(self):
+        """ Tests that a request waiting on another process doesn't use a result left by
+            an earlier process
+        """
+        # Arrange
+        lock_path = os.path.join(self.store.name, 'key.lock')
+        with open(lock_path, 'w') as lock_file:
+            lock_file.write('other')
+        with open(os.path.join(self.store.name, 'key.earlier.result'), 'w') as result:
+            json.dump('earlier result', result)
+
+        def fail_other_process():
+            time.sleep(0.2)
+            os.remove(lock_path)
+
+        other_process = threading.Thread(target=fail_other_process)
+
+        # Act
+        with override_settings(SINGLE_FLIGHT_DIR=self.store.name):
+            other_process.start()
+            result = coalesce('key', lambda: 'own result')
+        other_process.join()
+
+        # Assert
+        self.assertEqual(result, 'own result')
+
+    def test_coalesce_only_releases_own_lock(self):
+        """ Tests that a process whose lock was broken and taken by another process
+            doesn't release the other process' lock
+        """
+        # Arrange
+        lock_path = os.path.join(self.store.name, 'key.lock')
+
+        def compute():
+            # Took so long that another process broke the lock and took it
+            with open(lock_path, 'w') as lock_file:
+                lock_file.write('other')
+            return 'result'
+
+        # Act
+        with override_settings(SINGLE_FLIGHT_DIR=self.store.name):
+            coalesce('key', compute)
+
+        # Assert
+        with open(lock_path) as lock_file:
+            self.assertEqual(lock_file.read(), 'other')
+
+    def test_coalesce_breaks_abandoned_lock(self):
+        """ Tests that a lock left behind by a process that died doesn't block requests
+        """
+        # Arrange
+        lock_path = os.path.join(self.store.name, 'key.lock')
+        open(lock_path, 'w').close()
+        old = time.time() - 60
+        os.utime(lock_path, (old, old))
+
+        # Act
+        with override_settings(SINGLE_FLIGHT_DIR=self.store.name):
+            result = coalesce('key', lambda: 'own result')
+
+        # Assert
+        self.assertEqual(result, 'own result')
+        self.assertFalse(os.path.exists(lock_path))
+
+    def test_coalesce_works_without_store(self):
+        """ Tests that requests are still handled when the store directory is unusable
+        """
+        # Arrange
+        unusable = os.path.join(self.store.name, 'file')
+        open(unusable, 'w').close()
+
+        # Act
+        with override_settings(SINGLE_FLIGHT_DIR=unusable):
+            result = coalesce('key', lambda: 'result')
+
+        # Assert
+        self.assertEqual(result, 'result')
+        self.assertEqual(os.listdir(self.store.name), ['file'])
+
+    def test_coalesce_doesnt_use_store_others_can_write_to(self):
+        """ Tests that results aren't shared through a directory other users can write
+            to, since they could make other processes return anything
+        """
+        # Arrange
+        os.chmod(self.store.name, 0o777)
+
+        # Act
+        with override_settings(SINGLE_FLIGHT_DIR=self.store.name):
+            result = coalesce('key', lambda: 'result')
+
+        # Assert
+        self.assertEqual(result, 'result')
+        self.assertEqual(os.listdir(self.store.name), [])
+
+    def test_coalesce_stops_waiting_for_hung_computation(self):
+        """ Tests that a call waiting on a computation that doesn't finish computes the
+            result itself after the timeout
+        """
+        # Arrange
+        release = threading.Event()
+        leader = threading.Thread(
+            target=lambda: coalesce('key', lambda: release.wait(5) and 'leader result'))
+
+        # Act
+        with patch('autoscheduler.single_flight._LOCK_TIMEOUT', 0.2):
+            leader.start()
+            time.sleep(0.05)
+            result = coalesce('key', lambda: 'own result')
+        release.set()
+        leader.join(5)
+
+        # Assert
+        self.assertEqual(result, 'own result')
+
+    def test_single_flight_keeps_response_headers(self):
+        """ Tests that the headers the view set are kept in the coalesced response """
+        # Arrange
+        class HeadersView(APIView):
+            """ View that sets a header """
+            @single_flight
+            def get(self, request):
+                """ Responds with the Vary header set """
+                return Response({}, headers={'Vary': 'Cookie'})
+
+        request = APIRequestFactory().get('/headers')
+
+        # Act
+        response = HeadersView.as_view()(request)
+
+        # Assert
+        self.assertIn('Cookie', response['Vary'])
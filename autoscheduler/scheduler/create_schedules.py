@@ -1,7 +1,8 @@
 from itertools import islice, groupby
 from typing import Dict, Iterable, List, Tuple
 from django.db.models import QuerySet
-from scraper.models import Meeting, Section
+from scraper.models import CourseConflict, Meeting, Section
+from scraper.models.course import generate_course_id
 from scheduler.utils import random_product, CourseFilter, UnavailableTime, BasicFilter
 
 class NoSchedulesError(Exception):
@@ -23,6 +24,10 @@ _NO_SECTIONS_MATCH_AVAILABILITIES = (
 _NO_COURSES = (
     'You must add at least one course to generate schedules.'
 )
+_COURSES_CONFLICT = (
+    '{subject} {course_num} and {other_subject} {other_course_num}: Every section of '
+    'these courses meets at the same time, so they can\'t be taken together.'
+)
 _NO_SCHEDULES_POSSIBLE = (
     'No schedules possible. '
     'Either select more sections or remove some of your busy times.'
@@ -71,6 +76,48 @@ def _apply_basic_filters(sections: QuerySet, course: CourseFilter):
 
     return sections
 
+def _check_course_conflicts(courses: List[CourseFilter], term: str):
+    """ Raises a NoSchedulesError if any two of the given courses can never be in the
+        same schedule, according to the conflict graph saved by scrape_courses.
+
+        Filters only ever remove sections, so courses that conflict in the graph will
+        still conflict after the filters are applied
+    """
+    course_ids = {generate_course_id(course.subject, str(course.course_num), str(term))
+                  for course in courses}
+    if len(course_ids) < 2:
+        return
+
+    conflict = (CourseConflict.objects
+                .filter(course_id__in=course_ids, other_course_id__in=course_ids,
+                        compatible_pairs=0)
+                .select_related('course', 'other_course')
+                .first())
+    if conflict is not None:
+        raise NoSchedulesError(_COURSES_CONFLICT.format(
+            subject=conflict.course.dept,
+            course_num=conflict.course.course_num,
+            other_subject=conflict.other_course.dept,
+            other_course_num=conflict.other_course.course_num,
+        ))
+
+def _group_meetings(meetings: QuerySet) -> Dict[int, Tuple[Meeting]]:
+    """ Retrieves the given meetings and organizes them by section id, converting their
+        meeting_days to sets of day numbers so they can be compared by _schedule_valid
+    """
+    meetings = (meetings
+                # Must be ordered by section id or groupby() doesn't work
+                .order_by('section_id')
+                .only('start_time', 'end_time', 'section_id', 'meeting_days'))
+
+    # Convert meeting_days into a set to check meeting days efficiently
+    for meeting in meetings:
+        meeting.meeting_days = set(i for i, day in enumerate(meeting.meeting_days) if day)
+
+    # Organize meetings by section number
+    return {section_id: tuple(meetings)
+            for section_id, meetings in groupby(meetings, key=lambda m: m.section_id)}
+
 def _get_meetings(course: CourseFilter, term: str,
                   unavailable_times: List[UnavailableTime]) -> Dict[str, Tuple[Meeting]]:
     """ Gets all sections and meetings for each course in courses, and organizes them
@@ -114,19 +161,8 @@ def _get_meetings(course: CourseFilter, term: str,
                                            course_num=course.course_num)
         )
 
-    # Get meetings based on sections of the course and order them by end time
-    meetings = (Meeting.objects.filter(section_id__in=section_ids)
-                # Must be ordered by section id or groupby() doesn't work
-                .order_by('section_id')
-                .only('start_time', 'end_time', 'section_id', 'meeting_days'))
-
-    # Convert meeting_days into a set to check meeting days efficiently
-    for meeting in meetings:
-        meeting.meeting_days = set(i for i, day in enumerate(meeting.meeting_days) if day)
-
-    # Organize meetings by section number
-    meetings = {section_id: tuple(meetings)
-                for section_id, meetings in groupby(meetings, key=lambda m: m.section_id)}
+    # Get meetings based on sections of the course
+    meetings = _group_meetings(Meeting.objects.filter(section_id__in=section_ids))
 
     # Filter sections incompatible with unavailable_times by trying to create a "schedule"
     # containing the section and unavailable times
@@ -216,6 +252,8 @@ def create_schedules(courses: List[CourseFilter], term: str,
     # meetings: Tuple of dicts mapping sections to meetings for each course
     meetings = tuple(_get_meetings(course, term, unavailable_times)
                      for course in courses)
+    # Checked after each course's sections, so their errors still come first
+    _check_course_conflicts(courses, term)
     # Get valid section ids for each course
     valid_choices = tuple(tuple(section_ids) for section_ids in meetings)
 
@@ -230,3 +268,38 @@ def create_schedules(courses: List[CourseFilter], term: str,
     if not schedules:
         raise NoSchedulesError(_NO_SCHEDULES_POSSIBLE)
     return schedules
+
+def find_alternative_sections(course: CourseFilter, term: str, schedule: List[int],
+                              unavailable_times: List[UnavailableTime]) -> List[int]:
+    """ Finds every section of a course that could replace its current section in a
+        schedule without conflicting with the rest of the schedule.
+
+    Args:
+        course: The course whose section is being swapped
+        term: Term code of the schedule
+        schedule: Section ids in the schedule, which can include the course's current
+                  section
+        unavailable_times: Times that the user doesn't want to be in any courses
+
+    Returns:
+        Sorted list of the ids of the alternative sections, not including any sections
+        already in the schedule
+    """
+    # Raises NoSchedulesError if no sections match the filters & unavailable_times
+    candidates = _get_meetings(course, term, unavailable_times)
+
+    other_meetings = _group_meetings(
+        Meeting.objects.filter(section_id__in=schedule)
+        .exclude(section__subject=course.subject, section__course_num=course.course_num)
+    )
+    # The other sections are checked as if they were one big "section", the same way
+    # unavailable_times are checked in _get_meetings
+    compatibility = (
+        {"schedule": tuple(meeting for meetings in other_meetings.values()
+                           for meeting in meetings)},
+        candidates,
+    )
+
+    return sorted(section for section in candidates
+                  if section not in schedule
+                  and _schedule_valid(compatibility, ("schedule", section)))
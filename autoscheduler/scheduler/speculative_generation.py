@@ -0,0 +1,139 @@
+""" Generates schedules in the background while the user is still editing their courses
+    and availabilities, so pressing Generate can usually return them right away.
+
+    The save_courses and save_availabilities endpoints can be given the body the frontend
+    would send to scheduler/generate for the saved state, and the section fields it'll
+    ask for. That body is generated on a single low-priority background thread and the
+    result is cached under its generation_key, which scheduler/generate also coalesces
+    requests by, so a Generate request made while it's running waits for it. Saving
+    again supersedes any generation for that session and term which hasn't started yet.
+
+    Results are cached in settings.CACHES['generated'], which the processes on a machine
+    share, so Generate can be handled by a different worker than the save. Machines
+    don't share it, so if Generate goes to another machine the schedules are just
+    generated again.
+"""
+
+import itertools
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import AbstractSet, Any, Callable, Dict, Optional, Tuple
+from django.core.cache import caches
+from django.db import connection
+from autoscheduler.single_flight import canonical_key, coalesce
+
+GENERATE_PATH = '/scheduler/generate'
+
+# How long generated schedules are kept for if Generate is never pressed
+_RESULT_TIMEOUT = 10 * 60
+# Max number of generations waiting to run before new ones are dropped
+_MAX_PENDING = 32
+# How much to lower the priority of the background thread, as for `nice`
+_NICENESS = 10
+
+def _lower_priority():
+    """ Lowers the priority of the background thread so it doesn't slow down requests.
+        On Linux, which the app is deployed on, each thread has its own priority, so
+        this only affects the background thread
+    """
+    try:
+        os.nice(_NICENESS)
+    except OSError:
+        logging.warning('Could not lower the priority of speculative generation')
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='speculative',
+                               initializer=_lower_priority)
+_pending = threading.BoundedSemaphore(_MAX_PENDING)
+_tokens = itertools.count()
+# The token of the generation waiting to run for each session and term. Entries are
+# removed when it starts or is superseded, so there are at most _MAX_PENDING
+_latest: Dict[Tuple[str, str], int] = {}
+_latest_lock = threading.Lock()
+
+def generation_key(body: Any, fields: Optional[AbstractSet[str]] = None) -> str:
+    """ Gets the key that generating the schedules for the body of a scheduler/generate
+        request, with only the given section fields, is coalesced and cached by. Other
+        query params (i.e. normalized) only change how the result is formatted, so
+        they don't change the key
+    """
+    query = [] if fields is None else [('fields', sorted(fields))]
+    return canonical_key('POST', GENERATE_PATH, query, body)
+
+def _cache_key(key: str) -> str:
+    return f'speculative-generation:{key}'
+
+def _start(session_key: str, term: str, token: int) -> bool:
+    """ Returns whether the generation with token is still the latest one for the
+        session and term, and if so marks it as started so it can't be superseded
+    """
+    with _latest_lock:
+        if _latest.get((session_key, term)) != token:
+            return False
+        del _latest[(session_key, term)]
+        return True
+
+def supersede(session_key: Optional[str], term: str):
+    """ Makes any generation enqueued for the session and term stale """
+    with _latest_lock:
+        _latest.pop((session_key, term), None)
+
+def _generate(session_key: str, term: str, token: int, key: str,
+              generate: Callable[[], Any]):
+    """ Generates the schedules with generate() and caches them under key, unless
+        they've been superseded
+    """
+    try:
+        if not _start(session_key, term, token):
+            return
+
+        def compute():
+            result = (generate(), 200)
+            caches['generated'].set(_cache_key(key), result, _RESULT_TIMEOUT)
+            return result
+
+        # If Generate is pressed while this is running, it'll wait for this to finish,
+        # and then remove the result from the cache
+        coalesce(key, compute)
+    except Exception: # pylint: disable=broad-except
+        # The Generate request will fail the same way, so just log it
+        logging.exception('Speculative schedule generation failed')
+    finally:
+        _pending.release()
+        connection.close()
+
+def enqueue_generation(session_key: Optional[str], term: str, body: Any,
+                       fields: Optional[AbstractSet[str]], generate: Callable[..., Any]):
+    """ Supersedes any generation for the session and term, then enqueues generating
+        body in the background with generate(body, fields).
+        Nothing is generated for sessions that haven't been saved yet, since all of
+        them have None as their key and would supersede each other's generations
+    """
+    if session_key is None:
+        return
+
+    # Drop the generation if too many are queued, since it's only an optimization
+    if not _pending.acquire(blocking=False):
+        supersede(session_key, term)
+        return
+
+    token = next(_tokens)
+    with _latest_lock:
+        _latest[(session_key, term)] = token
+
+    _executor.submit(_generate, session_key, term, token, generation_key(body, fields),
+                     partial(generate, body, fields))
+
+def take_generated(key: str) -> Optional[Tuple[Any, int]]:
+    """ Returns the (data, status) generated in the background for the generation_key,
+        or None if there isn't one. Each result is only returned once, so pressing
+        Generate again gives different schedules
+    """
+    cache = caches['generated']
+    result = cache.get(_cache_key(key))
+    if result is not None:
+        cache.delete(_cache_key(key))
+
+    return result
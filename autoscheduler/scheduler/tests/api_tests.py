@@ -2,9 +2,10 @@ from unittest.mock import patch
 from datetime import time
 from rest_framework.test import APITestCase, APIClient
 from scheduler.views import (_parse_course_filter, _parse_unavailable_time,
-                             _serialize_schedules)
+                             _serialize_schedules, normalize_schedules)
 from scheduler.utils import UnavailableTime, CourseFilter, BasicFilter
-from scraper.models import Section, Instructor
+from scraper.models import Course, Meeting, Section, Instructor
+from scraper.models.section import generate_time_range
 from scraper.serializers import SectionSerializer
 
 class SchedulingAPITests(APITestCase):
@@ -161,3 +162,287 @@ class SchedulingAPITests(APITestCase):
 
         # Assert
         self.assertEqual(result, expected)
+
+    def test_normalize_schedules_includes_each_section_once(self):
+        """ Tests that normalize_schedules replaces the sections of each schedule with
+            their ids, and includes each section once
+        """
+
+        # Arrange
+        schedules = _serialize_schedules([(1, 2), (2,)])
+
+        expected = {
+            'sections': {str(section.id): SectionSerializer(section).data
+                         for section in self.sections},
+            'schedules': [[1, 2], [2]],
+        }
+
+        # Act
+        result = normalize_schedules(schedules)
+
+        # Assert
+        self.assertEqual(result, expected)
+
+    @patch('scheduler.views.create_schedules')
+    def test_route_scheduling_generate_normalized_is_correct(self, create_schedules_mock):
+        """ Tests that /scheduling/generate?normalized=true gives the sections once """
+
+        # Arrange
+        create_schedules_mock.return_value = [(1, 2), (2,)]
+
+        request_body = {
+            "term": "201931",
+            "courses": [
+                {
+                    "subject": "CSCE",
+                    "courseNum": 221,
+                    "sections": [],
+                    "honors": "exclude",
+                    "remote": "exclude",
+                    "asynchronous": "exclude",
+                },
+            ],
+            "availabilities": [],
+            "includeFull": True,
+        }
+
+        expected = {
+            'sections': {str(section.id): SectionSerializer(section).data
+                         for section in self.sections},
+            'schedules': [[1, 2], [2]],
+            'message': '',
+        }
+
+        # Act
+        result = self.client.post('/scheduler/generate?normalized=true', request_body,
+                                  format='json')
+        result = result.json()
+
+        # Assert
+        self.assertEqual(result, expected)
+
+    @patch('scheduler.views.create_schedules')
+    def test_route_scheduling_generate_only_includes_requested_fields(
+            self, create_schedules_mock):
+        """ Tests that /scheduling/generate?fields=... only includes those fields of the
+            sections, and their ids
+        """
+
+        # Arrange
+        create_schedules_mock.return_value = [(1, 2)]
+
+        request_body = {
+            "term": "201931",
+            "courses": [],
+            "availabilities": [],
+            "includeFull": True,
+        }
+
+        expected = {
+            'schedules': [[{'id': 1, 'crn': 1}, {'id': 2, 'crn': 2}]],
+            'message': '',
+        }
+
+        # Act
+        result = self.client.post('/scheduler/generate?fields=crn', request_body,
+                                  format='json')
+        result = result.json()
+
+        # Assert
+        self.assertEqual(result, expected)
+
+    @patch('scheduler.views.find_alternative_sections')
+    def test_route_scheduling_swap_section_is_correct(self, find_alternatives_mock):
+        """ Tests that /scheduler/swap_section serializes the alternative sections """
+
+        # Arrange
+        find_alternatives_mock.return_value = [2]
+
+        request_body = {
+            "term": "201931",
+            "sections": [1],
+            "course": {
+                "subject": "CSCE",
+                "courseNum": "221",
+                "sections": [],
+                "honors": "no_preference",
+                "remote": "no_preference",
+                "asynchronous": "no_preference",
+            },
+            "availabilities": [],
+        }
+
+        expected = {
+            'sections': [SectionSerializer(self.sections[1]).data],
+            'message': '',
+        }
+
+        # Act
+        result = self.client.post('/scheduler/swap_section', request_body, format='json')
+        result = result.json()
+
+        # Assert
+        self.assertEqual(result, expected)
+        course, term, schedule, _ = find_alternatives_mock.call_args[0]
+        self.assertEqual((course.subject, course.course_num, term, schedule),
+                         ("CSCE", "221", "201931", [1]))
+
+class OpenCoursesAPITests(APITestCase):
+    """ Tests for /scheduler/open_courses """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.client = APIClient()
+
+        instructor = Instructor(id="name")
+        instructor.save()
+        Course.objects.bulk_create([
+            Course(id='CSCE121-201931', dept='CSCE', course_num='121',
+                   title='INTRODUCTION TO PROGRAM DESIGN', term='201931'),
+            Course(id='CSCE221-201931', dept='CSCE', course_num='221',
+                   title='DATA STRUCTURES', term='201931'),
+            Course(id='CSCE310-201931', dept='CSCE', course_num='310',
+                   title='DATABASE SYSTEMS', term='201931'),
+            Course(id='MATH151-201931', dept='MATH', course_num='151',
+                   title='ENGINEERING MATH I', term='201931'),
+        ])
+        cls.sections = [
+            Section(id=1, crn=1, subject='CSCE', course_num='121', section_num='501',
+                    term_code='201931', min_credits=0, honors=False, remote=False,
+                    current_enrollment=0, max_enrollment=10, instructor=instructor,
+                    asynchronous=False),
+            Section(id=2, crn=2, subject='CSCE', course_num='221', section_num='501',
+                    term_code='201931', min_credits=0, honors=False, remote=False,
+                    current_enrollment=0, max_enrollment=10, instructor=instructor,
+                    asynchronous=False),
+            Section(id=3, crn=3, subject='CSCE', course_num='310', section_num='501',
+                    term_code='201931', min_credits=0, honors=False, remote=False,
+                    current_enrollment=10, max_enrollment=10, instructor=instructor,
+                    asynchronous=False),
+            Section(id=4, crn=4, subject='MATH', course_num='151', section_num='501',
+                    term_code='201931', min_credits=0, honors=False, remote=False,
+                    current_enrollment=0, max_enrollment=10, instructor=instructor,
+                    asynchronous=False),
+        ]
+        Section.objects.bulk_create(cls.sections)
+
+        monday = [True] + [False] * 6
+        def meeting(meeting_id, section, start, end):
+            return Meeting(id=meeting_id, meeting_days=monday, start_time=start,
+                           end_time=end, time_range=generate_time_range(start, end),
+                           meeting_type='LEC', section=section)
+        Meeting.objects.bulk_create([
+            meeting(10, cls.sections[0], time(8), time(8, 50)),
+            meeting(20, cls.sections[1], time(9), time(9, 50)),
+            meeting(30, cls.sections[2], time(13), time(13, 50)),
+            meeting(40, cls.sections[3], time(8, 50), time(9, 40)),
+        ])
+
+    def test_open_courses_excludes_courses_overlapping_availabilities(self):
+        """ Tests that courses whose sections all overlap a busy time aren't returned,
+            including sections that only touch the busy time
+        """
+        # Arrange
+        request_body = {
+            "term": "201931",
+            "availabilities": [{"startTime": "0800", "endTime": "0850", "day": 0}],
+            "includeFull": True,
+        }
+        expected = {'results': ['CSCE 221 - DATA STRUCTURES',
+                                'CSCE 310 - DATABASE SYSTEMS']}
+
+        # Act
+        response = self.client.post('/scheduler/open_courses', request_body,
+                                    format='json')
+
+        # Assert
+        self.assertEqual(response.json(), expected)
+
+    def test_open_courses_excludes_courses_overlapping_locked_sections(self):
+        """ Tests that courses overlapping the locked sections, as well as the locked
+            courses themselves, aren't returned
+        """
+        # Arrange
+        request_body = {
+            "term": "201931",
+            "sections": [1],
+            "dept": "csce",
+            "includeFull": True,
+        }
+        expected = {'results': ['CSCE 221 - DATA STRUCTURES',
+                                'CSCE 310 - DATABASE SYSTEMS']}
+
+        # Act
+        response = self.client.post('/scheduler/open_courses', request_body,
+                                    format='json')
+
+        # Assert
+        self.assertEqual(response.json(), expected)
+
+    def test_open_courses_filters_level_and_full_sections(self):
+        """ Tests that the level filter is applied and full sections don't count
+            unless includeFull is given
+        """
+        # Arrange
+        request_body = {"term": "201931", "level": "300"}
+        expected = {'results': []}
+
+        # Act
+        response = self.client.post('/scheduler/open_courses', request_body,
+                                    format='json')
+
+        # Assert
+        self.assertEqual(response.json(), expected)
+
+    def test_open_courses_includes_sections_without_meetings(self):
+        """ Tests that a course whose only section has no meetings, like an online one,
+            is returned regardless of the busy times
+        """
+        # Arrange
+        Meeting.objects.filter(section_id=4).delete()
+        request_body = {
+            "term": "201931",
+            "availabilities": [{"startTime": "0800", "endTime": "2000", "day": 0}],
+            "dept": "MATH",
+        }
+        expected = {'results': ['MATH 151 - ENGINEERING MATH I']}
+
+        # Act
+        response = self.client.post('/scheduler/open_courses', request_body,
+                                    format='json')
+
+        # Assert
+        self.assertEqual(response.json(), expected)
+
+    def test_open_courses_rejects_malformed_busy_times(self):
+        """ Tests that /scheduler/open_courses gives a 400 error if an availability or
+            the locked sections are malformed
+        """
+        # Arrange
+        availability = {"startTime": "0800", "endTime": "0850", "day": 0}
+        request_bodies = [
+            {"term": "201931", "availabilities": [{**availability, "day": 7}]},
+            {"term": "201931", "availabilities": [{**availability, "day": "0"}]},
+            {"term": "201931", "availabilities": [{**availability, "endTime": "8:50"}]},
+            {"term": "201931", "availabilities": [{**availability, "endTime": "2500"}]},
+            {"term": "201931", "availabilities": [{**availability, "endTime": "0700"}]},
+            {"term": "201931", "availabilities": [{"day": 0}]},
+            {"term": "201931", "availabilities": {}},
+            {"term": "201931", "sections": ["1"]},
+        ]
+
+        # Act
+        responses = [self.client.post('/scheduler/open_courses', body, format='json')
+                     for body in request_bodies]
+
+        # Assert
+        self.assertEqual([response.status_code for response in responses],
+                         [400] * len(request_bodies))
+
+    def test_open_courses_requires_term(self):
+        """ Tests that /scheduler/open_courses gives a 400 error without a term """
+        # Act
+        response = self.client.post('/scheduler/open_courses', {}, format='json')
+
+        # Assert
+        self.assertEqual(response.status_code, 400)
@@ -6,10 +6,10 @@ import django.test
 from scheduler.create_schedules import (
     _get_meetings, _schedule_valid, create_schedules, NoSchedulesError, _NO_COURSES,
     _NO_SECTIONS_WITH_SEATS, _NO_SECTIONS_MATCH_AVAILABILITIES, _NO_SCHEDULES_POSSIBLE,
-    _BASIC_FILTERS_TOO_RESTRICTIVE,
+    _BASIC_FILTERS_TOO_RESTRICTIVE, _COURSES_CONFLICT, find_alternative_sections,
 )
 from scheduler.utils import CourseFilter, UnavailableTime, BasicFilter
-from scraper.models import Instructor, Meeting, Section
+from scraper.models import Course, CourseConflict, Instructor, Meeting, Section
 
 class SchedulingTests(django.test.TestCase): #pylint: disable=too-many-public-methods
     """ Tests for generate_schedules and its helper functions """
@@ -631,6 +631,67 @@ class SchedulingTests(django.test.TestCase): #pylint: disable=too-many-public-me
         with self.assertRaisesMessage(NoSchedulesError, expected_error):
             create_schedules(courses, term, unavailable_times)
 
+    def test_create_schedules_throws_when_courses_conflict(self):
+        """ Tests that create_schedules throws an appropriate error message when the
+            conflict graph says two of the courses can never be taken together
+        """
+        # Arrange
+        courses = (
+            CourseFilter('CSCE', '121', include_full=True),
+            CourseFilter('CSCE', '310', include_full=True),
+        )
+        term = '201931'
+        unavailable_times = []
+        Course.objects.bulk_create([
+            Course(id='CSCE121-201931', dept='CSCE', course_num='121',
+                   title='PROGRAM DESIGN CONCEPT', term=term, credit_hours=4),
+            Course(id='CSCE310-201931', dept='CSCE', course_num='310',
+                   title='DATABASE SYSTEMS', term=term, credit_hours=3),
+        ])
+        CourseConflict(course_id='CSCE121-201931',
+                       other_course_id='CSCE310-201931').save()
+        # The conflict is only checked once both courses have sections that fit
+        Meeting.objects.bulk_create([
+            Meeting(id=10, meeting_days=[True] * 7, start_time=time(11, 30),
+                    end_time=time(12, 20), meeting_type='LEC', section=self.sections[0]),
+            Meeting(id=40, meeting_days=[True] * 7, start_time=time(11, 30),
+                    end_time=time(12, 20), meeting_type='LEC', section=self.sections[3]),
+        ])
+        expected_error = _COURSES_CONFLICT.format(subject='CSCE', course_num='121',
+                                                  other_subject='CSCE',
+                                                  other_course_num='310')
+
+        # Act + Assert
+        with self.assertRaisesMessage(NoSchedulesError, expected_error):
+            create_schedules(courses, term, unavailable_times)
+
+    def test_create_schedules_gives_course_errors_before_conflicts(self):
+        """ Tests that create_schedules gives a course's own error, like no sections
+            matching its filters, before saying that it conflicts with another course
+        """
+        # Arrange
+        # None of CSCE 310's sections are honors
+        courses = (
+            CourseFilter('CSCE', '310', honors=BasicFilter.ONLY, include_full=True),
+            CourseFilter('CSCE', '121', include_full=True),
+        )
+        term = '201931'
+        unavailable_times = []
+        Course.objects.bulk_create([
+            Course(id='CSCE121-201931', dept='CSCE', course_num='121',
+                   title='PROGRAM DESIGN CONCEPT', term=term, credit_hours=4),
+            Course(id='CSCE310-201931', dept='CSCE', course_num='310',
+                   title='DATABASE SYSTEMS', term=term, credit_hours=3),
+        ])
+        CourseConflict(course_id='CSCE121-201931',
+                       other_course_id='CSCE310-201931').save()
+        expected_error = _BASIC_FILTERS_TOO_RESTRICTIVE.format(subject='CSCE',
+                                                               course_num='310')
+
+        # Act + Assert
+        with self.assertRaisesMessage(NoSchedulesError, expected_error):
+            create_schedules(courses, term, unavailable_times)
+
     def test_create_shedules_throws_when_no_sections_match_basic_filters(self):
         """ Tests that create_schedules throws an appropriate error message when no
             sections match the provided basic filters.
@@ -663,6 +724,43 @@ class SchedulingTests(django.test.TestCase): #pylint: disable=too-many-public-me
         with self.assertRaisesMessage(NoSchedulesError, expected_error):
             create_schedules(courses, term, unavailable_times)
 
+    def test_find_alternative_sections_excludes_conflicting_sections(self):
+        """ Tests that find_alternative_sections only gives sections of the course that
+            fit with the rest of the schedule and the unavailable times
+        """
+        # Arrange
+        course = CourseFilter('CSCE', '121', honors=BasicFilter.NO_PREFERENCE,
+                              include_full=True)
+        term = '201931'
+        schedule = [1, 4]
+        unavailable_times = [UnavailableTime(time(12), time(13), 0)]
+        monday = [True, *[False] * 6]
+        meetings = [
+            # CSCE 310-501, which stays in the schedule
+            Meeting(id=10, meeting_days=monday, start_time=time(9),
+                    end_time=time(9, 50), meeting_type='LEC', section=self.sections[0]),
+            # CSCE 121-501, the section being swapped
+            Meeting(id=40, meeting_days=monday, start_time=time(8),
+                    end_time=time(8, 50), meeting_type='LEC', section=self.sections[3]),
+            # Conflicts with CSCE 310-501
+            Meeting(id=50, meeting_days=monday, start_time=time(9, 30),
+                    end_time=time(10, 20), meeting_type='LEC', section=self.sections[4]),
+            # Conflicts with the unavailable time
+            Meeting(id=60, meeting_days=monday, start_time=time(12, 30),
+                    end_time=time(13, 20), meeting_type='LEC', section=self.sections[5]),
+            Meeting(id=70, meeting_days=[False] * 7, start_time=None, end_time=None,
+                    meeting_type='LEC', section=self.sections[6]),
+        ]
+        Meeting.objects.bulk_create(meetings)
+        expected = [7]
+
+        # Act
+        alternatives = find_alternative_sections(course, term, schedule,
+                                                 unavailable_times)
+
+        # Assert
+        self.assertEqual(alternatives, expected)
+
     def test__get_meetings_manually_selected_sections_override_include_full(self):
         """ Tests that _get_meetings does not filter full sections selected in section
             select when include_full is false
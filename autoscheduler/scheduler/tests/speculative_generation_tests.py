@@ -0,0 +1,198 @@
+from unittest.mock import patch, MagicMock
+from django.core.cache import caches
+from django.contrib.sessions.models import Session
+from rest_framework.test import APITestCase
+from scheduler import speculative_generation
+
+class _DeferredExecutor:
+    """ Executor that holds submitted jobs until run_all is called, so tests can run the
+        background generation on the test's database connection
+    """
+    def __init__(self):
+        self.jobs = []
+
+    def submit(self, func, *args):
+        """ Holds the job instead of running it """
+        self.jobs.append((func, args))
+
+    def run_all(self):
+        """ Runs the held jobs in the order they were submitted """
+        for func, args in self.jobs:
+            func(*args)
+        self.jobs = []
+
+def _generate_body(term: str, course_num: str = '121'):
+    """ Creates the body of a scheduler/generate request for one course """
+    return {
+        'term': term,
+        'courses': [{
+            'subject': 'CSCE',
+            'courseNum': course_num,
+            'sections': [],
+            'honors': 'no_preference',
+            'remote': 'no_preference',
+            'asynchronous': 'no_preference',
+        }],
+        'availabilities': [],
+    }
+
+@patch('scheduler.speculative_generation.connection', MagicMock())
+class SpeculativeGenerationTests(APITestCase):
+    """ Tests generating schedules in the background when saving courses """
+
+    def setUp(self):
+        Session.objects.all().delete()
+        caches['generated'].clear()
+        # Generations are tracked by session key, so the client needs a saved session
+        self.client.session.save()
+        self.executor = _DeferredExecutor()
+        executor_patch = patch.object(speculative_generation, '_executor', self.executor)
+        executor_patch.start()
+        self.addCleanup(executor_patch.stop)
+
+    @patch('scheduler.views.create_schedules')
+    def test_generate_uses_schedules_generated_when_saving(self, create_schedules_mock):
+        """ Tests that /scheduler/generate returns the schedules generated in the
+            background by /sessions/save_courses, without generating them again
+        """
+        # Arrange
+        term = '201931'
+        body = _generate_body(term)
+        create_schedules_mock.return_value = []
+        self.client.put('/sessions/save_courses',
+                        {'courses': [], 'term': term, 'generate': body}, format='json')
+        self.executor.run_all()
+        create_schedules_mock.reset_mock()
+
+        # Act
+        # The keys are in a different order, but it's the same request
+        reordered = dict(reversed(list(body.items())))
+        response = self.client.post('/scheduler/generate', reordered, format='json')
+
+        # Assert
+        self.assertEqual(response.json(), {'schedules': [], 'message': ''})
+        create_schedules_mock.assert_not_called()
+
+    @patch('scheduler.views.create_schedules')
+    def test_generate_with_query_params_uses_generated_schedules(self,
+                                                                create_schedules_mock):
+        """ Tests that schedules generated in the background with the fields given when
+            saving are used by a Generate request with the same fields, whatever its
+            other query params are
+        """
+        # Arrange
+        term = '201931'
+        body = _generate_body(term)
+        create_schedules_mock.return_value = []
+        self.client.put('/sessions/save_courses?fields=id,crn',
+                        {'courses': [], 'term': term, 'generate': body}, format='json')
+        self.executor.run_all()
+        create_schedules_mock.reset_mock()
+
+        # Act
+        response = self.client.post('/scheduler/generate?normalized=true&fields=crn,id',
+                                    body, format='json')
+
+        # Assert
+        self.assertEqual(response.json()['schedules'], [])
+        create_schedules_mock.assert_not_called()
+
+    @patch('scheduler.views.create_schedules')
+    def test_generate_joining_generation_uses_up_its_result(self, create_schedules_mock):
+        """ Tests that a Generate request that waited for a background generation that
+            was still running removes its cached result, so the next one doesn't get
+            the same schedules again
+        """
+        # Arrange
+        term = '201931'
+        body = _generate_body(term)
+        create_schedules_mock.return_value = []
+        self.client.put('/sessions/save_courses',
+                        {'courses': [], 'term': term, 'generate': body}, format='json')
+        self.executor.run_all()
+        key = speculative_generation.generation_key(body)
+        result = caches['generated'].get(f'speculative-generation:{key}')
+
+        # Act
+        # Gets the background generation's result like a request waiting for it would
+        with patch('scheduler.views.coalesce', return_value=result):
+            self.client.post('/scheduler/generate', body, format='json')
+
+        # Assert
+        self.assertIsNone(speculative_generation.take_generated(key))
+
+    @patch('scheduler.views.create_schedules')
+    def test_saving_again_supersedes_generation(self, create_schedules_mock):
+        """ Tests that saving again before the background generation runs cancels it,
+            and that only the latest state is generated
+        """
+        # Arrange
+        term = '201931'
+        create_schedules_mock.return_value = []
+        first = _generate_body(term, '121')
+        second = _generate_body(term, '221')
+
+        # Act
+        self.client.put('/sessions/save_courses',
+                        {'courses': [], 'term': term, 'generate': first}, format='json')
+        self.client.put('/sessions/save_availabilities',
+                        {'availabilities': [], 'term': term, 'generate': second},
+                        format='json')
+        self.executor.run_all()
+
+        # Assert
+        self.assertEqual(create_schedules_mock.call_count, 1)
+        key = speculative_generation.generation_key
+        self.assertIsNone(speculative_generation.take_generated(key(first)))
+        self.assertIsNotNone(speculative_generation.take_generated(key(second)))
+        self.assertEqual(speculative_generation._latest, {}) # pylint: disable=protected-access
+
+    @patch('scheduler.views.create_schedules')
+    def test_saving_without_generate_supersedes_generation(self, create_schedules_mock):
+        """ Tests that saving without a generate body still cancels the generation
+            enqueued for the previous state
+        """
+        # Arrange
+        term = '201931'
+        self.client.put('/sessions/save_courses',
+                        {'courses': [], 'term': term, 'generate': _generate_body(term)},
+                        format='json')
+
+        # Act
+        self.client.put('/sessions/save_courses', {'courses': [], 'term': term},
+                        format='json')
+        self.executor.run_all()
+
+        # Assert
+        create_schedules_mock.assert_not_called()
+
+    def test_generated_schedules_are_only_used_once(self):
+        """ Tests that pressing Generate again gives newly generated schedules """
+        # Arrange
+        key = speculative_generation.generation_key(_generate_body('201931'))
+        caches['generated'].set(f'speculative-generation:{key}', ({}, 200))
+
+        # Act
+        first = speculative_generation.take_generated(key)
+        second = speculative_generation.take_generated(key)
+
+        # Assert
+        self.assertEqual(first, ({}, 200))
+        self.assertIsNone(second)
+
+    def test_sessions_without_a_key_dont_generate(self):
+        """ Tests that nothing is generated for a session that hasn't been saved, since
+            it doesn't have a key to track the generation by yet
+        """
+        # Arrange
+        generate = MagicMock()
+
+        # Act
+        speculative_generation.enqueue_generation(None, '201931',
+                                                  _generate_body('201931'), None,
+                                                  generate)
+        self.executor.run_all()
+
+        # Assert
+        generate.assert_not_called()
+        self.assertEqual(speculative_generation._latest, {}) # pylint: disable=protected-access
@@ -1,6 +1,8 @@
 from django.urls import path
-from scheduler.views import ScheduleView
+from scheduler.views import ScheduleView, SwapSectionView, OpenCoursesView
 
 urlpatterns = [
     path('generate', ScheduleView.as_view()),
+    path('swap_section', SwapSectionView.as_view()),
+    path('open_courses', OpenCoursesView.as_view()),
 ]
@@ -1,13 +1,23 @@
-from typing import List, Tuple
+from functools import reduce
+from operator import or_
+from typing import AbstractSet, Any, Dict, List, Optional, Tuple
+from django.db.models import Exists, F, OuterRef, Q
 from rest_framework.views import APIView
 from rest_framework.parsers import JSONParser
 from rest_framework.response import Response
 
-from scheduler.create_schedules import create_schedules, NoSchedulesError
+from scheduler.create_schedules import (
+    create_schedules, find_alternative_sections, NoSchedulesError,
+)
+from scheduler.speculative_generation import generation_key, take_generated
 from scheduler.utils import UnavailableTime, CourseFilter, BasicFilter
 from scraper.management.commands.scrape_courses import convert_meeting_time
-from scraper.serializers import SectionSerializer
-from scraper.models import Section
+from scraper.serializers import (
+    CourseSearchSerializer, parse_section_fields, serialize_sections,
+)
+from scraper.models import Course, Meeting, Section
+from scraper.models.section import generate_time_range
+from autoscheduler.single_flight import coalesce
 
 def _parse_course_filter(course) -> CourseFilter:
     """ Parses the given course to retrieve and convert it to a CourseFilter object
@@ -40,32 +50,39 @@ def _parse_unavailable_time(avail) -> UnavailableTime:
 
     return UnavailableTime(start_time, end_time, day)
 
-def _serialize_schedules(schedules: List[Tuple[str]]) -> List[List]:
+def _serialize_schedules(schedules: List[Tuple[str]],
+                         fields: Optional[AbstractSet[str]] = None) -> List[List]:
     """ Converts the given schedules, retrieves the corresponding sections,
         then serializes and returns them
 
     Args:
         schedules: The schedules returned from create_schedules
+        fields: The section fields to include, see parse_section_fields
 
     Returns
         The list of given schedules with the corresponding serialized sections
     """
 
-    # Retrieve the section models in bulk so we only do one DB query
+    # Serialize each section once, in bulk, so we only do a few DB queries
     # Put the section ids in a set to remove duplicates
     section_set = set(section_id for schedule in schedules for section_id in schedule)
-    models = Section.objects.filter(
-        id__in=section_set,
-    ).select_related('instructor').prefetch_related('meetings')
+    serialized_sections = serialize_sections(Section.objects.filter(id__in=section_set),
+                                             fields=fields)
 
-    # Maps each section's id to their corresponding section model
-    sections_dict = {section.id: section for section in models}
+    # Maps each section's id to its serialized section
+    sections_dict = {section['id']: section for section in serialized_sections}
 
-    def sections_for_schedule(schedule):
-        sections = (sections_dict[section] for section in schedule
-                    if section in sections_dict)
+    return assemble_schedules(schedules, sections_dict)
 
-        return SectionSerializer(sections, many=True).data
+def assemble_schedules(schedules: List[Tuple[str]],
+                       sections_dict: Dict[int, Optional[dict]]) -> List[List]:
+    """ Replaces the section ids of each schedule with the serialized sections in
+        sections_dict. Sections that aren't in it (or are None) are left out, along
+        with schedules that don't have any sections left
+    """
+    def sections_for_schedule(schedule):
+        return [sections_dict[section] for section in schedule
+                if sections_dict.get(section) is not None]
 
     ret = []
     for schedule in schedules:
@@ -75,35 +92,254 @@ def _serialize_schedules(schedules: List[Tuple[str]]) -> List[List]:
 
     return ret
 
+def wants_normalized_schedules(request) -> bool:
+    """ Whether the request opted in to the normalized schedules format with
+        ?normalized=true, see normalize_schedules
+    """
+    return request.query_params.get('normalized') in ('true', '1')
+
+def normalize_schedules(schedules: List[List[dict]]) -> Dict[str, object]:
+    """ Converts schedules serialized by _serialize_schedules to the normalized format,
+        where each section is only included once:
+        {'sections': {'<id>': section, ...}, 'schedules': [[id, ...], ...]}
+
+        Sections usually appear in several schedules, so this is several times smaller.
+        As in any JSON object, the section ids are strings in sections
+    """
+    return {
+        'sections': {str(section['id']): section
+                     for schedule in schedules for section in schedule},
+        'schedules': [[section['id'] for section in schedule] for schedule in schedules],
+    }
+
+def section_fields(request) -> Optional[AbstractSet[str]]:
+    """ Parses the request's fields query param with parse_section_fields. Raises a
+        ValueError if it's invalid
+    """
+    return parse_section_fields(request.query_params.get('fields'))
+
+def generate_schedules(query, fields: Optional[AbstractSet[str]] = None) -> dict:
+    """ Generates schedules for the body of a scheduler/generate request, and returns
+        the response's data. fields are the section fields to include
+    """
+
+    # List[Tuple[str, str]]
+    courses = [_parse_course_filter(course) for course in query["courses"]]
+    unavailable_times = [_parse_unavailable_time(avail)
+                         for avail in query["availabilities"]]
+
+    term = query["term"]
+
+    num_schedules = 5
+
+    schedules = []
+    message = ''
+    try:
+        schedules = create_schedules(courses, term, unavailable_times, num_schedules)
+    except NoSchedulesError as err:
+        message = str(err)
+
+    return {
+        'schedules': _serialize_schedules(schedules, fields),
+        'message': message
+    }
+
 class ScheduleView(APIView):
     """ Handles requests to the generate schedules algorithm  """
     parser_classes = [JSONParser]
 
     def post(self, request):
         """ Receives a POST request containg the schedule-generating parameters
-            and returns a list of generate schedules
+            and returns a list of generate schedules. With ?normalized=true, the
+            schedules are returned in the format given by normalize_schedules. With
+            ?fields=..., only those fields of the sections are returned
         """
+        try:
+            fields = section_fields(request)
+        except ValueError as err:
+            return Response(str(err), status=400)
+
+        key = generation_key(request.data, fields)
+        computed = False
+
+        def compute():
+            nonlocal computed
+            computed = True
+            # Use the schedules generated while the user was editing, if there are any
+            generated = take_generated(key)
+            if generated is not None:
+                return generated
+            return (generate_schedules(request.data, fields), 200)
+
+        # Identical requests, including a background generation that's still running,
+        # are coalesced by the same key (see autoscheduler/single_flight.py)
+        data, status = coalesce(key, compute)
+        if not computed:
+            # Joined a background generation, which also cached its result for the
+            # next Generate. This request used it, so the next one gets new schedules
+            take_generated(key)
+
+        if wants_normalized_schedules(request):
+            data = {**data, **normalize_schedules(data['schedules'])}
+
+        return Response(data, status=status)
+
+class SwapSectionView(APIView):
+    """ Finds the sections that can replace one course's section in an existing schedule,
+        without generating new schedules. Used by /scheduler/swap_section
+    """
+    parser_classes = [JSONParser]
+
+    def post(self, request):
+        """ Receives a POST request containing the term, the schedule's section ids, the
+            course to swap (in the same format as the courses for /scheduler/generate),
+            and availabilities. Returns the serialized alternative sections, only
+            including the fields in ?fields=... if it's given
+        """
+        try:
+            fields = section_fields(request)
+        except ValueError as err:
+            return Response(str(err), status=400)
 
         query = request.data
 
-        # List[Tuple[str, str]]
-        courses = [_parse_course_filter(course) for course in query["courses"]]
+        course = _parse_course_filter(query["course"])
         unavailable_times = [_parse_unavailable_time(avail)
                              for avail in query["availabilities"]]
-
         term = query["term"]
+        schedule = query["sections"]
 
-        num_schedules = 5
-
-        schedules = []
+        section_ids = []
         message = ''
         try:
-            schedules = create_schedules(courses, term, unavailable_times, num_schedules)
+            section_ids = find_alternative_sections(course, term, schedule,
+                                                    unavailable_times)
         except NoSchedulesError as err:
             message = str(err)
 
+        sections = Section.objects.filter(id__in=section_ids).order_by('id')
+
         response = {
-            'schedules': _serialize_schedules(schedules),
-            'message': message
+            'sections': serialize_sections(sections, fields=fields),
+            'message': message,
         }
         return Response(response)
+
+def _parse_busy_times(availabilities: Any, locked_sections: Any
+                      ) -> Tuple[List[UnavailableTime], List[int]]:
+    """ Parses the availabilities and locked section ids of an open_courses request.
+        Raises ValueError with the reason if either is malformed
+    """
+    if not isinstance(availabilities, list):
+        raise ValueError('availabilities must be a list')
+    if not isinstance(locked_sections, list) or not all(
+            isinstance(section, int) and not isinstance(section, bool)
+            for section in locked_sections):
+        raise ValueError('sections must be a list of section ids')
+
+    unavailable_times = []
+    for avail in availabilities:
+        if not isinstance(avail, dict):
+            raise ValueError(f'Invalid availability: {avail}')
+
+        day = avail.get('day')
+        if not isinstance(day, int) or isinstance(day, bool) or not 0 <= day <= 6:
+            raise ValueError(f'Invalid availability day: {day}')
+        times = (avail.get('startTime'), avail.get('endTime'))
+        if not all(isinstance(t, str) and len(t) == 4 and t.isdigit() for t in times):
+            raise ValueError(f'Invalid availability time: {avail}')
+
+        # Also raises ValueError for times like 2500
+        unavailable = _parse_unavailable_time(avail)
+        if unavailable.start_time > unavailable.end_time:
+            raise ValueError(f'Availability ends before it starts: {avail}')
+        unavailable_times.append(unavailable)
+
+    return unavailable_times, locked_sections
+
+def _busy_meetings_filter(unavailable_times: List[UnavailableTime],
+                          locked_sections: List[int]) -> Optional[Q]:
+    """ Creates a filter matching every meeting that overlaps one of the given unavailable
+        times, or one of the meetings of the given locked sections.
+        Returns None if there are no busy times to filter by
+    """
+    busy_times = [(avail.meeting_days,
+                   generate_time_range(avail.start_time, avail.end_time))
+                  for avail in unavailable_times]
+
+    locked_meetings = Meeting.objects.filter(
+        section_id__in=locked_sections, time_range__isnull=False,
+    ).values_list('meeting_days', 'time_range')
+    busy_times.extend(
+        ([day for day, meets in enumerate(meeting_days) if meets], time_range)
+        for meeting_days, time_range in locked_meetings
+    )
+
+    # Uses the time_range index, then checks the day of the matching meetings
+    filters = [Q(**{f'meeting_days__{day}': True}, time_range__overlap=time_range)
+               for days, time_range in busy_times if time_range is not None
+               for day in days]
+
+    return reduce(or_, filters) if filters else None
+
+class OpenCoursesView(APIView):
+    """ Finds courses that have at least one section that fits around the user's busy
+        times and locked sections. Used by /scheduler/open_courses
+    """
+    parser_classes = [JSONParser]
+
+    def post(self, request):
+        """ Receives a POST request containing the term, availabilities, locked section
+            ids, and optionally a dept and course level (i.e. 300) to filter by.
+            Returns the courses in the same format as /api/course/search
+        """
+        query = request.data
+
+        term = query.get("term")
+        if not term:
+            return Response(status=400)
+
+        try:
+            unavailable_times, locked_sections = _parse_busy_times(
+                query.get("availabilities", []), query.get("sections", []))
+        except ValueError as err:
+            return Response(str(err), status=400)
+
+        dept = query.get("dept")
+        level = query.get("level")
+
+        sections = Section.objects.filter(
+            term_code=term, subject=OuterRef('dept'), course_num=OuterRef('course_num'),
+        )
+        if not query.get("includeFull", False):
+            sections = sections.filter(current_enrollment__lt=F('max_enrollment'))
+
+        # Sections without meetings, like online ones, have nothing to conflict with,
+        # so they always fit
+        busy_meetings = _busy_meetings_filter(unavailable_times, locked_sections)
+        if busy_meetings is not None:
+            conflicting = Meeting.objects.filter(busy_meetings, section_id=OuterRef('pk'))
+            sections = (sections.annotate(conflicts=Exists(conflicting))
+                        .filter(conflicts=False))
+
+        courses = Course.objects.filter(term=term)
+        if dept:
+            courses = courses.filter(dept=dept.upper())
+        if level:
+            # Only the first digit of the course number determines its level
+            courses = courses.filter(course_num__startswith=str(level)[0])
+
+        # Don't suggest the courses the user has already locked in
+        locked_courses = set(Section.objects.filter(id__in=locked_sections)
+                             .values_list('subject', 'course_num'))
+        if locked_courses:
+            courses = courses.exclude(reduce(or_, (
+                Q(dept=subject, course_num=course_num)
+                for subject, course_num in locked_courses
+            )))
+
+        courses = (courses.annotate(fits=Exists(sections)).filter(fits=True)
+                   .order_by('dept', 'course_num'))
+
+        serializer = CourseSearchSerializer(courses, many=True)
+        return Response({'results': [obj['course'] for obj in serializer.data]})
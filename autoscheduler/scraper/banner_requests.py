@@ -24,13 +24,24 @@ import time
 import random
 import asyncio
 import string
-from typing import Dict, List, Tuple, Callable
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple, Callable
 from enum import Enum
 from aiohttp.client_exceptions import ClientConnectorError, ContentTypeError
-from aiohttp import ClientSession
+from aiohttp import ClientSession, TCPConnector
 
 import requests
 
+# How long idle connections to Banner are kept open, and how long its address is cached,
+# in seconds. A scrape makes thousands of requests to the same host, so connections are
+# reused instead of paying for a new TCP and TLS handshake on every request
+_KEEPALIVE_TIMEOUT = 60
+_DNS_CACHE_TTL = 10 * 60
+
+# How many times a page of a department's courses is requested before giving up on it,
+# since Banner occasionally doesn't return a page's courses
+_PAGE_ATTEMPTS = 3
+
 class Semester(Enum):
     """ The semester of a given term """
     SPRING = 1
@@ -64,6 +75,47 @@ def get_term_code(year: str, semester: Semester, location: Location):
 
     return year + str(semester.value) + str(location.value)
 
+class _SearchSessionPool:
+    """ Banner search sessions that have been registered for a term with create_session.
+
+        Registering a search session costs a request, so instead of registering one for
+        every department, each search takes a session for its term from the pool and
+        gives it back once its search has been reset. There are only ever as many
+        sessions for a term as there have been concurrent searches of it.
+
+        Each search session has its own ClientSession, so the cookies Banner uses to keep
+        track of it aren't shared with the others
+    """
+    def __init__(self, banner: 'BannerRequests', connector: TCPConnector):
+        self._banner = banner
+        self._connector = connector
+        self._idle: Dict[str, List[Tuple[ClientSession, str]]] = defaultdict(list)
+
+    async def take(self, term: str) -> Tuple[ClientSession, str]:
+        """ Takes an idle search session for term, or registers a new one if there
+            aren't any. Returns the ClientSession and session id to search with
+        """
+        if self._idle[term]:
+            return self._idle[term].pop()
+
+        session = ClientSession(connector=self._connector, connector_owner=False)
+        try:
+            return session, await self._banner.create_session(session, term)
+        except Exception:
+            await session.close()
+            raise
+
+    def give_back(self, term: str, session: ClientSession, session_id: str):
+        """ Returns a search session whose search has been reset to the pool """
+        self._idle[term].append((session, session_id))
+
+    async def close(self):
+        """ Closes every idle search session """
+        for sessions in self._idle.values():
+            for session, _ in sessions:
+                await session.close()
+        self._idle.clear()
+
 class BannerRequests():
     """ Handles basic banner requests """
 
@@ -74,7 +126,7 @@ class BannerRequests():
                           'dataType=json&offset=1&term={term}&max={max}' % base_url)
 
         self.course_search_url = ('https://%s/StudentRegistrationSsb/ssb/searchResults/'
-                                  'searchResults/?pageOffset=0&sortDirection=asc&'
+                                  'searchResults/?pageOffset={offset}&sortDirection=asc&'
                                   'sortColumn=subjectDescription&txt_subject={subject}&'
                                   'txt_term={term}&uniqueSessionId={uniqueSessionId}&'
                                   'pageMaxSize={num_courses}' % base_url)
@@ -87,7 +139,8 @@ class BannerRequests():
 
     async def create_session(self, session: ClientSession, term: str) -> str:
         """ Begins the session and validates the session_id
-            Must be called in order to search for courses
+            Must be called in order to search for courses. Returns the session_id to
+            search with
         """
 
         session_id = generate_session_id()
@@ -97,35 +150,105 @@ class BannerRequests():
             'term': term,
         }
 
-        await session.post(self.create_session_url, data=data)
+        # Read the response so its connection can be reused
+        async with session.post(self.create_session_url, data=data) as response:
+            await response.read()
 
-        return session
+        return session_id
 
     async def get_courses(self, session: ClientSession, session_id: str, dept: str, # pylint: disable=too-many-arguments
-                          term: str, amount: int) -> List[Dict]:
-        """ Retrieves all of the courses for a given department
+                          term: str, amount: int,
+                          sem: Optional[asyncio.Semaphore] = None) -> List[Dict]:
+        """ Retrieves all of the courses for a given department, then resets the search
 
             dept: Department, a four letter string, such as CSCE
-            amount: max amount of courses to retrieve
+            amount: max amount of courses to retrieve per request
+
+            Banner returns the total number of courses with the first page of them, so if
+            there are more, the rest of the pages are retrieved concurrently. If sem is
+            given, the caller must hold one of its permits, which is used for retrieving
+            the pages along with any of its other permits that aren't being used.
+            Returns None if Banner didn't return any courses, or didn't return one of
+            the pages, so the department isn't saved without some of its courses
         """
 
+        json = await self._get_page(session, session_id, dept, term, 0, amount)
+        courses = json['data']
+
+        # Banner may return fewer courses per page than were asked for
+        page_size = len(courses or [])
+        total = json.get('totalCount') or 0
+        if page_size and total > page_size:
+            pages = await self._get_pages(session, session_id, dept, term, sem,
+                                          range(page_size, total, page_size), page_size)
+            courses = (None if pages is None
+                       else courses + [course for page in pages for course in page])
+
+        await self.reset_search(session)
+
+        return courses
+
+    async def _get_page(self, session: ClientSession, session_id: str, dept: str, # pylint: disable=too-many-arguments
+                        term: str, offset: int, amount: int) -> Dict:
+        """ Retrieves amount courses of the current search starting at offset """
+
         data = {
             'uniqueSessionId': session_id,
             'term': term,
             'subject': dept,
+            'offset': offset,
             'num_courses': amount,
         }
 
         url = self.course_search_url.format(**data)
 
         async with session.get(url) as response:
-            json = await response.json()
+            return await response.json()
+
+    async def _get_pages(self, session: ClientSession, session_id: str, dept: str, # pylint: disable=too-many-arguments
+                         term: str, sem: Optional[asyncio.Semaphore], offsets: range,
+                         amount: int) -> List[List[Dict]]:
+        """ Retrieves the pages of the current search starting at each of offsets, in
+            order. One page is retrieved at a time with the permit of sem the caller
+            holds, and another at the same time for each of its permits that are free.
+            Permits that are in use aren't waited for, since they could be held by
+            searches that are waiting for permits themselves
+
+            Each page is requested up to _PAGE_ATTEMPTS times. Returns None if any of
+            them still weren't returned
+        """
 
-        await self.reset_search(session)
+        pages = {}
+        remaining = iter(offsets)
+
+        async def get_remaining_pages():
+            # Each worker takes the next offset that hasn't been taken yet
+            for offset in remaining:
+                for _ in range(_PAGE_ATTEMPTS):
+                    json = await self._get_page(session, session_id, dept, term, offset,
+                                                amount)
+                    if json['data'] is not None:
+                        break
+                pages[offset] = json['data']
+
+        async def get_remaining_pages_with_permit():
+            try:
+                await get_remaining_pages()
+            finally:
+                sem.release()
 
-        data = json['data']
+        workers = [get_remaining_pages()]
+        while sem is not None and len(workers) < len(offsets) and not sem.locked():
+            # Doesn't wait, since the semaphore isn't locked
+            await sem.acquire()
+            workers.append(get_remaining_pages_with_permit())
 
-        return data
+        await asyncio.gather(*workers)
+
+        if any(pages[offset] is None for offset in offsets):
+            return None
+
+        return [pages[offset] for offset in offsets]
 
     def get_departments(self, term: str, amount: int = 300) -> List[Dict]:
         """ Retrieves all of the departments for the given term
@@ -147,57 +270,76 @@ class BannerRequests():
 
         return depts
 
-    async def search(self, depts_terms: List[Tuple[str, str]],
+    async def search(self, depts_terms: List[Tuple[str, str]], # pylint: disable=too-many-arguments
                      sem: asyncio.Semaphore,
                      parse_all_courses: Callable[[list], list],
-                     amount: int = 750
+                     amount: int = 750,
+                     connection_limit: int = 100,
                     ) -> List[List[Dict]]:
         """ Concurrently retrieves all of the given departments and returns them as
             a list of course-lists, with each index corresponding to the courses/sections
             for a department.
-        """
 
-        loop = asyncio.get_running_loop()
+            Every department's search shares one pool of at most connection_limit
+            connections. Banner search sessions are reused between departments of the
+            same term, see _SearchSessionPool
+        """
 
         courses_set = set()
         instructors_set = set()
 
-        async def perform_search(dept: str, term: str):
-            async with ClientSession(loop=loop) as session:
-                retry_max = 10
-                for i in range(1, retry_max + 1):
-                    try:
-                        # Must limit the number of concurrent requests, otherwise will get
-                        # a "too many file descriptors in select()" error from aiohttp
-                        async with sem:
-                            print(f"Starting {dept} {term}")
-                            session_id = await self.create_session(session, term)
-
-                            course_list = await self.get_courses(session, session_id,
-                                                                 dept, term, amount)
+        connector = TCPConnector(limit=connection_limit, limit_per_host=connection_limit,
+                                 keepalive_timeout=_KEEPALIVE_TIMEOUT,
+                                 ttl_dns_cache=_DNS_CACHE_TTL)
 
-                        if course_list is None:
-                            continue # Error, retry
+        pool = _SearchSessionPool(self, connector)
 
-                        # We only want to limit the requests, not parsing, so call this
-                        # outside of the semaphore
-                        ret = parse_all_courses(course_list, term, courses_set,
-                                                instructors_set)
-
-                        return ret
-
-                    except (ClientConnectorError, ContentTypeError):
-                        # Empty lines help it stand out from the rest of the outputs
-                        print(f"\n\nNETWORK ERROR: Retrying {dept} {term}: Take {i} \n\n")
+        async def perform_search(dept: str, term: str):
+            retry_max = 10
+            for i in range(1, retry_max + 1):
+                session = None
+                try:
+                    # Must limit the number of concurrent requests, otherwise will get
+                    # a "too many file descriptors in select()" error from aiohttp
+                    async with sem:
+                        print(f"Starting {dept} {term}")
+                        session, session_id = await pool.take(term)
+
+                        course_list = await self.get_courses(session, session_id,
+                                                             dept, term, amount, sem)
+
+                    # get_courses resets the search, so it can be used for the next one
+                    pool.give_back(term, session, session_id)
+
+                    if course_list is None:
+                        continue # Error, retry
+
+                    # We only want to limit the requests, not parsing, so call this
+                    # outside of the semaphore
+                    ret = parse_all_courses(course_list, term, courses_set,
+                                            instructors_set)
+
+                    return ret
+
+                except (ClientConnectorError, ContentTypeError):
+                    # The search may not have been reset, so don't use it again
+                    if session is not None:
+                        await session.close()
+                    # Empty lines help it stand out from the rest of the outputs
+                    print(f"\n\nNETWORK ERROR: Retrying {dept} {term}: Take {i} \n\n")
 
         tasks = [perform_search(dept, term) for dept, term  in depts_terms]
 
         results = []
 
-        # Runs all of the tasks concurrently, stopping in this for loop after each one is
-        # completed
-        for result in await asyncio.gather(*tasks, loop=loop):
-            results.append(result)
+        try:
+            # Runs all of the tasks concurrently, stopping in this for loop after each
+            # one is completed
+            for result in await asyncio.gather(*tasks):
+                results.append(result)
+        finally:
+            await pool.close()
+            await connector.close()
 
         return results
 
@@ -209,4 +351,5 @@ class BannerRequests():
             firsts'
         """
 
-        await session.post(self.reset_search_url)
+        async with session.post(self.reset_search_url) as response:
+            await response.read()
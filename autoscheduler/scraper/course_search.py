@@ -0,0 +1,156 @@
+""" Searches for courses, for /api/course/search and /api/course/search/ranked.
+
+    search_courses uses an in-memory index of each term's courses, so /api/course/search
+    can answer prefix searches without querying the database on every keystroke.
+
+    Each term's index is built the first time the term is searched, and is rebuilt once
+    the term's Term.last_updated changes. Courses are kept sorted by id, so the courses
+    whose ids start with a prefix are found with a binary search. Since departments are
+    letters and course numbers start with a digit, which sorts before any letter, this is
+    also the (dept, course_num) order the database returned them in.
+"""
+
+import heapq
+import threading
+from bisect import bisect_left
+from itertools import chain
+from datetime import datetime
+from typing import Dict, List, Tuple
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db.models import Case, FloatField, Max, Q, Value, When
+from scraper.models import Course, Instructor, Section
+from scraper.models.course import generate_course_id
+
+# The largest CRN that can be searched for, since it's stored as an integer
+_MAX_CRN = 2 ** 31 - 1
+# Ranks of courses that are an exact CRN match, or contain the search in their title.
+# Trigram similarity is at most 1, so these are ranked above fuzzy matches
+_CRN_RANK = 3.0
+_CONTAINS_RANK = 1.0
+
+# Sorts after every character, so prefix + _MAX_CHAR is after every string with prefix
+_MAX_CHAR = chr(0x10FFFF)
+
+class _CourseIndex:
+    """ The courses of a term, sorted by id and by title """
+    def __init__(self, term: str):
+        courses = sorted(Course.objects.filter(term=term)
+                         .values_list('id', 'dept', 'course_num', 'title'))
+
+        self.ids = [course_id for course_id, _, _, _ in courses]
+        # Formatted the same way as CourseSearchSerializer
+        self.courses = [f"{dept} {course_num} - {title}"
+                        for _, dept, course_num, title in courses]
+
+        # The index of each course in ids, sorted by the course's title
+        titles = sorted((title, i) for i, (_, _, _, title) in enumerate(courses))
+        self.titles = [title for title, _ in titles]
+        self.title_positions = [i for _, i in titles]
+
+    def search(self, title_search: str, id_search: str, limit: int) -> List[str]:
+        """ Gets the first limit courses whose ids start with id_search, followed by
+            those whose titles start with title_search
+        """
+        start = bisect_left(self.ids, id_search)
+        end = min(bisect_left(self.ids, id_search + _MAX_CHAR), start + limit)
+        results = self.courses[start:end]
+
+        if len(results) < limit:
+            start = bisect_left(self.titles, title_search)
+            end = bisect_left(self.titles, title_search + _MAX_CHAR)
+            positions = heapq.nsmallest(limit - len(results),
+                                        self.title_positions[start:end])
+            results.extend(self.courses[i] for i in positions)
+
+        return results
+
+_indexes: Dict[str, Tuple[datetime, _CourseIndex]] = {}
+_indexes_lock = threading.Lock()
+
+def search_courses(term: str, last_updated: datetime, title_search: str,
+                   id_search: str, limit: int) -> List[str]:
+    """ Searches the courses of term the same way RetrieveCourseSearchView's queries
+        do, formatted like CourseSearchSerializer. last_updated is the term's
+        Term.last_updated, which is used to tell whether its index is out of date
+    """
+    with _indexes_lock:
+        cached = _indexes.get(term)
+        if cached is None or cached[0] != last_updated:
+            cached = _indexes[term] = (last_updated, _CourseIndex(term))
+
+    return cached[1].search(title_search, id_search, limit)
+
+def _rank_titles(term: str, title_search: str, limit: int):
+    """ Gets the (dept, course_num, title, rank) of the best limit courses whose titles
+        contain or are similar to title_search
+    """
+    return (
+        Course.objects
+        .filter(Q(title__contains=title_search) | Q(title__trigram_similar=title_search),
+                term=term)
+        .annotate(rank=TrigramSimilarity('title', title_search) + Case(
+            When(title__contains=title_search, then=Value(_CONTAINS_RANK)),
+            default=Value(0.0), output_field=FloatField()
+        ))
+        .order_by('-rank', 'dept', 'course_num')
+        .values_list('dept', 'course_num', 'title', 'rank')[:limit]
+    )
+
+def _rank_instructors(term: str, search: str, limit: int):
+    """ Gets the (dept, course_num, rank) of the best limit courses taught by an
+        instructor whose name is similar to search
+    """
+    # Filter the instructors first so their trigram index is used
+    instructors = Instructor.objects.filter(id__trigram_similar=search).values('id')
+    return (
+        Section.objects.filter(term_code=term, instructor__in=instructors)
+        .values('subject', 'course_num')
+        .annotate(rank=Max(TrigramSimilarity('instructor_id', search)))
+        .order_by('-rank', 'subject', 'course_num')
+        .values_list('subject', 'course_num', 'rank')[:limit]
+    )
+
+def _rank_crns(term: str, search: str):
+    """ Gets the (dept, course_num, rank) of the courses with a section whose CRN is
+        search
+    """
+    if not search.isdigit() or int(search) > _MAX_CRN:
+        return []
+
+    return [(dept, course_num, _CRN_RANK) for dept, course_num
+            in Section.objects.filter(term_code=term, crn=int(search))
+            .values_list('subject', 'course_num').distinct()]
+
+def rank_courses(term: str, search: str, limit: int) -> List[str]:
+    """ Searches the courses of term whose title or instructor is similar to search, or
+        which have a section with search as its CRN. Returns the best limit of them,
+        formatted like CourseSearchSerializer.
+
+        Each course is ranked by the trigram similarity of its title or of its best
+        matching instructor, whichever is higher. Titles that contain search and CRN
+        matches are ranked first. Every query is limited and uses an index, so only the
+        courses that are returned are read
+    """
+    ranks: Dict[Tuple[str, str], float] = {}
+    titles: Dict[Tuple[str, str], str] = {}
+
+    for dept, course_num, title, rank in _rank_titles(term, search.upper(), limit):
+        ranks[(dept, course_num)] = rank
+        titles[(dept, course_num)] = title
+
+    for dept, course_num, rank in chain(_rank_instructors(term, search, limit),
+                                        _rank_crns(term, search)):
+        ranks[(dept, course_num)] = max(rank, ranks.get((dept, course_num), rank))
+
+    best = sorted(ranks, key=lambda course: (-ranks[course], course))[:limit]
+
+    # Get the titles of the courses that only matched by instructor or CRN
+    missing = [generate_course_id(dept, course_num, term)
+               for dept, course_num in best if (dept, course_num) not in titles]
+    if missing:
+        titles.update(((dept, course_num), title) for dept, course_num, title
+                      in Course.objects.filter(id__in=missing)
+                      .values_list('dept', 'course_num', 'title'))
+
+    return [f"{dept} {course_num} - {titles.get((dept, course_num), '')}"
+            for dept, course_num in best]
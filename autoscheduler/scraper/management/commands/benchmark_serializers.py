@@ -0,0 +1,94 @@
+import random
+from time import perf_counter
+from django.core.management import base
+from rest_framework.renderers import JSONRenderer
+from scheduler.views import _serialize_schedules
+from scraper.models import Section
+from scraper.serializers import SectionSerializer, grades_context, serialize_sections
+
+def _time(func, repeat: int) -> float:
+    """ Returns the average number of seconds func takes to run """
+    start = perf_counter()
+    for _ in range(repeat):
+        func()
+    return (perf_counter() - start) / repeat
+
+def _serialize_schedules_with_models(schedules):
+    """ Serializes schedules the way _serialize_schedules did before serialize_sections,
+        using SectionSerializer
+    """
+    section_ids = set(section_id for schedule in schedules for section_id in schedule)
+    models = list(Section.objects.filter(id__in=section_ids)
+                  .select_related('instructor').prefetch_related('meetings'))
+    sections_dict = {section.id: section for section in models}
+    context = grades_context(models)
+
+    return [SectionSerializer([sections_dict[section_id] for section_id in schedule],
+                              many=True, context=context).data
+            for schedule in schedules]
+
+class Command(base.BaseCommand):
+    """ Compares how long SectionSerializer and serialize_sections take to render the
+        sections of large courses and of several schedules, and checks that they render
+        exactly the same JSON
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--term', '-t', type=str, required=True,
+                            help="A term that has been scraped, such as 201931")
+        parser.add_argument('--courses', '-c', type=str, nargs='+',
+                            default=['CHEM 107', 'ENGL 104', 'MATH 151', 'CSCE 121'],
+                            help="The courses to benchmark, such as 'CSCE 121'")
+        parser.add_argument('--schedules', '-s', type=int, default=5,
+                            help="The number of schedules to benchmark rendering")
+        parser.add_argument('--repeat', '-r', type=int, default=20,
+                            help="The number of times to render each payload")
+
+    def handle(self, *args, **options):
+        renderer = JSONRenderer()
+        repeat = options['repeat']
+
+        course_sections = []
+        for course in options['courses']:
+            subject, course_num = course.split()
+            sections = Section.objects.filter(
+                subject=subject, course_num=course_num, term_code=options['term']
+            ).order_by('id')
+            course_sections.append(list(sections.values_list('id', flat=True)))
+
+            def render_models(sections=sections):
+                models = list(sections.select_related('instructor')
+                              .prefetch_related('meetings'))
+                return renderer.render(SectionSerializer(
+                    models, many=True, context=grades_context(models)
+                ).data)
+
+            def render_values(sections=sections):
+                return renderer.render(serialize_sections(sections))
+
+            self._compare(f"{course} ({len(course_sections[-1])} sections)",
+                          render_models, render_values, repeat)
+
+        # Make schedules from a random section of each course
+        schedules = [[random.choice(ids) for ids in course_sections if ids]
+                     for _ in range(options['schedules'])]
+
+        def render_schedule_models():
+            return renderer.render(_serialize_schedules_with_models(schedules))
+
+        def render_schedule_values():
+            return renderer.render(_serialize_schedules(schedules))
+
+        self._compare(f"{len(schedules)} schedules", render_schedule_models,
+                      render_schedule_values, repeat)
+
+    def _compare(self, name: str, render_models, render_values, repeat: int): # pylint: disable=no-self-use
+        """ Checks both renderers give the same JSON, then prints how long each took """
+        if render_models() != render_values():
+            raise base.CommandError(f"{name}: serialize_sections output is different")
+
+        models_time = _time(render_models, repeat)
+        values_time = _time(render_values, repeat)
+        print(f"{name}: SectionSerializer {models_time * 1000:.2f} ms, "
+              f"serialize_sections {values_time * 1000:.2f} ms "
+              f"({models_time / values_time:.1f}x faster)")
@@ -1,6 +1,6 @@
 from django.utils import timezone
 from django.core.management import base
-from scraper.models import Term
+from scraper.models import Term, TermsUpdate
 from scraper.management.commands.utils.scraper_utils import get_all_terms
 
 class Command(base.BaseCommand):
@@ -23,5 +23,6 @@ class Command(base.BaseCommand):
         # We're not doing a bulk upsert(delete, then bulk_create) because we don't want to
         # delete old terms - we just want to fill in terms that haven't been scraped yet
         Term.objects.bulk_create(term_models, ignore_conflicts=True)
+        TermsUpdate.mark_updated()
 
         print(f'Saved {len(term_models)} terms')
@@ -8,12 +8,17 @@ from django.utils import timezone
 from django.core.management import base
 from django.db import transaction
 from scraper.banner_requests import BannerRequests
-from scraper.models import Course, Instructor, Section, Meeting, Department, Grades, Term
+from scraper.models import (
+    Course, Instructor, Section, Meeting, Department, Grades, Term, CourseConflict,
+    GradesUpdate, TermsUpdate,
+)
 from scraper.models.course import generate_course_id
-from scraper.models.section import generate_meeting_id
+from scraper.models.section import generate_meeting_id, generate_time_range
 from scraper.management.commands.utils.scraper_utils import (
     get_all_terms, get_recent_terms,
 )
+from scraper.management.commands.utils.conflict_graph import build_course_conflicts
+from scraper.management.commands.utils.section_payloads import save_section_payloads
 
 # Map from parsed instructional method to section.instructional_method choice
 _INSTRUCTIONAL_METHODS = {
@@ -148,6 +153,7 @@ def parse_meeting(meetings_data, section: Section, meeting_count: int) -> Meetin
 
     meeting_model = Meeting(id=meeting_id, building=building, meeting_days=class_days,
                             start_time=start_time, end_time=end_time, room=room,
+                            time_range=generate_time_range(start_time, end_time),
                             meeting_type=class_type, section=section)
     return meeting_model
 
@@ -247,7 +253,8 @@ def get_course_data(  # pylint: disable=too-many-locals
 
     start = time.time()
     data_set = loop.run_until_complete(banner.search(depts_terms, sem,
-                                                     parse_all_courses))
+                                                     parse_all_courses,
+                                                     connection_limit=concurrent_limit))
     print(f"Downloaded and scraped {len(data_set)} departments data in"
           f" {time.time() - start:.2f} seconds")
 
@@ -296,6 +303,11 @@ def save_models(instructors: List[Instructor], sections: List[Section], # pylint
         else:
             queryset = Section.objects.all()
 
+        # Deleting & resaving the sections changes the grade rollups of their courses
+        rollup_courses = list(Grades.objects.filter(section__in=queryset).values_list(
+            'section__subject', 'section__course_num'
+        ).distinct())
+
         print("Starting to delete")
         queryset.delete()
         print(f"Done deleting in {(time.time() - start):.2f}")
@@ -315,6 +327,10 @@ def save_models(instructors: List[Instructor], sections: List[Section], # pylint
         Grades.objects.bulk_create(grades_to_resave, batch_size=50_000)
         print(f"Resaved {len(grades_to_resave)} grades in {(time.time()-start):.2f}")
 
+        start = time.time()
+        rollup_count = Grades.objects.rebuild_rollups(rollup_courses)
+        print(f"Rebuilt {rollup_count} grade rollups in {(time.time()-start):.2f}")
+
     start = time.time()
     with transaction.atomic():
         if options['term'] or options['year'] or options['recent']:
@@ -334,6 +350,27 @@ def save_models(instructors: List[Instructor], sections: List[Section], # pylint
 
     print(f"Saved all in {elapsed_time:.2f} seconds")
 
+def save_course_conflicts(sections: List[Section], meetings: List[Meeting]):
+    """ Builds the course conflict graph for the scraped sections and saves it.
+        Must be called after save_models, since deleting the old courses also deletes
+        their conflicts
+    """
+    start = time.time()
+    conflicts = build_course_conflicts(sections, meetings)
+    print(f"Built the course conflict graph in {(time.time()-start):.2f} seconds")
+
+    start = time.time()
+    CourseConflict.objects.bulk_create(conflicts, batch_size=50_000)
+    print(f"Saved {len(conflicts)} course conflicts in {(time.time()-start):.2f} seconds")
+
+def save_payloads(terms: List[str]):
+    """ Renders the sections of every course in the scraped terms for /api/sections.
+        Must be called after save_models
+    """
+    start = time.time()
+    count = save_section_payloads(terms)
+    print(f"Saved {count} section payloads in {(time.time()-start):.2f} seconds")
+
 def save_terms(terms, courses, options):
     """ Creates terms objects to save """
 
@@ -357,6 +394,7 @@ def save_terms(terms, courses, options):
 
         queryset.delete()
         Term.objects.bulk_create(terms_to_save)
+        TermsUpdate.mark_updated()
 
         print(f"Saved {len(terms_to_save)} term(s) in {(time.time()-start):.2f} seconds")
 
@@ -396,6 +434,11 @@ class Command(base.BaseCommand):
 
         instructors, sections, meetings, courses = get_course_data(depts_terms)
         save_models(instructors, sections, meetings, courses, terms, options)
+        save_course_conflicts(sections, meetings)
+        save_payloads(terms)
+        # The grade rollups were rebuilt in save_models, but the grades are only updated
+        # once the payloads that include them are too
+        GradesUpdate.mark_updated()
         save_terms(terms, courses, options)
 
         print(f"Finished scraping in {time.time() - start_all:.2f} seconds")
@@ -1,7 +1,7 @@
 import time
 import os
 from concurrent.futures import ProcessPoolExecutor
-from typing import List
+from typing import List, Set, Tuple
 from pathlib import Path
 from collections import defaultdict
 from itertools import chain
@@ -258,6 +258,48 @@ def fetch_page_data() -> bs4.BeautifulSoup:
 
     return soup
 
+def save_grades(scraped_grades: list):
+    """ Saves the scraped Grades models """
+    # Have to import here due to Django "App not found" error due to multiprocessing
+    from scraper.models import Grades
+
+    start = time.time()
+    # ignore_conflicts is only so we can run this multiple times locally
+    Grades.objects.bulk_create(scraped_grades, ignore_conflicts=True, batch_size=50_000)
+    elapsed_time = time.time() - start
+    print(f"Saving {len(scraped_grades)} grades took {elapsed_time:.2f} sec")
+
+def rebuild_rollups(scraped_grades: list) -> Set[Tuple[str, str]]:
+    """ Rebuilds the grade rollups of the courses that got new grades. Must be called
+        after the grades are saved
+
+        Returns the (subject, course_num) of each of those courses
+    """
+    from scraper.models import Grades
+
+    start = time.time()
+    courses = set((grade.section.subject, grade.section.course_num)
+                  for grade in scraped_grades)
+    count = Grades.objects.rebuild_rollups(courses)
+    elapsed_time = time.time() - start
+    print(f"Rebuilding {count} grade rollups took {elapsed_time:.2f} sec")
+
+    return courses
+
+def save_payloads(courses: Set[Tuple[str, str]]):
+    """ Renders the section payloads of the given courses again, since the grades are in
+        the payloads of every term with these courses. Must be called after
+        rebuild_rollups
+    """
+    from scraper.management.commands.utils.section_payloads import (
+        save_section_payloads
+    )
+
+    start = time.time()
+    count = save_section_payloads(courses=courses)
+    elapsed_time = time.time() - start
+    print(f"Saving {count} section payloads took {elapsed_time:.2f} sec")
+
 class Command(base.BaseCommand):
     """ Retrieves all of the possible colleges & terms from web.as-tamu.edu
         Then downloads all of the respective PDF's and parses them
@@ -307,16 +349,14 @@ class Command(base.BaseCommand):
         )
 
         # Have to import here due to Django "App not found" error due to multiprocessing
-        from scraper.models import Grades
-
-        # Save all of the models
-        save_start = time.time()
-        # ignore_conflicts is only so we can run this multiple times locally
-        Grades.objects.bulk_create(scraped_grades,
-                                   ignore_conflicts=True, batch_size=50_000)
-        save_end = time.time()
-        elapsed_time = save_end - save_start
-        print(f"Saving {len(scraped_grades)} grades took {elapsed_time:.2f} sec")
+        from scraper.models import GradesUpdate
+
+        save_grades(scraped_grades)
+        save_payloads(rebuild_rollups(scraped_grades))
+
+        # Only record that the grades changed once everything serving them was rebuilt,
+        # so clients don't cache the old grades as the new ones
+        GradesUpdate.mark_updated()
 
         end = time.time()
         elapsed_time = end - start
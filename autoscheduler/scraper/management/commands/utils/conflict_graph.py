@@ -0,0 +1,144 @@
+""" Builds the course-level conflict graph for the scraped sections of a term.
+
+    Each section's meetings are converted to a bitmask with one bit per minute of the
+    week, so checking whether two sections conflict is a single bitwise and. Meetings
+    that touch (one ends the minute the other starts) count as a conflict, which matches
+    how create_schedules compares meetings.
+
+    Every pair of courses where at least one pair of their sections conflicts is saved,
+    along with the number of pairs of their sections that don't. Pairs of courses that
+    aren't saved never meet at the same time, so every pair of their sections fits.
+"""
+
+from collections import Counter, defaultdict
+from datetime import time
+from itertools import combinations, combinations_with_replacement, product
+from typing import Dict, FrozenSet, Iterable, List, Set, Tuple
+from scraper.models import CourseConflict, Meeting, Section
+from scraper.models.course import generate_course_id
+
+_MINUTES_PER_DAY = 24 * 60
+_HOURS_PER_WEEK = 7 * 24
+_HOUR_MASK = (1 << 60) - 1
+
+# The distinct masks of a course's sections, along with how many sections have each
+SectionMasks = FrozenSet[Tuple[int, int]]
+
+def _minutes(time_obj: time) -> int:
+    """ Converts a time object to the number of minutes since midnight """
+    return time_obj.hour * 60 + time_obj.minute
+
+def meeting_mask(meeting_days: List[bool], start_time: time, end_time: time) -> int:
+    """ Converts a meeting to a bitmask with a bit set for every minute of the week it
+        occupies. Meetings without (valid) times don't occupy any minutes, so they're 0
+    """
+    if start_time is None or end_time is None:
+        return 0
+
+    start = _minutes(start_time)
+    end = _minutes(end_time)
+    if end < start:
+        return 0
+
+    # Both the start and end minute are included
+    span = (1 << (end - start + 1)) - 1
+
+    mask = 0
+    for day, meets in enumerate(meeting_days):
+        if meets:
+            mask |= span << (day * _MINUTES_PER_DAY + start)
+
+    return mask
+
+def _course_section_masks(sections: Iterable[Section], meetings: Iterable[Meeting]
+                         ) -> Dict[int, Dict[str, SectionMasks]]:
+    """ Groups the section masks of every course by term.
+
+        Returns a dict mapping each term to a dict of course id -> section masks
+    """
+    section_masks = defaultdict(int)
+    for meeting in meetings:
+        section_masks[meeting.section_id] |= meeting_mask(
+            meeting.meeting_days, meeting.start_time, meeting.end_time
+        )
+
+    course_masks = defaultdict(lambda: defaultdict(Counter))
+    for section in sections:
+        course_id = generate_course_id(section.subject, section.course_num,
+                                       str(section.term_code))
+        course_masks[int(section.term_code)][course_id][section_masks[section.id]] += 1
+
+    return {term: {course_id: frozenset(masks.items())
+                   for course_id, masks in courses.items()}
+            for term, courses in course_masks.items()}
+
+def _hours(masks: SectionMasks) -> Set[int]:
+    """ Gets the hours of the week that any of the masks occupies a minute of """
+    union = 0
+    for mask, _ in masks:
+        union |= mask
+
+    return {hour for hour in range(_HOURS_PER_WEEK)
+            if (union >> (hour * 60)) & _HOUR_MASK}
+
+def _compatible_pairs(masks: SectionMasks, other_masks: SectionMasks) -> Tuple[int, int]:
+    """ Counts the pairs of sections that don't conflict, and the pairs of sections """
+    compatible = sum(count * other_count for mask, count in masks
+                     for other, other_count in other_masks if not mask & other)
+    total = sum(count for _, count in masks) * sum(count for _, count in other_masks)
+    return compatible, total
+
+def _group_conflicts(group: Tuple[SectionMasks, List[str]],
+                     other_group: Tuple[SectionMasks, List[str]],
+                     same: bool) -> Iterable[CourseConflict]:
+    """ Creates the conflicts between the courses of two groups, or between the courses
+        of one group if same is given. Returns nothing if none of their sections conflict
+    """
+    (masks, course_ids), (other_masks, other_ids) = group, other_group
+    compatible, total = _compatible_pairs(masks, other_masks)
+    if compatible == total:
+        return []
+
+    if same:
+        pairs = combinations(course_ids, 2)
+    else:
+        pairs = (tuple(sorted(pair)) for pair in product(course_ids, other_ids))
+    return [CourseConflict(course_id=course_id, other_course_id=other_id,
+                           compatible_pairs=compatible)
+            for course_id, other_id in pairs]
+
+def build_course_conflicts(sections: Iterable[Section],
+                           meetings: Iterable[Meeting]) -> List[CourseConflict]:
+    """ Finds every pair of courses in the same term where at least one section of the
+        first conflicts with a section of the second, and counts the pairs of their
+        sections that don't. Courses that can never be taken together have 0 compatible
+        pairs.
+
+        Pairs where every pair of sections is compatible aren't returned, since there
+        are far too many of them to store for every term.
+    """
+    conflicts = []
+
+    for courses in _course_section_masks(sections, meetings).values():
+        # Many courses meet at exactly the same times (e.g. single-section courses), so
+        # group them by their section masks to only compare each distinct group once
+        groups = defaultdict(list)
+        for course_id in sorted(courses):
+            groups[courses[course_id]].append(course_id)
+        groups = list(groups.items())
+
+        # Sections can only conflict if they meet in the same hour of the week, so only
+        # groups that share an hour are compared, instead of every pair of groups
+        hours = defaultdict(list)
+        for i, (masks, _) in enumerate(groups):
+            for hour in _hours(masks):
+                hours[hour].append(i)
+
+        compared = set()
+        for group_ids in hours.values():
+            for i, j in combinations_with_replacement(group_ids, 2):
+                if (i, j) not in compared:
+                    compared.add((i, j))
+                    conflicts.extend(_group_conflicts(groups[i], groups[j], i == j))
+
+    return conflicts
@@ -0,0 +1,88 @@
+""" Renders the /api/sections response of every course ahead of time, so ListSectionView
+    can serve them without querying or serializing anything.
+"""
+
+import gzip
+from io import BytesIO
+from itertools import groupby
+from typing import Iterable, List, Tuple
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from scraper.models import Section, SectionPayload
+from scraper.serializers import serialize_sections
+
+def _gzip(data: bytes) -> bytes:
+    """ Gzips the data, without a timestamp so the same data always gives the same bytes.
+        gzip.compress only takes mtime in Python 3.8+
+    """
+    buffer = BytesIO()
+    with gzip.GzipFile(fileobj=buffer, mode='wb', mtime=0) as gzip_file:
+        gzip_file.write(data)
+    return buffer.getvalue()
+
+def _course_key(section: dict) -> Tuple[str, str]:
+    return (section['subject'], section['course_num'])
+
+def _courses_filter(courses: List[Tuple[str, str]]) -> dict:
+    """ Creates filter kwargs for the given (subject, course_num)s. This matches a few
+        other courses too, which is fine since they're rendered and replaced the same way
+    """
+    subjects, course_nums = zip(*courses)
+    return {'subject__in': set(subjects), 'course_num__in': set(course_nums)}
+
+def build_section_payloads(term: int, courses: List[Tuple[str, str]] = None
+                          ) -> List[SectionPayload]:
+    """ Renders the sections of every course in the term, or only of the given
+        (subject, course_num)s, exactly like ListSectionView would
+    """
+    sections = Section.objects.filter(term_code=term)
+    if courses is not None:
+        sections = sections.filter(**_courses_filter(courses))
+
+    # ListSectionView orders each course's sections by id
+    serialized = sorted(serialize_sections(sections.order_by('id')), key=_course_key)
+
+    renderer = JSONRenderer()
+    payloads = []
+    for (subject, course_num), course_sections in groupby(serialized, key=_course_key):
+        data = renderer.render(list(course_sections))
+        payloads.append(SectionPayload(term_code=term, subject=subject,
+                                       course_num=course_num, data=data,
+                                       gzipped_data=_gzip(data)))
+
+    return payloads
+
+def save_section_payloads(terms: Iterable[int] = None,
+                          courses: Iterable[Tuple[str, str]] = None) -> int:
+    """ Replaces the section payloads of the given terms, or of every term with sections
+        if terms isn't given. If courses, a list of (subject, course_num), is given, only
+        those courses' payloads are replaced
+
+        Returns the number of payloads that were saved
+    """
+    if courses is not None:
+        courses = list(courses)
+        if not courses:
+            return 0
+
+    if terms is None:
+        sections = Section.objects.all()
+        if courses is not None:
+            sections = sections.filter(**_courses_filter(courses))
+        terms = sections.values_list('term_code', flat=True).distinct()
+
+    count = 0
+    # Render one term at a time so we don't have every term's sections in memory
+    for term in list(terms):
+        payloads = build_section_payloads(term, courses)
+
+        with transaction.atomic():
+            old_payloads = SectionPayload.objects.filter(term_code=term)
+            if courses is not None:
+                old_payloads = old_payloads.filter(**_courses_filter(courses))
+            old_payloads.delete()
+            SectionPayload.objects.bulk_create(payloads, batch_size=1_000)
+
+        count += len(payloads)
+
+    return count
@@ -0,0 +1,25 @@
+# Generated by Django 2.2.28 on 2026-10-18 23:47
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0012_merge_20211116_1843'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseConflict',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='scraper.Course')),
+                ('other_course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='scraper.Course')),
+            ],
+            options={
+                'db_table': 'course_conflicts',
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 2.2.28 on 2026-10-18 23:50
+
+import django.contrib.postgres.fields.ranges
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0013_course_conflict'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='meeting',
+            name='time_range',
+            field=django.contrib.postgres.fields.ranges.IntegerRangeField(null=True),
+        ),
+        # Fill in the time ranges for the meetings that have already been scraped
+        migrations.RunSQL(
+            sql="""
+                UPDATE meetings SET time_range = int4range(
+                    (EXTRACT(HOUR FROM start_time) * 60
+                     + EXTRACT(MINUTE FROM start_time))::integer,
+                    (EXTRACT(HOUR FROM end_time) * 60
+                     + EXTRACT(MINUTE FROM end_time))::integer,
+                    '[]'
+                )
+                WHERE start_time IS NOT NULL AND end_time IS NOT NULL
+                    AND start_time <= end_time
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.AddIndex(
+            model_name='meeting',
+            index=django.contrib.postgres.indexes.GistIndex(fields=['time_range'], name='meetings_time_ra_8db6b4_gist'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 2.2.28 on 2026-10-19 00:04
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0014_meeting_time_range'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GradeRollup',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subject', models.CharField(max_length=4)),
+                ('course_num', models.CharField(max_length=5)),
+                ('honors', models.BooleanField(null=True)),
+                ('gpa', models.FloatField()),
+                ('A', models.IntegerField()),
+                ('B', models.IntegerField()),
+                ('C', models.IntegerField()),
+                ('D', models.IntegerField()),
+                ('F', models.IntegerField()),
+                ('I', models.IntegerField()),
+                ('S', models.IntegerField()),
+                ('U', models.IntegerField()),
+                ('Q', models.IntegerField()),
+                ('X', models.IntegerField()),
+                ('count', models.IntegerField()),
+                ('instructor', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, to='scraper.Instructor')),
+            ],
+            options={
+                'db_table': 'grade_rollups',
+                'unique_together': {('subject', 'course_num', 'instructor', 'honors')},
+            },
+        ),
+        # Roll up the grades that have already been scraped
+        migrations.RunSQL(
+            sql="""
+                INSERT INTO grade_rollups (subject, course_num, instructor_id, honors,
+                    gpa, "A", "B", "C", "D", "F", "I", "S", "U", "Q", "X", count)
+                SELECT sections.subject, sections.course_num, sections.instructor_id,
+                    sections.honors, AVG(grades.gpa), SUM(grades."A"), SUM(grades."B"),
+                    SUM(grades."C"), SUM(grades."D"), SUM(grades."F"), SUM(grades."I"),
+                    SUM(grades."S"), SUM(grades."U"), SUM(grades."Q"), SUM(grades."X"),
+                    COUNT(grades.gpa)
+                FROM grades INNER JOIN sections ON grades.section_id = sections.id
+                GROUP BY sections.subject, sections.course_num, sections.instructor_id,
+                    sections.honors
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
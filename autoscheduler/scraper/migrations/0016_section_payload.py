@@ -0,0 +1,28 @@
+# Generated by Django 2.2.28 on 2026-10-19 00:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0015_grade_rollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SectionPayload',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term_code', models.IntegerField()),
+                ('subject', models.CharField(max_length=4)),
+                ('course_num', models.CharField(max_length=5)),
+                ('data', models.BinaryField()),
+                ('gzipped_data', models.BinaryField()),
+            ],
+            options={
+                'db_table': 'section_payloads',
+                'unique_together': {('term_code', 'subject', 'course_num')},
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 2.2.28 on 2026-10-19 00:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0016_section_payload'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GradesUpdate',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_updated', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'grades_updates',
+            },
+        ),
+        # The rollups were built from the grades that have already been scraped
+        migrations.RunSQL(
+            sql="INSERT INTO grades_updates (last_updated) VALUES (NOW())",
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
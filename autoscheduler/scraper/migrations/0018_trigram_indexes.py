@@ -0,0 +1,24 @@
+# Generated by Django 2.2.28 on 2026-10-19 00:17
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0017_grades_update'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='course',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['title'], name='courses_title_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='instructor',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['id'], name='instructors_id_trgm', opclasses=['gin_trgm_ops']),
+        ),
+    ]
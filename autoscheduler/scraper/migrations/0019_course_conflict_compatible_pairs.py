@@ -0,0 +1,18 @@
+# Generated by Django 2.2.28 on 2026-10-19 14:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0018_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='courseconflict',
+            name='compatible_pairs',
+            field=models.IntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 2.2.28 on 2026-10-19 14:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0019_course_conflict_compatible_pairs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TermsUpdate',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_updated', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'terms_updates',
+            },
+        ),
+        # The terms that have already been scraped
+        migrations.RunSQL(
+            sql="INSERT INTO terms_updates (last_updated) VALUES (NOW())",
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
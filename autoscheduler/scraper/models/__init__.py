@@ -3,6 +3,13 @@ from .instructor import Instructor
 from .course import Course
 from .section import Section, Meeting
 from .grades import Grades
+from .grade_rollup import GradeRollup
+from .grades_update import GradesUpdate
 from .term import Term
+from .terms_update import TermsUpdate
+from .course_conflict import CourseConflict
+from .section_payload import SectionPayload
 
-__all__ = ["Department", "Instructor", "Course", "Section", "Meeting", "Grades", "Term"]
+__all__ = ["Department", "Instructor", "Course", "Section", "Meeting", "Grades", "Term",
+           "CourseConflict", "GradeRollup", "GradesUpdate", "SectionPayload",
+           "TermsUpdate"]
@@ -1,3 +1,4 @@
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
 
 def generate_course_id(dept: str, course_num: str, term: str):
@@ -18,3 +19,6 @@ class Course(models.Model):
 
     class Meta:
         db_table = "courses"
+        # Trigram index for the fuzzy title search done by rank_courses
+        indexes = [GinIndex(fields=['title'], name='courses_title_trgm',
+                            opclasses=['gin_trgm_ops'])]
@@ -0,0 +1,18 @@
+from django.db import models
+
+class CourseConflict(models.Model):
+    """ Records a pair of courses in the same term where at least one section of one
+        meets at the same time as a section of the other, along with the number of pairs
+        of their sections that don't. If there aren't any, every section of one meets at
+        the same time as every section of the other, so they can't be in a schedule
+        together. Pairs of courses that aren't recorded never meet at the same time.
+
+        Generated by scrape_courses, which only saves each pair once, where
+        course_id < other_course_id
+    """
+    course = models.ForeignKey('Course', on_delete=models.CASCADE, related_name='+')
+    other_course = models.ForeignKey('Course', on_delete=models.CASCADE, related_name='+')
+    compatible_pairs = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = "course_conflicts"
@@ -0,0 +1,111 @@
+from collections import defaultdict
+from functools import reduce
+from operator import or_
+from typing import Dict, Iterable, Tuple, Union
+from django.db import models
+from django.db.models import Q
+
+# The keys of the dictionaries returned by instructor_performance
+PERFORMANCE_FIELDS = ["gpa", "A", "B", "C", "D", "F", "I", "S", "U", "Q", "X", "count"]
+
+class GradeRollupManager(models.Manager):
+    """ Connects to the GradeRollup model so we can call
+        GradeRollup.objects.instructor_performance
+    """
+
+    def instructor_performance(
+            self, dept: str, course_num: str, instructor: str, honors: bool
+    ) -> Dict[str, Union[int, float]]:
+        """ Gets the GPA's / sum of each grade type for all of the instructor's sections
+            so we can quickly get how an instructor performed in past sections
+            for a given course. These are aggregated ahead of time by
+            Grades.objects.rebuild_rollups
+
+            Returns a dictionary of string-integer/float pairs, where str is the attribute
+            (i.e. gpa), and float is the according value (is an integer for grade counts)
+        """
+
+        performance = self.filter(
+            subject=dept,
+            course_num=course_num,
+            instructor=instructor,
+            honors=honors,
+        ).values(*PERFORMANCE_FIELDS).first()
+
+        if performance is None:
+            # Same as the aggregates of no grades
+            return {**dict.fromkeys(PERFORMANCE_FIELDS), "count": 0}
+
+        return performance
+
+    def instructor_performances(
+            self, sections: Iterable["Section"]
+    ) -> Dict[Tuple[str, str, str, bool], Dict[str, Union[int, float]]]:
+        """ Gets instructor_performance for the subject, course number, instructor
+            and honors of every given section using a single query
+
+            Returns a dictionary mapping (subject, course_num, instructor id, honors) to
+            the same dictionary as instructor_performance. Sections without an instructor
+            or without any grades aren't included
+        """
+
+        # Maps each (subject, course_num) to the instructors we need grades for
+        course_instructors = defaultdict(set)
+        for section in sections:
+            if section.instructor_id is not None:
+                course_instructors[(section.subject, section.course_num)].add(
+                    section.instructor_id
+                )
+
+        if not course_instructors:
+            return {}
+
+        course_filter = reduce(or_, (
+            Q(subject=subject, course_num=course_num, instructor__in=instructors)
+            for (subject, course_num), instructors in course_instructors.items()
+        ))
+
+        performances = self.filter(course_filter).values(
+            "subject", "course_num", "instructor", "honors", *PERFORMANCE_FIELDS
+        )
+
+        return {
+            (performance.pop("subject"), performance.pop("course_num"),
+             performance.pop("instructor"), performance.pop("honors")): performance
+            for performance in performances
+        }
+
+class GradeRollup(models.Model):
+    """ The grades of every section an instructor has taught for a course, summed
+        together. Honors and non-honors sections are rolled up separately.
+
+        Rebuilt from the Grades with Grades.objects.rebuild_rollups by scrape_grades and
+        scrape_courses, so GradeRollup.objects.instructor_performance only has to read
+        a single row
+    """
+    objects = GradeRollupManager()
+
+    subject = models.CharField(max_length=4)
+    course_num = models.CharField(max_length=5)
+    instructor = models.ForeignKey('Instructor', on_delete=models.CASCADE, null=True)
+    honors = models.BooleanField(null=True)
+
+    gpa = models.FloatField() # The average GPA of the sections
+
+    # The number of students who received each grade, see Grades
+    A = models.IntegerField()
+    B = models.IntegerField()
+    C = models.IntegerField()
+    D = models.IntegerField()
+    F = models.IntegerField()
+    I = models.IntegerField()
+    S = models.IntegerField()
+    U = models.IntegerField()
+    Q = models.IntegerField()
+    X = models.IntegerField()
+
+    count = models.IntegerField() # The number of sections
+
+    class Meta:
+        db_table = "grade_rollups"
+        unique_together = ("subject", "course_num", "instructor", "honors")
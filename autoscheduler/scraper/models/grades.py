@@ -1,53 +1,89 @@
 """ Heavily based off of Good Bull Schedules """
 
-from typing import Dict, Union
-from django.db import models
+from typing import Dict, Iterable, List, Tuple
+from django.db import models, transaction
+from django.db.models import Q
+from scraper.models.grade_rollup import PERFORMANCE_FIELDS, GradeRollup
 
-class GradeManager(models.Manager):
-    """ Connects to the Grades models so we can call
-        Grades.object.instructor_performance
+def _performance_aggregates() -> Dict[str, models.Aggregate]:
+    """ Creates the aggregates used to calculate an instructor's performance """
+    return dict(
+        gpa=models.Avg("gpa"), # Averages all of the GPA's together
+
+        # We want a sum so we can more-easily calculate the percentage
+        # Sums the count of each grade
+        A=models.Sum("A"),
+        B=models.Sum("B"),
+        C=models.Sum("C"),
+        D=models.Sum("D"),
+        F=models.Sum("F"),
+        I=models.Sum("I"),
+        S=models.Sum("S"),
+        U=models.Sum("U"),
+        Q=models.Sum("Q"),
+        X=models.Sum("X"),
+
+        # Could really count any of the fields, since it doesn't count only unique
+        # values
+        count=models.Count("gpa"),
+    )
+
+def _courses_filter(courses: List[Tuple[str, str]], prefix: str = "") -> Q:
+    """ Creates a filter for the given (subject, course_num)s. This matches a few other
+        courses too, but is much faster than matching each course separately
     """
+    subjects, course_nums = zip(*courses)
+    return Q(**{f"{prefix}subject__in": set(subjects),
+                f"{prefix}course_num__in": set(course_nums)})
+
+class GradeManager(models.Manager):
+    """ Connects to the Grades models so we can call Grades.objects.rebuild_rollups """
 
-    def instructor_performance(
-            self, dept: str, course_num: str, instructor: str, honors: bool
-    ) -> Dict[str, Union[int, float]]:
-        """ Aggregates all of the GPA's / sum of each grade type into one object
-            so we can quickly get how an instructor performed in past sections
-            for a given course
+    def rebuild_rollups(self, courses: Iterable[Tuple[str, str]] = None) -> int:
+        """ Recalculates the GradeRollups from the grades. If courses, a list of
+            (subject, course_num), is given, only the rollups of those courses are
+            rebuilt. Otherwise, all of them are. GradesUpdate.mark_updated must be
+            called once everything else that serves the grades has been rebuilt too
 
-            Returns a dictionary of string-integer/float pairs, where str is the attribute
-            (i.e. gpa), and float is the according value (is an integer for grade counts)
+            Returns the number of rollups that were saved
         """
 
-        return (
-            # prefetch_related retrieves all of the related objects in a single query
-            self.prefetch_related("section").filter(
-                section__subject=dept,
-                section__course_num=course_num,
-                section__instructor=instructor,
-                section__honors=honors,
-            ).aggregate(
-                gpa=models.Avg("gpa"), # Averages all of the GPA's together
-
-                # We want a sum so we can more-easily calculate the percentage
-                # Sums the count of each grade
-                A=models.Sum("A"),
-                B=models.Sum("B"),
-                C=models.Sum("C"),
-                D=models.Sum("D"),
-                F=models.Sum("F"),
-                I=models.Sum("I"),
-                S=models.Sum("S"),
-                U=models.Sum("U"),
-                Q=models.Sum("Q"),
-                X=models.Sum("X"),
-
-                # Could really count any of the fields, since it doesn't count only unique
-                # values
-                count=models.Count("gpa"),
-            )
+        grades = self.all()
+        rollups = GradeRollup.objects.all()
+        if courses is not None:
+            courses = list(courses)
+            if not courses:
+                return 0
+
+            grades = grades.filter(_courses_filter(courses, "section__"))
+            rollups = rollups.filter(_courses_filter(courses))
+
+        performances = (
+            grades.values("section__subject", "section__course_num",
+                          "section__instructor", "section__honors")
+            # Empties the ordering, otherwise it'd be added to the GROUP BY
+            .order_by()
+            # Annotations can't have the same name as a field they use, so prefix them
+            .annotate(**{f"performance_{name}": aggregate
+                         for name, aggregate in _performance_aggregates().items()})
         )
 
+        new_rollups = [
+            GradeRollup(subject=performance["section__subject"],
+                        course_num=performance["section__course_num"],
+                        instructor_id=performance["section__instructor"],
+                        honors=performance["section__honors"],
+                        **{name: performance[f"performance_{name}"]
+                           for name in PERFORMANCE_FIELDS})
+            for performance in performances.iterator()
+        ]
+
+        with transaction.atomic():
+            rollups.delete()
+            GradeRollup.objects.bulk_create(new_rollups, batch_size=50_000)
+
+        return len(new_rollups)
+
 class Grades(models.Model):
     """ Represents a collection of the grade distribution values for a
         specific section
@@ -57,7 +93,7 @@ class Grades(models.Model):
     section = models.OneToOneField("Section", on_delete=models.CASCADE, primary_key=True)
 
     # Overrides the default Grades.objects member, which allows us
-    # to call Grades.object.instructor_performance
+    # to call Grades.objects.rebuild_rollups
     objects = GradeManager()
 
     gpa = models.FloatField()
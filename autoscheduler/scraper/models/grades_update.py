@@ -0,0 +1,19 @@
+from django.db import models
+from django.utils import timezone
+
+class GradesUpdate(models.Model):
+    """ Records when the grades served by the API last changed. There's only ever one
+        row, saved by GradesUpdate.mark_updated
+    """
+    last_updated = models.DateTimeField()
+
+    @classmethod
+    def mark_updated(cls):
+        """ Records that the grades changed now. Responses that include grades are
+            cached by this time, so this must only be called once everything that serves
+            them, like the GradeRollups and the section payloads, has been rebuilt
+        """
+        cls.objects.update_or_create(id=1, defaults={'last_updated': timezone.now()})
+
+    class Meta:
+        db_table = "grades_updates"
@@ -1,3 +1,4 @@
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
 
 class Instructor(models.Model):
@@ -7,3 +8,6 @@ class Instructor(models.Model):
 
     class Meta:
         db_table = "instructors"
+        # Trigram index for the fuzzy instructor search done by rank_courses
+        indexes = [GinIndex(fields=['id'], name='instructors_id_trgm',
+                            opclasses=['gin_trgm_ops'])]
@@ -1,8 +1,11 @@
 """Models for meetings and sections.
 Together, they represent all the information for a particular meeting time.
 """
-from django.contrib.postgres.fields import ArrayField
+from datetime import time
+from django.contrib.postgres.fields import ArrayField, IntegerRangeField
+from django.contrib.postgres.indexes import GistIndex
 from django.db import models
+from psycopg2.extras import NumericRange
 
 class Section(models.Model):
     """ Section contains data for a group of meetings. """
@@ -64,6 +67,19 @@ def generate_meeting_id(section_id: str, meetings_count: str):
 
     return "".join((section_id, meetings_count))
 
+def generate_time_range(start_time: time, end_time: time) -> NumericRange:
+    """ Generates the range of minutes since midnight that a meeting takes up.
+        Both ends are included, so meetings that touch are considered overlapping.
+        Returns None if the meeting doesn't have valid times
+    """
+    if start_time is None or end_time is None or end_time < start_time:
+        return None
+
+    start = start_time.hour * 60 + start_time.minute
+    end = end_time.hour * 60 + end_time.minute
+
+    return NumericRange(start, end, '[]')
+
 class Meeting(models.Model):
     """ Describes a particular meeting time of a section.
         Each section has one or more meetings.
@@ -75,6 +91,9 @@ class Meeting(models.Model):
     meeting_days = ArrayField(models.BooleanField(), size=7)
     start_time = models.TimeField(null=True)
     end_time = models.TimeField(null=True)
+    # Same as start_time & end_time, but indexed so we can query for meetings overlapping
+    # a given time. Null if either of the times are null
+    time_range = IntegerRangeField(null=True)
     meeting_type = models.CharField(max_length=4) # Meeting types: LEC, LAB, REC, INS, etc
     section = models.ForeignKey(
         Section,
@@ -84,3 +103,4 @@ class Meeting(models.Model):
 
     class Meta:
         db_table = "meetings"
+        indexes = [GistIndex(fields=['time_range'])]
@@ -0,0 +1,19 @@
+from django.db import models
+
+class SectionPayload(models.Model):
+    """ The rendered /api/sections response for a course in a term, along with a gzipped
+        copy of it.
+
+        Generated by scrape_courses and scrape_grades, since those are the only times the
+        sections or their grades change. ListSectionView serves these directly, and only
+        serializes the sections itself if the course doesn't have one
+    """
+    term_code = models.IntegerField()
+    subject = models.CharField(max_length=4)
+    course_num = models.CharField(max_length=5)
+    data = models.BinaryField()
+    gzipped_data = models.BinaryField()
+
+    class Meta:
+        db_table = "section_payloads"
+        unique_together = ("term_code", "subject", "course_num")
@@ -0,0 +1,21 @@
+from django.db import models
+from django.utils import timezone
+
+class TermsUpdate(models.Model):
+    """ Records when the list of terms served by the API last changed. There's only ever
+        one row, saved by TermsUpdate.mark_updated.
+
+        The most recent Term.last_updated can't be used instead, since it goes back in
+        time whenever the most recently updated term is deleted
+    """
+    last_updated = models.DateTimeField()
+
+    @classmethod
+    def mark_updated(cls):
+        """ Records that the terms changed now. Must be called whenever terms are saved
+            or deleted
+        """
+        cls.objects.update_or_create(id=1, defaults={'last_updated': timezone.now()})
+
+    class Meta:
+        db_table = "terms_updates"
@@ -1,6 +1,9 @@
+from collections import defaultdict
 from datetime import time
+from typing import AbstractSet, Dict, Iterable, List, Optional
+from django.db.models import QuerySet
 from rest_framework import serializers
-from scraper.models import Course, Section, Grades, Term
+from scraper.models import Course, Section, Meeting, GradeRollup, Term
 
 def format_time(time_obj: time) -> str:
     """ Formats a time object to a string HH:MM, for use with section serializer """
@@ -12,6 +15,13 @@ class CourseSerializer(serializers.ModelSerializer):
         model = Course
         fields = ['title', 'credit_hours']
 
+def grades_context(sections: Iterable[Section]) -> dict:
+    """ Creates the SectionSerializer context that gets the grades for all of the given
+        sections in one query, instead of one query per section. sections should be a
+        list, since it's iterated here and again when serializing
+    """
+    return {'grades': GradeRollup.objects.instructor_performances(sections)}
+
 class SectionSerializer(serializers.ModelSerializer):
     """ Serializes a section into an object with information needed by /api/sections """
     instructor_name = serializers.SerializerMethodField()
@@ -49,12 +59,23 @@ class SectionSerializer(serializers.ModelSerializer):
         } for meeting in section.meetings.all()]
 
     def get_grades(self, section): # pylint: disable=no-self-use
-        """ Gets the past grade distributions for this prof + course """
+        """ Gets the past grade distributions for this prof + course.
+
+            Uses the grades in the context if they were retrieved ahead of time with
+            grades_context, otherwise retrieves them for just this section
+        """
         skip_grades = self.context.get('skip_grades')
         if skip_grades:
             return None
 
-        grades = Grades.objects.instructor_performance(
+        performances = self.context.get('grades')
+        if performances is not None:
+            if section.instructor_id is None:
+                return None
+            return performances.get((section.subject, section.course_num,
+                                     section.instructor_id, section.honors))
+
+        grades = GradeRollup.objects.instructor_performance(
             section.subject,
             section.course_num,
             section.instructor,
@@ -66,6 +87,109 @@ class SectionSerializer(serializers.ModelSerializer):
 
         return grades
 
+# The section values used by serialize_sections
+_SECTION_VALUES = ['id', 'crn', 'subject', 'course_num', 'section_num', 'remote',
+                   'honors', 'instructor_id', 'min_credits', 'max_credits',
+                   'current_enrollment', 'max_enrollment', 'asynchronous', 'mcallen',
+                   'instructional_method']
+_MEETING_VALUES = ['id', 'building', 'room', 'meeting_days', 'start_time', 'end_time',
+                   'meeting_type', 'section_id']
+_INSTRUCTIONAL_METHODS = dict(Section.INSTRUCTIONAL_METHOD_CHOICES)
+
+def parse_section_fields(fields: Optional[str]) -> Optional[AbstractSet[str]]:
+    """ Parses the fields query param of the section endpoints, a comma separated list
+        of the SectionSerializer fields to include, such as fields=crn,meetings.
+        The id is always included. Returns None if fields isn't given, meaning every
+        field should be included, and raises a ValueError if it has unknown fields
+    """
+    if fields is None:
+        return None
+
+    parsed = {field.strip() for field in fields.split(',') if field.strip()}
+    unknown = parsed.difference(SectionSerializer.Meta.fields)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+
+    return frozenset(parsed | {'id'})
+
+def only_fields(section: dict, fields: AbstractSet[str]) -> dict:
+    """ Removes the fields of a serialized section that aren't in fields """
+    return {field: value for field, value in section.items() if field in fields}
+
+def _format_time(time_obj: time) -> str:
+    """ Same as format_time, but without strftime, which is relatively slow """
+    return '' if time_obj is None else f'{time_obj.hour:02}:{time_obj.minute:02}'
+
+def _serialize_meetings(section_ids: List[int]) -> Dict[int, List[dict]]:
+    """ Serializes the meetings of the given sections like SectionSerializer, and
+        returns them by section id
+    """
+    section_meetings = defaultdict(list)
+    # Order the meetings so the output is the same however many sections are serialized
+    meetings = Meeting.objects.filter(section_id__in=section_ids).order_by('id')
+    for (meeting_id, building, room, days, start_time, end_time, meeting_type,
+         section_id) in meetings.values_list(*_MEETING_VALUES):
+        section_meetings[section_id].append({
+            'id': str(meeting_id),
+            'building': building,
+            'room': room,
+            'days': days,
+            'start_time': _format_time(start_time),
+            'end_time': _format_time(end_time),
+            'type': meeting_type,
+        })
+
+    return section_meetings
+
+def serialize_sections(sections: QuerySet, skip_grades: bool = False,
+                       fields: Optional[AbstractSet[str]] = None) -> List[dict]:
+    """ Serializes the sections in the given queryset (in its order) exactly like
+        SectionSerializer(sections, many=True) does, but several times faster.
+
+        Builds the output straight from the values of the sections and their meetings
+        instead of from models, and gets all of the grades in one query. Any change to
+        SectionSerializer has to be made here too
+
+        If fields (see parse_section_fields) is given, only those fields are included,
+        and the meetings and grades aren't queried unless they're included
+    """
+    rows = list(sections.values_list(*_SECTION_VALUES, named=True))
+
+    section_meetings = defaultdict(list)
+    if fields is None or 'meetings' in fields:
+        section_meetings = _serialize_meetings([row.id for row in rows])
+
+    skip_grades = skip_grades or (fields is not None and 'grades' not in fields)
+    performances = ({} if skip_grades
+                    else GradeRollup.objects.instructor_performances(rows))
+
+    serialized = [{
+        'id': row.id,
+        'crn': row.crn,
+        'subject': row.subject,
+        'course_num': row.course_num,
+        'section_num': row.section_num,
+        'remote': row.remote,
+        'honors': row.honors,
+        'meetings': section_meetings[row.id],
+        'instructor_name': 'TBA' if row.instructor_id is None else row.instructor_id,
+        'min_credits': row.min_credits,
+        'max_credits': row.max_credits,
+        'current_enrollment': row.current_enrollment,
+        'max_enrollment': row.max_enrollment,
+        'grades': (None if row.instructor_id is None else performances.get(
+            (row.subject, row.course_num, row.instructor_id, row.honors))),
+        'asynchronous': row.asynchronous,
+        'mcallen': row.mcallen,
+        'instructional_method': _INSTRUCTIONAL_METHODS.get(row.instructional_method,
+                                                           row.instructional_method),
+    } for row in rows]
+
+    if fields is not None:
+        serialized = [only_fields(section, fields) for section in serialized]
+
+    return serialized
+
 def season_num_to_string(season_num):
     """ Converts int representing season in 'term' field to a string to
         use in get_term
@@ -1,10 +1,15 @@
+import gzip
 from datetime import time, datetime
 from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APITestCase, APIClient
-from scraper.models import Course, Instructor, Meeting, Section, Grades, Term
+from scraper.models import (Course, Instructor, Meeting, Section, Grades, Term,
+                            GradesUpdate)
+from scraper.management.commands.utils.section_payloads import save_section_payloads
 from scraper.serializers import (CourseSerializer, SectionSerializer, TermSerializer,
                                  CourseSearchSerializer, season_num_to_string,
-                                 campus_num_to_string, format_time)
+                                 campus_num_to_string, format_time,
+                                 serialize_sections)
 
 
 class APITests(APITestCase): #pylint: disable=too-many-public-methods
@@ -103,6 +108,7 @@ class APITests(APITestCase): #pylint: disable=too-many-public-methods
         Section.objects.bulk_create(cls.sections)
         Meeting.objects.bulk_create(cls.meetings)
         Grades.objects.bulk_create(cls.grades)
+        Grades.objects.rebuild_rollups()
 
         # Convert INSTRUCTIONAL_METHOD_CHOICES to dict
         cls.instructional_methods = dict(Section.INSTRUCTIONAL_METHOD_CHOICES)
@@ -491,6 +497,228 @@ class APITests(APITestCase): #pylint: disable=too-many-public-methods
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.json(), expected)
 
+    def test_serialize_sections_matches_section_serializer(self):
+        """ Tests that serialize_sections renders exactly the same JSON as
+            SectionSerializer, including for sections without an instructor
+        """
+        # Arrange
+        section = Section(crn=11111, id='000009', subject='CSCE', course_num='310',
+                          section_num='503', term_code='201931', min_credits='3',
+                          max_credits=4, honors=True, remote=True, max_enrollment=10,
+                          asynchronous=True, current_enrollment=0, instructor=None,
+                          instructional_method=Section.REMOTE)
+        section.save()
+        Meeting(id='0000090', building=None, meeting_days=[False] * 7, start_time=None,
+                end_time=None, meeting_type='INS', section=section).save()
+        sections = Section.objects.order_by('id')
+        models = sections.select_related('instructor').prefetch_related('meetings')
+        renderer = JSONRenderer()
+
+        # Act
+        expected = renderer.render(SectionSerializer(models, many=True).data)
+        result = renderer.render(serialize_sections(sections))
+
+        # Assert
+        self.assertEqual(result, expected)
+
+    def test_api_sections_serves_section_payload(self):
+        """ Tests that /api/sections serves the payload saved by the scrapers with a
+            single query for the sections, and that it's the same as the serialized
+            sections
+        """
+        # Arrange
+        data = {'dept': 'CSCE', 'course_num': 310, 'term': '201931'}
+        expected = self.client.get('/api/sections', data=data).content
+        save_section_payloads(['201931'])
+
+        # Act
+        # Plus one query each for when the term and the grades were last updated
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/sections', data=data)
+
+        # Assert
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(response.content, expected)
+
+    def test_api_sections_serves_gzipped_section_payload(self):
+        """ Tests that /api/sections serves the gzipped payload if the client accepts it
+        """
+        # Arrange
+        data = {'dept': 'CSCE', 'course_num': 310, 'term': '201931'}
+        expected = self.client.get('/api/sections', data=data).content
+        save_section_payloads(['201931'])
+
+        # Act
+        response = self.client.get('/api/sections', data=data,
+                                   HTTP_ACCEPT_ENCODING='gzip, deflate')
+
+        # Assert
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), expected)
+
+    def test_api_sections_gets_all_grades_in_one_query(self):
+        """ Tests that /api/sections doesn't query the grades of each section separately
+        """
+        # Arrange
+        data = {'dept': 'CSCE', 'course_num': 310, 'term': '201931'}
+
+        # Act
+        # One query each for when the term and the grades were last updated, the
+        # (missing) section payload, the sections, their meetings, and their grades
+        with self.assertNumQueries(6):
+            response = self.client.get('/api/sections', data=data)
+
+        # Assert
+        self.assertEqual(response.status_code, 200)
+
+    def test_api_sections_only_serializes_requested_fields(self):
+        """ Tests that /api/sections?fields=... only includes those fields and the id,
+            and doesn't query the grades if they aren't included
+        """
+        # Arrange
+        data = {'dept': 'CSCE', 'course_num': 310, 'term': '201931',
+                'fields': 'crn,meetings'}
+
+        # Act
+        # One query each for when the term and the grades were last updated, the
+        # sections, and their meetings
+        with self.assertNumQueries(4):
+            response = self.client.get('/api/sections', data=data)
+
+        # Assert
+        self.assertEqual([list(section) for section in response.json()],
+                         [['id', 'crn', 'meetings']] * 2)
+
+    def test_api_sections_rejects_unknown_fields(self):
+        """ Tests that /api/sections responds with 400 if fields has unknown fields """
+        # Arrange
+        data = {'dept': 'CSCE', 'course_num': 310, 'term': '201931',
+                'fields': 'crn,professor'}
+
+        # Act
+        response = self.client.get('/api/sections', data=data)
+
+        # Assert
+        self.assertEqual(response.status_code, 400)
+
+    def test_api_sections_bulk_matches_sections(self):
+        """ Tests that /api/sections/bulk gives the same sections for each course as
+            /api/sections, using one query each for the sections, meetings and grades
+        """
+        # Arrange
+        expected = {
+            f"{dept} {course_num}": self.client.get('/api/sections', data={
+                'dept': dept, 'course_num': course_num, 'term': '201931'
+            }).json()
+            for dept, course_num in [('CSCE', '310'), ('ASCC', '101'), ('MATH', '151')]
+        }
+        data = {'term': '201931', 'courses': ['CSCE 310', 'ASCC 101', 'MATH 151']}
+
+        # Act
+        # Plus one query each for when the term and the grades were last updated
+        with self.assertNumQueries(5):
+            response = self.client.get('/api/sections/bulk', data=data)
+
+        # Assert
+        self.assertEqual(response.json(), expected)
+
+    def test_api_sections_bulk_only_includes_requested_fields(self):
+        """ Tests that /api/sections/bulk?fields=... only includes those fields and the
+            id, like /api/sections
+        """
+        # Arrange
+        data = {'term': '201931', 'courses': ['CSCE 310'], 'fields': 'crn'}
+
+        # Act
+        response = self.client.get('/api/sections/bulk', data=data)
+
+        # Assert
+        self.assertEqual([list(section) for section in response.json()['CSCE 310']],
+                         [['id', 'crn']] * 2)
+
+    def test_api_sections_bulk_requires_courses(self):
+        """ Tests that /api/sections/bulk responds with 400 without valid courses """
+        # Arrange
+        params = [{'term': '201931'}, {'term': '201931', 'courses': ['CSCE']},
+                  {'courses': ['CSCE 310']}]
+
+        # Act
+        responses = [self.client.get('/api/sections/bulk', data=data) for data in params]
+
+        # Assert
+        self.assertEqual([response.status_code for response in responses],
+                         [400, 400, 400])
+
+    def test_api_course_responds_not_modified_if_etag_matches(self):
+        """ Tests that /api/course responds with 304 after only looking up when the term
+            was last updated if the client already has the course
+        """
+        # Arrange
+        Term.objects.create(code='201931', last_updated=timezone.now())
+        data = {'dept': 'CSCE', 'course_num': '181', 'term': '201931'}
+        etag = self.client.get('/api/course', data=data)['ETag']
+
+        # Act
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/course', data=data, HTTP_IF_NONE_MATCH=etag)
+
+        # Assert
+        self.assertEqual(response.status_code, 304)
+
+    def test_api_course_has_no_etag_if_term_is_missing(self):
+        """ Tests that /api/course doesn't set an ETag if the term doesn't exist """
+        # Arrange
+        data = {'dept': 'CSCE', 'course_num': '181', 'term': '201931'}
+
+        # Act
+        response = self.client.get('/api/course', data=data)
+
+        # Assert
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('ETag'))
+        self.assertFalse(response.has_header('Last-Modified'))
+
+    def test_api_sections_etag_changes_when_grades_are_updated(self):
+        """ Tests that /api/sections responds with the sections again once the grades
+            have been updated, since they include the grades
+        """
+        # Arrange
+        Term.objects.create(code='201931', last_updated=timezone.now())
+        data = {'dept': 'CSCE', 'course_num': 310, 'term': '201931'}
+        etag = self.client.get('/api/sections', data=data)['ETag']
+        Grades.objects.rebuild_rollups()
+        GradesUpdate.mark_updated()
+
+        # Act
+        response = self.client.get('/api/sections', data=data, HTTP_IF_NONE_MATCH=etag)
+
+        # Assert
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_api_grades_responds_not_modified_if_etag_matches(self):
+        """ Tests that /api/grades responds with 304 if the grades haven't been updated
+            since the client got them
+        """
+        # Arrange
+        data = {'instructor': 'Akash Tyagi', 'subject': 'CSCE', 'course_num': '310'}
+        etag = self.client.get('/api/grades', data=data)['ETag']
+
+        # Act
+        response = self.client.get('/api/grades', data=data, HTTP_IF_NONE_MATCH=etag)
+
+        # Assert
+        self.assertEqual(response.status_code, 304)
+
+    def test_api_grades_requires_params(self):
+        """ Tests that /api/grades responds with 400 if the subject is missing """
+        # Act
+        response = self.client.get('/api/grades', data={'instructor': 'Akash Tyagi',
+                                                        'course_num': '310'})
+
+        # Assert
+        self.assertEqual(response.status_code, 400)
+
     def test_api_course_search_gives_correct_results_cs(self):
         """ Tests that /api/course/search filters courses that don't match the entire
             search term
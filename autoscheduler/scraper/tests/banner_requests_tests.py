@@ -1,4 +1,5 @@
 import unittest
+from unittest import mock
 
 import asyncio
 from aiohttp import ClientSession
@@ -75,11 +76,11 @@ class BannerRequestsTests(AioTestCase):
 
         dept = "CSCE"
 
-        async with ClientSession(loop=asyncio.get_running_loop()) as session:
+        async with ClientSession() as session:
             session_id = await request.create_session(session, term)
 
             # Act
-            result = await request.get_courses(session, session_id, dept, term, 1)
+            result = await request.get_courses(session, session_id, dept, term, 750)
 
             subject = result[0]["subject"]
 
@@ -107,7 +108,7 @@ class BannerRequestsTests(AioTestCase):
             return []
 
         # Act
-        await request.search(depts_terms, asyncio.Semaphore(3), spy, 1)
+        await request.search(depts_terms, asyncio.Semaphore(3), spy)
         result = spy.result
 
         # Get all of the according subjects for the retrieved courses
@@ -136,3 +137,50 @@ class BannerRequestsTests(AioTestCase):
         # Assert
         self.assertEqual(result, "ACCT")  # First subject/dept in alphabetical order
         self.assertEqual(len(data), amount)
+
+async def _get_courses(responses):
+    """ Runs get_courses for a department of 2 courses, one per page, where each
+        request for a page gets the next of its responses
+    """
+    request = BannerRequests()
+    responses = {offset: iter(page_responses)
+                 for offset, page_responses in responses.items()}
+
+    async def get_page(_session, _session_id, _dept, _term, offset, _amount):
+        return next(responses[offset])
+
+    async def reset_search(_session):
+        pass
+
+    with mock.patch.object(request, '_get_page', get_page):
+        with mock.patch.object(request, 'reset_search', reset_search):
+            return await request.get_courses(None, 'session', 'CSCE', '201931', 1)
+
+class GetCoursesPagesTests(AioTestCase):
+    """ Tests how get_courses retrieves the pages of a department, without the network """
+
+    async def test_get_courses_retries_missing_page(self):
+        """ Tests that a page Banner doesn't return is requested again """
+        # Arrange
+        responses = {0: [{'data': [{'id': 1}], 'totalCount': 2}],
+                     1: [{'data': None}, {'data': [{'id': 2}]}]}
+
+        # Act
+        courses = await _get_courses(responses)
+
+        # Assert
+        self.assertEqual(courses, [{'id': 1}, {'id': 2}])
+
+    async def test_get_courses_fails_department_missing_a_page(self):
+        """ Tests that get_courses returns None instead of the department without the
+            courses of a page Banner never returned
+        """
+        # Arrange
+        responses = {0: [{'data': [{'id': 1}], 'totalCount': 2}],
+                     1: [{'data': None}] * 3}
+
+        # Act
+        courses = await _get_courses(responses)
+
+        # Assert
+        self.assertIsNone(courses)
@@ -0,0 +1,108 @@
+import asyncio
+from scraper.banner_requests import BannerRequests
+from .aio_test_case import AioTestCase
+from .utils.fake_banner import FakeBanner
+
+def _collect(course_list, *_):
+    """ parse_all_courses for BannerRequests.search that returns the courses as is """
+    return course_list
+
+class BannerSearchTests(AioTestCase):
+    """ Tests BannerRequests.search against a local server that behaves like Banner """
+
+    async def test_search_reuses_connections(self):
+        """ Tests that departments are searched over a shared pool of connections,
+            instead of opening new ones for each department
+        """
+        # Arrange
+        banner = BannerRequests()
+        depts_terms = [(f'D{i:03}', '201931') for i in range(20)]
+
+        async with FakeBanner() as server:
+            server.point(banner)
+
+            # Act
+            await banner.search(depts_terms, asyncio.Semaphore(2), _collect,
+                                connection_limit=2)
+
+            # Assert
+            self.assertLessEqual(len(server.peers), 2)
+
+    async def test_search_keeps_searches_separate(self):
+        """ Tests that concurrent searches use separate Banner sessions, so they don't
+            get each other's results
+        """
+        # Arrange
+        banner = BannerRequests()
+        depts = [f'D{i:03}' for i in range(10)]
+
+        async with FakeBanner() as server:
+            server.point(banner)
+
+            # Act
+            results = await banner.search([(dept, '201931') for dept in depts],
+                                          asyncio.Semaphore(5), _collect)
+
+            # Assert
+            self.assertEqual([result[0]['subject'] for result in results], depts)
+
+    async def test_search_reuses_search_sessions(self):
+        """ Tests that search sessions are only registered for as many searches of a
+            term as run at once, and are reused for the rest
+        """
+        # Arrange
+        banner = BannerRequests()
+        depts_terms = [(f'D{i:03}', term) for i in range(10)
+                       for term in ('201931', '202011')]
+
+        async with FakeBanner() as server:
+            server.point(banner)
+
+            # Act
+            results = await banner.search(depts_terms, asyncio.Semaphore(2), _collect)
+
+            # Assert
+            self.assertEqual([result[0]['subject'] for result in results],
+                             [dept for dept, _ in depts_terms])
+            self.assertLessEqual(server.requests['create_session'], 4)
+            self.assertEqual(server.requests['search'], len(depts_terms))
+
+    async def test_search_retrieves_every_page(self):
+        """ Tests that departments with more sections than fit in one response are
+            retrieved completely and in order, even if Banner returns smaller pages than
+            were asked for
+        """
+        # Arrange
+        banner = BannerRequests()
+
+        async with FakeBanner(sections_per_dept=25, max_page_size=4) as server:
+            server.point(banner)
+
+            # Act
+            results = await banner.search([('CSCE', '201931'), ('MATH', '201931')],
+                                          asyncio.Semaphore(3), _collect, amount=10)
+
+            # Assert
+            for result, dept in zip(results, ('CSCE', 'MATH')):
+                self.assertEqual([(section['subject'], section['courseReferenceNumber'])
+                                  for section in result],
+                                 [(dept, i) for i in range(25)])
+
+    async def test_search_retrieves_pages_within_concurrency_limit(self):
+        """ Tests that pages are retrieved concurrently, but never with more requests at
+            once than the semaphore allows
+        """
+        # Arrange
+        banner = BannerRequests()
+        depts_terms = [(f'D{i:03}', '201931') for i in range(4)]
+
+        async with FakeBanner(sections_per_dept=40) as server:
+            server.point(banner)
+
+            # Act
+            results = await banner.search(depts_terms, asyncio.Semaphore(3), _collect,
+                                          amount=5)
+
+            # Assert
+            self.assertEqual([len(result) for result in results], [40] * 4)
+            self.assertEqual(server.max_concurrent, 3)
@@ -0,0 +1,140 @@
+from datetime import time
+import unittest
+
+from scraper.management.commands.utils.conflict_graph import (
+    meeting_mask, build_course_conflicts,
+)
+from scraper.models import Meeting, Section
+
+def _section(section_id: int, subject: str, course_num: str, term: str = '201931'):
+    """ Creates a Section with only the attributes the conflict graph uses """
+    return Section(id=section_id, subject=subject, course_num=course_num,
+                   term_code=term)
+
+def _meeting(meeting_id: int, section: Section, start: time, end: time, day: int = 0):
+    """ Creates a Meeting on the given day with only the attributes the conflict graph
+        uses
+    """
+    days = [False] * 7
+    days[day] = True
+    return Meeting(id=meeting_id, section=section, meeting_days=days, start_time=start,
+                   end_time=end)
+
+class ConflictGraphTests(unittest.TestCase):
+    """ Tests for the course conflict graph built by scrape_courses """
+
+    def test_meeting_mask_touching_meetings_overlap(self):
+        """ Tests that meetings where one ends the minute the other starts conflict,
+            matching create_schedules
+        """
+        # Arrange
+        days = [True] + [False] * 6
+
+        # Act
+        first = meeting_mask(days, time(8), time(8, 50))
+        second = meeting_mask(days, time(8, 50), time(9, 40))
+
+        # Assert
+        self.assertTrue(first & second)
+
+    def test_meeting_mask_different_days_dont_overlap(self):
+        """ Tests that meetings at the same time on different days don't conflict """
+        # Arrange
+        monday = [True] + [False] * 6
+        tuesday = [False, True] + [False] * 5
+
+        # Act
+        first = meeting_mask(monday, time(8), time(8, 50))
+        second = meeting_mask(tuesday, time(8), time(8, 50))
+
+        # Assert
+        self.assertFalse(first & second)
+
+    def test_meeting_mask_is_empty_without_times(self):
+        """ Tests that a meeting without times doesn't occupy any time """
+        # Act
+        mask = meeting_mask([True] * 7, None, None)
+
+        # Assert
+        self.assertEqual(mask, 0)
+
+    def test_build_course_conflicts_finds_conflicting_courses(self):
+        """ Tests that two courses whose sections all overlap conflict """
+        # Arrange
+        sections = [_section(1, 'CSCE', '121'), _section(2, 'CSCE', '121'),
+                    _section(3, 'MATH', '151')]
+        meetings = [_meeting(10, sections[0], time(8), time(8, 50)),
+                    _meeting(20, sections[1], time(8, 30), time(9, 20)),
+                    _meeting(30, sections[2], time(8, 40), time(10))]
+
+        # Act
+        conflicts = build_course_conflicts(sections, meetings)
+
+        # Assert
+        pairs = [(conflict.course_id, conflict.other_course_id, conflict.compatible_pairs)
+                 for conflict in conflicts]
+        self.assertEqual(pairs, [('CSCE121-201931', 'MATH151-201931', 0)])
+
+    def test_build_course_conflicts_counts_compatible_pairs(self):
+        """ Tests that courses with some conflicting sections have the number of pairs
+            of their sections that don't conflict
+        """
+        # Arrange
+        sections = [_section(1, 'CSCE', '121'), _section(2, 'CSCE', '121'),
+                    _section(3, 'MATH', '151')]
+        meetings = [_meeting(10, sections[0], time(8), time(8, 50)),
+                    _meeting(20, sections[1], time(13), time(13, 50)),
+                    _meeting(30, sections[2], time(8, 40), time(10))]
+
+        # Act
+        conflicts = build_course_conflicts(sections, meetings)
+
+        # Assert
+        self.assertEqual([conflict.compatible_pairs for conflict in conflicts], [1])
+
+    def test_build_course_conflicts_counts_sections_without_times_as_compatible(self):
+        """ Tests that a section without meeting times is compatible with every section
+        """
+        # Arrange
+        sections = [_section(1, 'CSCE', '121'), _section(2, 'CSCE', '121'),
+                    _section(3, 'MATH', '151')]
+        meetings = [_meeting(10, sections[0], time(8), time(8, 50)),
+                    _meeting(20, sections[1], None, None),
+                    _meeting(30, sections[2], time(8, 40), time(10))]
+
+        # Act
+        conflicts = build_course_conflicts(sections, meetings)
+
+        # Assert
+        self.assertEqual([conflict.compatible_pairs for conflict in conflicts], [1])
+
+    def test_build_course_conflicts_ignores_courses_that_never_overlap(self):
+        """ Tests that courses whose sections never meet at the same time aren't
+            returned, including ones that meet in the same hour
+        """
+        # Arrange
+        sections = [_section(1, 'CSCE', '121'), _section(2, 'MATH', '151'),
+                    _section(3, 'PHYS', '206')]
+        meetings = [_meeting(10, sections[0], time(8), time(8, 20)),
+                    _meeting(20, sections[1], time(8, 30), time(8, 50)),
+                    _meeting(30, sections[2], time(8), time(8, 50), day=1)]
+
+        # Act
+        conflicts = build_course_conflicts(sections, meetings)
+
+        # Assert
+        self.assertEqual(conflicts, [])
+
+    def test_build_course_conflicts_ignores_courses_in_other_terms(self):
+        """ Tests that courses only conflict with courses in the same term """
+        # Arrange
+        sections = [_section(1, 'CSCE', '121', '201931'),
+                    _section(2, 'MATH', '151', '202011')]
+        meetings = [_meeting(10, sections[0], time(8), time(8, 50)),
+                    _meeting(20, sections[1], time(8), time(8, 50))]
+
+        # Act
+        conflicts = build_course_conflicts(sections, meetings)
+
+        # Assert
+        self.assertEqual(conflicts, [])
@@ -1,6 +1,7 @@
 from collections import defaultdict
 import datetime
 import django.test
+from psycopg2.extras import NumericRange
 
 from scraper.management.commands.scrape_courses import (
     parse_section, parse_meeting, parse_instructor, parse_course, convert_meeting_time,
@@ -119,6 +120,24 @@ class ScrapeCoursesTests(django.test.TestCase):
                             start_time=begin_time, end_time=end_time,
                             meeting_type=meeting_type, section=section, room=room)
 
+    def test_parse_meeting_sets_time_range(self):
+        """ Tests that parse_meeting sets the time range to the minutes of the day the
+            meeting takes up, including the end time
+        """
+
+        # Arrange
+        section = Section(id=497223, subject="CSCE", course_num=121, section_num=501,
+                          term_code=0, crn=12323, min_credits=0, current_enrollment=0,
+                          max_enrollment=0, asynchronous=False)
+        # 13:50 - 14:40
+        expected = NumericRange(830, 880, '[]')
+
+        # Act
+        meeting = parse_meeting(self.csce_section_json["meetingsFaculty"][0], section, 0)
+
+        # Assert
+        self.assertEqual(meeting.time_range, expected)
+
     def test_parse_instructor_does_save_model(self):
         """ Tests if parse instructor saves the model to the database correctly """
 
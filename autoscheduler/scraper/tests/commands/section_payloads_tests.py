@@ -0,0 +1,54 @@
+import django.test
+
+from scraper.management.commands.utils.section_payloads import save_section_payloads
+from scraper.models import Section, SectionPayload
+
+def _section(section_id: int, subject: str, course_num: str, term: int = 201931):
+    """ Creates a Section with only the required attributes """
+    return Section(id=section_id, crn=section_id, subject=subject, course_num=course_num,
+                   section_num='501', term_code=term, min_credits=3,
+                   current_enrollment=0, max_enrollment=10, asynchronous=False)
+
+class SectionPayloadsTests(django.test.TestCase):
+    """ Tests for the section payloads saved by scrape_courses and scrape_grades """
+
+    def test_save_section_payloads_saves_every_course_in_term(self):
+        """ Tests that every course in the term gets a payload with its sections """
+        # Arrange
+        Section.objects.bulk_create([_section(1, 'CSCE', '121'),
+                                     _section(2, 'CSCE', '121'),
+                                     _section(3, 'MATH', '151'),
+                                     _section(4, 'MATH', '151', 202011)])
+
+        # Act
+        count = save_section_payloads([201931])
+
+        # Assert
+        payloads = SectionPayload.objects.order_by('subject')
+        self.assertEqual(count, 2)
+        self.assertEqual([(payload.subject, payload.course_num, payload.term_code)
+                          for payload in payloads],
+                         [('CSCE', '121', 201931), ('MATH', '151', 201931)])
+        self.assertEqual(bytes(payloads[0].data).count(b'"crn"'), 2)
+
+    def test_save_section_payloads_only_replaces_given_courses(self):
+        """ Tests that giving courses leaves the other courses' payloads alone, and
+            replaces the given courses' payloads in every term
+        """
+        # Arrange
+        Section.objects.bulk_create([_section(1, 'CSCE', '121'),
+                                     _section(2, 'MATH', '151'),
+                                     _section(3, 'CSCE', '121', 202011)])
+        save_section_payloads([201931])
+        SectionPayload.objects.update(data=b'stale')
+
+        # Act
+        count = save_section_payloads(courses=[('CSCE', '121')])
+
+        # Assert
+        payloads = {(payload.subject, payload.term_code): bytes(payload.data)
+                    for payload in SectionPayload.objects.all()}
+        self.assertEqual(count, 2)
+        self.assertEqual(payloads[('MATH', 201931)], b'stale')
+        self.assertNotEqual(payloads[('CSCE', 201931)], b'stale')
+        self.assertIn(('CSCE', 202011), payloads)
@@ -0,0 +1,53 @@
+from rest_framework.test import APITestCase
+from scraper.models import Course, CourseConflict
+
+class CourseConflictsAPITests(APITestCase):
+    """ Tests /api/course/conflicts """
+
+    def setUp(self):
+        """ Creates the courses that the conflicts are between """
+        Course.objects.bulk_create([
+            Course(id='CSCE181-201931', dept='CSCE', course_num='181',
+                   title='INTRODUCTION TO COMPUTING', term='201931', credit_hours=3),
+            Course(id='CSCE315-201931', dept='CSCE', course_num='315',
+                   title='PROGRAMMING STUDIO', term='201931', credit_hours=3),
+            Course(id='CSCE181-201731', dept='CSCE', course_num='181',
+                   title='INTRODUCTION TO COMPUTING', term='201731', credit_hours=3),
+            Course(id='CSCE310-201731', dept='CSCE', course_num='310',
+                   title='DATABASE SYSTEMS', term='201731', credit_hours=3),
+            Course(id='CSCE312-201731', dept='CSCE', course_num='312',
+                   title='COMPUTER ORGANIZATION', term='201731', credit_hours=4),
+            Course(id='CSCE315-201731', dept='CSCE', course_num='315',
+                   title='PROGRAMMING STUDIO', term='201731', credit_hours=3),
+        ])
+
+    def test_api_course_conflicts_gives_correct_results(self):
+        """ Tests that /api/course/conflicts gives the courses that conflict with the
+            given course, regardless of which side of the pair it was saved on
+        """
+        # Arrange
+        CourseConflict.objects.bulk_create([
+            CourseConflict(course_id='CSCE181-201731', other_course_id='CSCE310-201731'),
+            CourseConflict(course_id='CSCE310-201731', other_course_id='CSCE315-201731'),
+            CourseConflict(course_id='CSCE181-201931', other_course_id='CSCE315-201931'),
+            # Some of their sections fit together, so they don't conflict
+            CourseConflict(course_id='CSCE310-201731', other_course_id='CSCE312-201731',
+                           compatible_pairs=1),
+        ])
+        expected = {'results': ['CSCE 181', 'CSCE 315']}
+        data = {'dept': 'csce', 'course_num': '310', 'term': '201731'}
+
+        # Act
+        response = self.client.get('/api/course/conflicts', data=data)
+
+        # Assert
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), expected)
+
+    def test_api_course_conflicts_requires_course(self):
+        """ Tests that /api/course/conflicts gives a 400 error without a course """
+        # Act
+        response = self.client.get('/api/course/conflicts', data={'term': '201731'})
+
+        # Assert
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,154 @@
+from datetime import timedelta
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from scraper.models import Course, Instructor, Section, Term
+
+class CourseSearchTests(APITestCase):
+    """ Tests the in-memory course search used by /api/course/search """
+    @classmethod
+    def setUpTestData(cls):
+        Course.objects.bulk_create([
+            Course(id='CSCE121-201931', dept='CSCE', course_num='121',
+                   title='INTRO PGM DESIGN CONCEPT', term='201931', credit_hours=4),
+            Course(id='CSCE1210-201931', dept='CSCE', course_num='1210',
+                   title='CSCE 121 LAB', term='201931', credit_hours=0),
+            Course(id='CSCE221-201931', dept='CSCE', course_num='221',
+                   title='DATA STRUC & ALGORITHMS', term='201931', credit_hours=4),
+            Course(id='CSCE310-201931', dept='CSCE', course_num='310',
+                   title='DATABASE SYSTEMS', term='201931', credit_hours=3),
+            Course(id='CSCE312-201931', dept='CSCE', course_num='312',
+                   title='COMPUTER ORGANIZATION', term='201931', credit_hours=4),
+            Course(id='CS105-201931', dept='CS', course_num='105',
+                   title='CS FOR EVERYONE', term='201931', credit_hours=3),
+            Course(id='COMM203-201931', dept='COMM', course_num='203',
+                   title='PUBLIC SPEAKING', term='201931', credit_hours=3),
+            Course(id='COMM203-201831', dept='COMM', course_num='203',
+                   title='PUBLIC SPEAKING', term='201831', credit_hours=3),
+            Course(id='LAW7500S-201931', dept='LAW', course_num='7500S',
+                   title='SPORTS LAW', term='201931', credit_hours=None),
+            Course(id='LAW750-201931', dept='LAW', course_num='750',
+                   title='CONTRACTS', term='201931', credit_hours=3),
+        ])
+        instructors = Instructor.objects.bulk_create([
+            Instructor(id='Akash Tyagi'),
+            Instructor(id='John Moore'),
+        ])
+        Section.objects.bulk_create([
+            Section(id=1, crn=12345, subject='CSCE', course_num='310', section_num='501',
+                    term_code=201931, min_credits=3, max_enrollment=50,
+                    current_enrollment=40, asynchronous=False,
+                    instructor=instructors[0]),
+            Section(id=2, crn=12346, subject='CSCE', course_num='121', section_num='501',
+                    term_code=201931, min_credits=4, max_enrollment=50,
+                    current_enrollment=40, asynchronous=False,
+                    instructor=instructors[1]),
+            Section(id=3, crn=12346, subject='COMM', course_num='203', section_num='501',
+                    term_code=201831, min_credits=3, max_enrollment=50,
+                    current_enrollment=40, asynchronous=False,
+                    instructor=instructors[0]),
+        ])
+
+    def _search(self, search: str) -> list:
+        response = self.client.get('/api/course/search',
+                                   data={'search': search, 'term': '201931'})
+        return response.json()['results']
+
+    def _rank(self, search: str) -> list:
+        response = self.client.get('/api/course/search/ranked',
+                                   data={'search': search, 'term': '201931'})
+        return response.json()['results']
+
+    def test_search_matches_database_search(self):
+        """ Tests that searching in memory gives the same results, in the same order,
+            as searching the database does when the term doesn't exist
+        """
+        # Arrange
+        searches = ['', 'c', 'CS', 'csce 1', 'CSCE121', 'co', 'law 75', 'sp', 'XYZ']
+        expected = [self._search(search) for search in searches]
+        Term.objects.create(code='201931', last_updated=timezone.now())
+
+        # Act
+        results = [self._search(search) for search in searches]
+
+        # Assert
+        self.assertEqual(results, expected)
+
+    def test_search_only_queries_term(self):
+        """ Tests that once the term's index is built, searching only queries when the
+            term was last updated
+        """
+        # Arrange
+        Term.objects.create(code='201931', last_updated=timezone.now())
+        self._search('CSCE')
+
+        # Act
+        with self.assertNumQueries(1):
+            results = self._search('C')
+
+        # Assert
+        self.assertEqual(len(results), 11)
+
+    def test_search_rebuilds_index_when_term_is_updated(self):
+        """ Tests that courses scraped after the index was built are found once the
+            term's last_updated changes
+        """
+        # Arrange
+        term = Term.objects.create(code='201931', last_updated=timezone.now())
+        self._search('CSCE')
+        Course.objects.create(id='CSCE314-201931', dept='CSCE', course_num='314',
+                              title='PROGRAMMING LANGUAGES', term='201931',
+                              credit_hours=3)
+        term.last_updated += timedelta(minutes=1)
+        term.save()
+
+        # Act
+        results = self._search('CSCE 31')
+
+        # Assert
+        self.assertEqual(results, ['CSCE 310 - DATABASE SYSTEMS',
+                                   'CSCE 312 - COMPUTER ORGANIZATION',
+                                   'CSCE 314 - PROGRAMMING LANGUAGES'])
+
+    def test_rank_finds_misspelled_titles(self):
+        """ Tests that /api/course/search/ranked finds titles similar to the search """
+        # Act
+        results = self._rank('data structures')
+
+        # Assert
+        self.assertEqual(results, ['CSCE 221 - DATA STRUC & ALGORITHMS'])
+
+    def test_rank_ranks_titles_containing_search_first(self):
+        """ Tests that /api/course/search/ranked finds the search anywhere in titles, and
+            ranks them above titles that are only similar to it
+        """
+        # Act
+        results = self._rank('law')
+
+        # Assert
+        self.assertEqual(results[0], 'LAW 7500S - SPORTS LAW')
+
+    def test_rank_finds_instructors(self):
+        """ Tests that /api/course/search/ranked finds the courses an instructor
+            teaches in the term
+        """
+        # Act
+        results = self._rank('tyagi')
+
+        # Assert
+        self.assertEqual(results, ['CSCE 310 - DATABASE SYSTEMS'])
+
+    def test_rank_finds_crns(self):
+        """ Tests that /api/course/search/ranked finds the course of a CRN in the term """
+        # Act
+        results = self._rank('12346')
+
+        # Assert
+        self.assertEqual(results, ['CSCE 121 - INTRO PGM DESIGN CONCEPT'])
+
+    def test_rank_requires_search(self):
+        """ Tests that /api/course/search/ranked responds with 400 without a search """
+        # Act
+        response = self.client.get('/api/course/search/ranked', data={'term': '201931'})
+
+        # Assert
+        self.assertEqual(response.status_code, 400)
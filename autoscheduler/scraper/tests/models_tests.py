@@ -7,6 +7,7 @@ from scraper.models.course import generate_course_id
 from scraper.models.department import generate_department_id
 from scraper.models.section import generate_meeting_id, Section
 from scraper.models.grades import Grades
+from scraper.models.grade_rollup import GradeRollup
 from scraper.models.instructor import Instructor
 
 class DepartmentTests(unittest.TestCase):
@@ -42,7 +43,7 @@ class MeetingTests(unittest.TestCase):
         self.assertEqual(meeting_id, "1234560")
 
 class GradesTests(django.test.TestCase):
-    """ Tests for Grades model + GradeManager """
+    """ Tests for Grades model + GradeManager + GradeRollupManager """
 
     def test_instructor_performances_calculates_from_all_terms(self):
         """ Tests that instructor performance uses all of the
@@ -74,6 +75,7 @@ class GradesTests(django.test.TestCase):
         ]
 
         Grades.objects.bulk_create(grades)
+        Grades.objects.rebuild_rollups()
 
         expected = {
             "gpa": 3.5, "A": 1, "B": 1, "count": 2, # Values that matter
@@ -81,7 +83,7 @@ class GradesTests(django.test.TestCase):
         }
 
         # Act
-        result = Grades.objects.instructor_performance(
+        result = GradeRollup.objects.instructor_performance(
             dept=subject, course_num=course_num, instructor=instructor, honors=False
         )
 
@@ -121,6 +123,7 @@ class GradesTests(django.test.TestCase):
         ]
 
         Grades.objects.bulk_create(grades)
+        Grades.objects.rebuild_rollups()
 
         expected = {
             "gpa": 2.5, "A": 0, "B": 1, "C": 1, "count": 2, # Values that matter
@@ -128,7 +131,7 @@ class GradesTests(django.test.TestCase):
         }
 
         # Act
-        result = Grades.objects.instructor_performance(
+        result = GradeRollup.objects.instructor_performance(
             dept=subject, course_num=course_num, instructor=instructor, honors=False,
         )
 
@@ -167,6 +170,7 @@ class GradesTests(django.test.TestCase):
         ]
 
         Grades.objects.bulk_create(grades)
+        Grades.objects.rebuild_rollups()
 
         expected = {
             "gpa": 3.0, "A": 0, "B": 1, "C": 0, "count": 1, # Values that matter
@@ -174,7 +178,7 @@ class GradesTests(django.test.TestCase):
         }
 
         # Act
-        result = Grades.objects.instructor_performance(
+        result = GradeRollup.objects.instructor_performance(
             dept=subject, course_num=course_num, instructor=instructor, honors=False
         )
 
@@ -213,6 +217,7 @@ class GradesTests(django.test.TestCase):
         ]
 
         Grades.objects.bulk_create(grades)
+        Grades.objects.rebuild_rollups()
 
         expected = {
             "gpa": 2.0, "A": 0, "B": 0, "C": 1, "count": 1, # Values that matter
@@ -220,9 +225,113 @@ class GradesTests(django.test.TestCase):
         }
 
         # Act
-        result = Grades.objects.instructor_performance(
+        result = GradeRollup.objects.instructor_performance(
             dept=subject, course_num=course_num, instructor=instructor, honors=True
         )
 
         # Assert
         self.assertEqual(expected, result)
+
+    def test_instructor_performances_matches_instructor_performance(self):
+        """ Tests that instructor_performances gives the same grades as calling
+            instructor_performance for each section, in a single query
+        """
+
+        # Arrange
+        first = Instructor(id="First Last", email_address="last@tamu.edu")
+        second = Instructor(id="Second Last", email_address="second@tamu.edu")
+        Instructor.objects.bulk_create([first, second])
+        term = 201931
+
+        sections = [
+            Section(id=10, subject="CSCE", course_num="121", instructor=first,
+                    term_code=term, section_num=500, min_credits=3, asynchronous=False,
+                    current_enrollment=0, max_enrollment=10, honors=True),
+            Section(id=11, subject="CSCE", course_num="121", instructor=first,
+                    term_code=term, section_num=501, min_credits=3, asynchronous=False,
+                    current_enrollment=0, max_enrollment=10, honors=False),
+            Section(id=12, subject="CSCE", course_num="121", instructor=first,
+                    term_code=term, section_num=502, min_credits=3, asynchronous=False,
+                    current_enrollment=0, max_enrollment=10, honors=False),
+            Section(id=13, subject="CSCE", course_num="221", instructor=second,
+                    term_code=term, section_num=500, min_credits=3, asynchronous=False,
+                    current_enrollment=0, max_enrollment=10, honors=False),
+            Section(id=14, subject="CSCE", course_num="221", instructor=None,
+                    term_code=term, section_num=501, min_credits=3, asynchronous=False,
+                    current_enrollment=0, max_enrollment=10, honors=False),
+        ]
+
+        Section.objects.bulk_create(sections)
+
+        grades = [
+            Grades(section=sections[0], gpa=2.0, C=1, A=0, B=0, D=0, F=0, I=0, S=0, U=0,
+                   Q=0, X=0),
+            Grades(section=sections[1], gpa=3.0, B=1, A=0, C=0, D=0, F=0, I=0, S=0, U=0,
+                   Q=0, X=0),
+            Grades(section=sections[2], gpa=4.0, A=2, B=0, C=0, D=0, F=0, I=0, S=0, U=0,
+                   Q=0, X=0),
+            Grades(section=sections[3], gpa=1.0, D=1, A=0, B=0, C=0, F=0, I=0, S=0, U=0,
+                   Q=0, X=0),
+        ]
+
+        Grades.objects.bulk_create(grades)
+        Grades.objects.rebuild_rollups()
+
+        expected = {
+            (section.subject, section.course_num, section.instructor_id, section.honors):
+            GradeRollup.objects.instructor_performance(
+                section.subject, section.course_num, section.instructor, section.honors
+            )
+            for section in sections[:4]
+        }
+
+        # Act
+        with self.assertNumQueries(1):
+            result = GradeRollup.objects.instructor_performances(sections)
+
+        # Assert
+        self.assertEqual(expected, result)
+
+    def test_rebuild_rollups_only_rebuilds_given_courses(self):
+        """ Tests that rebuild_rollups updates the rollups of the given courses, and
+            leaves the other courses' rollups as they were
+        """
+
+        # Arrange
+        instructor = Instructor(id="First Last", email_address="last@tamu.edu")
+        instructor.save()
+        term = 201931
+
+        sections = [
+            Section(id=10, subject="CSCE", course_num="121", instructor=instructor,
+                    term_code=term, section_num=500, min_credits=3, asynchronous=False,
+                    current_enrollment=0, max_enrollment=10, honors=False),
+            Section(id=11, subject="CSCE", course_num="221", instructor=instructor,
+                    term_code=term, section_num=500, min_credits=3, asynchronous=False,
+                    current_enrollment=0, max_enrollment=10, honors=False),
+        ]
+
+        Section.objects.bulk_create(sections)
+        Grades.objects.rebuild_rollups()
+
+        grades = [
+            Grades(section=sections[0], gpa=2.0, C=1, A=0, B=0, D=0, F=0, I=0, S=0, U=0,
+                   Q=0, X=0),
+            Grades(section=sections[1], gpa=3.0, B=1, A=0, C=0, D=0, F=0, I=0, S=0, U=0,
+                   Q=0, X=0),
+        ]
+
+        Grades.objects.bulk_create(grades)
+
+        # Act
+        count = Grades.objects.rebuild_rollups([("CSCE", "121")])
+
+        # Assert
+        rebuilt = GradeRollup.objects.instructor_performance("CSCE", "121",
+                                                             instructor, False)
+        stale = GradeRollup.objects.instructor_performance("CSCE", "221",
+                                                           instructor, False)
+        self.assertEqual(count, 1)
+        self.assertEqual(rebuilt["gpa"], 2.0)
+        self.assertEqual(stale["gpa"], None)
+        self.assertEqual(stale["count"], 0)
@@ -0,0 +1,45 @@
+from datetime import timedelta
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from scraper.models import Term, TermsUpdate
+
+class TermsNotModifiedTests(APITestCase):
+    """ Tests that /api/terms responds with 304 Not Modified only while the terms haven't
+        changed
+    """
+
+    def test_api_terms_responds_not_modified_if_not_modified_since(self):
+        """ Tests that /api/terms responds with 304 if no term has been updated since
+            the client got them
+        """
+        # Arrange
+        Term.objects.create(code='201931', last_updated=timezone.now())
+        last_modified = self.client.get('/api/terms')['Last-Modified']
+
+        # Act
+        response = self.client.get('/api/terms', HTTP_IF_MODIFIED_SINCE=last_modified)
+
+        # Assert
+        self.assertEqual(response.status_code, 304)
+
+    def test_api_terms_is_modified_after_newest_term_is_deleted(self):
+        """ Tests that /api/terms doesn't respond with 304 once the most recently updated
+            term is deleted, even though the other terms were updated before the client
+            got them
+        """
+        # Arrange
+        now = timezone.now()
+        Term.objects.create(code='201931', last_updated=now - timedelta(days=1))
+        newest = Term.objects.create(code='202011', last_updated=now)
+        TermsUpdate.mark_updated()
+        last_modified = self.client.get('/api/terms')['Last-Modified']
+
+        # The term is deleted by a later scrape
+        newest.delete()
+        TermsUpdate.objects.update(last_updated=now + timedelta(minutes=1))
+
+        # Act
+        response = self.client.get('/api/terms', HTTP_IF_MODIFIED_SINCE=last_modified)
+
+        # Assert
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,108 @@
+""" A local server that behaves like the parts of Banner that BannerRequests.search uses,
+    so searches can be tested without accessing the network
+"""
+
+import asyncio
+from collections import Counter
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+_PATH = '/StudentRegistrationSsb/ssb'
+
+class FakeBanner: # pylint: disable=too-many-instance-attributes
+    """ Serves sections_per_dept sections for each department, at most max_page_size at
+        a time. Like Banner, each search is tracked with a JSESSIONID cookie, and a
+        search that isn't reset returns pages of the same results as the last one
+    """
+    def __init__(self, sections_per_dept: int = 1, max_page_size: int = 500):
+        self.sections_per_dept = sections_per_dept
+        self.max_page_size = max_page_size
+        # The JSESSIONID and subject of each search
+        self.searches = []
+        # The number of requests made to each endpoint
+        self.requests = Counter()
+        # The client address of each request, which is different for each connection
+        self.peers = set()
+        # The most requests that were being handled at once
+        self.max_concurrent = 0
+
+        self._concurrent = 0
+        self._next_cookie = 0
+        self._last_search = {}
+
+        app = web.Application()
+        app.router.add_post(f'{_PATH}/term/search', self._create_session)
+        app.router.add_get(f'{_PATH}/searchResults/searchResults/', self._search_results)
+        app.router.add_post(f'{_PATH}/classSearch/resetDataForm', self._reset_search)
+        self.server = TestServer(app)
+
+    async def __aenter__(self):
+        await self.server.start_server()
+        return self
+
+    async def __aexit__(self, *args):
+        await self.server.close()
+
+    def point(self, banner):
+        """ Makes the given BannerRequests send its searches to this server """
+        # Cookies aren't saved for IP addresses, so use a hostname
+        url = f'http://localhost:{self.server.port}{_PATH}'
+        for name in ('course_search_url', 'create_session_url', 'reset_search_url'):
+            setattr(banner, name, getattr(banner, name).replace(
+                'https://compassxe-ssb.tamu.edu/StudentRegistrationSsb/ssb', url))
+
+    def _record(self, request, endpoint: str):
+        self.requests[endpoint] += 1
+        self.peers.add(request.transport.get_extra_info('peername'))
+
+    async def _handle(self, request, endpoint: str, handler):
+        """ Records the request, and handles it like a slow server would """
+        self._record(request, endpoint)
+        self._concurrent += 1
+        self.max_concurrent = max(self.max_concurrent, self._concurrent)
+        try:
+            await asyncio.sleep(0.005)
+            return await handler(request)
+        finally:
+            self._concurrent -= 1
+
+    async def _create_session(self, request):
+        return await self._handle(request, 'create_session',
+                                  self._create_session_response)
+
+    async def _search_results(self, request):
+        return await self._handle(request, 'search', self._search_results_response)
+
+    async def _reset_search(self, request):
+        return await self._handle(request, 'reset_search', self._reset_search_response)
+
+    async def _create_session_response(self, request):
+        await request.post()
+
+        self._next_cookie += 1
+        response = web.Response()
+        response.set_cookie('JSESSIONID', str(self._next_cookie))
+        return response
+
+    async def _search_results_response(self, request):
+        cookie = request.cookies.get('JSESSIONID')
+        query = request.query
+
+        if cookie not in self._last_search:
+            self._last_search[cookie] = query['txt_subject']
+            self.searches.append((cookie, query['txt_subject']))
+
+        subject = self._last_search[cookie]
+        offset = int(query['pageOffset'])
+        size = min(int(query['pageMaxSize']), self.max_page_size)
+        sections = [{'subject': subject, 'courseReferenceNumber': i}
+                    for i in range(self.sections_per_dept)]
+
+        return web.json_response({
+            'totalCount': len(sections),
+            'data': sections[offset:offset + size],
+        })
+
+    async def _reset_search_response(self, request):
+        self._last_search.pop(request.cookies.get('JSESSIONID'), None)
+        return web.Response()
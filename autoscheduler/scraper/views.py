@@ -1,11 +1,90 @@
+import hashlib
+import os
+import re
+from datetime import datetime
+from functools import reduce
 from itertools import chain, islice
+from operator import or_
+from typing import Dict, Optional
+from django.db.models import Q
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 from rest_framework import generics
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.decorators import api_view
+from scraper.course_search import rank_courses, search_courses
 from scraper.serializers import (
-    TermSerializer, CourseSearchSerializer, CourseSerializer, SectionSerializer)
-from scraper.models import Course, Section, Grades, Term
+    TermSerializer, CourseSearchSerializer, CourseSerializer, SectionSerializer,
+    only_fields, parse_section_fields, serialize_sections,
+)
+from scraper.models import (
+    Course, Section, GradeRollup, GradesUpdate, Term, TermsUpdate, CourseConflict,
+    SectionPayload,
+)
+from scraper.models.course import generate_course_id
+from autoscheduler.single_flight import single_flight
+
+# Same as django.middleware.gzip
+_ACCEPTS_GZIP = re.compile(r'\bgzip\b')
+
+# Changes whenever a new version is deployed, in case it changes how the data is rendered
+_DEPLOY_VERSION = os.getenv('GAE_VERSION', '')
+
+def _term_last_updated(request) -> Optional[datetime]:
+    """ Gets when the term in the request's term query param was last updated, or None
+        if it doesn't exist. The result is saved on the request, so it's only queried once
+    """
+    if not hasattr(request, '_term_last_updated'):
+        code = request.GET.get('term') or ''
+        request._term_last_updated = ( # pylint: disable=protected-access
+            Term.objects.filter(code=code).values_list('last_updated', flat=True).first()
+            if code.isdigit() else None
+        )
+
+    return request._term_last_updated # pylint: disable=protected-access
+
+def _conditional(term=False, all_terms=False, grades=False):
+    """ Decorator for a view's get method that sets the ETag and Last-Modified headers
+        from when the data it uses was last updated, and responds with 304 Not Modified
+        if the client already has it. This only costs one query per stamp, which is done
+        before the view does any work.
+
+        term uses the Term of the term query param, all_terms uses the TermsUpdate, and
+        grades uses the GradesUpdate. If any of them are missing,
+        the view is run as usual without the headers
+    """
+    def last_modified(request, *_args, **_kwargs) -> Optional[datetime]:
+        # condition calls both etag and last_modified, so only look the stamps up once
+        if hasattr(request, '_data_last_updated'):
+            return request._data_last_updated # pylint: disable=protected-access
+
+        stamps = []
+        if term:
+            stamps.append(_term_last_updated(request))
+        if all_terms:
+            stamps.append(TermsUpdate.objects.values_list('last_updated', flat=True)
+                          .first())
+        if grades:
+            stamps.append(GradesUpdate.objects.values_list('last_updated', flat=True)
+                          .first())
+
+        last_updated = None if not all(stamps) else max(stamps)
+        request._data_last_updated = last_updated # pylint: disable=protected-access
+        return last_updated
+
+    def etag(request, *_args, **_kwargs) -> Optional[str]:
+        last_updated = last_modified(request)
+        if last_updated is None:
+            return None
+
+        version = f'{_DEPLOY_VERSION}:{last_updated.isoformat()}'
+        # Weak, since sections can be served gzipped or not with the same ETag
+        return f'W/"{hashlib.md5(version.encode()).hexdigest()}"'
+
+    return method_decorator(condition(etag_func=etag, last_modified_func=last_modified))
 
 class RetrieveCourseView(generics.RetrieveAPIView):
     """ API endpoint for viewing course information, used by /api/course.
@@ -13,6 +92,10 @@ class RetrieveCourseView(generics.RetrieveAPIView):
     """
     serializer_class = CourseSerializer
 
+    @_conditional(term=True)
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
     def get_object(self):
         """ Overrides default behavior of get_object() to work without a primary key """
         dept = self.request.query_params.get('dept')
@@ -26,6 +109,65 @@ class ListSectionView(generics.ListAPIView):
     """
     serializer_class = SectionSerializer
 
+    @_conditional(term=True, grades=True)
+    def get(self, request, *args, **kwargs):
+        """ Serves the sections rendered by the scrapers if there are any, otherwise
+            serializes them. If only some fields are requested with ?fields=..., they're
+            always serialized, without doing the work for the other fields
+        """
+        try:
+            fields = parse_section_fields(request.query_params.get('fields'))
+        except ValueError as err:
+            return Response(str(err), status=400)
+
+        if fields is None:
+            response = self._get_payload(request)
+            if response is not None:
+                return response
+
+        return self._get_live(request, *args, **kwargs)
+
+    @single_flight
+    def _get_live(self, request, *args, **kwargs):
+        """ Coalesces identical concurrent requests, since serializing every section's
+            grades is expensive for large courses
+        """
+        return super().get(request, *args, **kwargs)
+
+    def _get_payload(self, request) -> HttpResponse: # pylint: disable=no-self-use
+        """ Creates a response from the course's SectionPayload, gzipped if the client
+            accepts it. Returns None if the course doesn't have one
+        """
+        # Only JSON is rendered ahead of time, so the browsable API is still serialized
+        term = request.query_params.get('term') or ''
+        if request.accepted_renderer.format != 'json' or not term.isdigit():
+            return None
+
+        accepts_gzip = _ACCEPTS_GZIP.search(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        data = SectionPayload.objects.filter(
+            term_code=term,
+            subject=request.query_params.get('dept'),
+            course_num=request.query_params.get('course_num'),
+        ).values_list('gzipped_data' if accepts_gzip else 'data', flat=True).first()
+
+        if data is None:
+            return None
+
+        # The data is already JSON, so JsonResponse can't be used
+        response = HttpResponse(bytes(data))
+        response['Content-Type'] = 'application/json'
+        if accepts_gzip:
+            response['Content-Encoding'] = 'gzip'
+        patch_vary_headers(response, ('Accept', 'Accept-Encoding'))
+        return response
+
+    def list(self, request, *args, **kwargs):
+        """ Overrides default behavior of list() to use the faster serialize_sections,
+            which gives the same output as SectionSerializer
+        """
+        fields = parse_section_fields(request.query_params.get('fields'))
+        return Response(serialize_sections(self.get_queryset(), fields=fields))
+
     def get_queryset(self):
         """ Overrides default behavior of get_queryset() to work without a primary key """
         dept = self.request.query_params.get('dept')
@@ -33,33 +175,86 @@ class ListSectionView(generics.ListAPIView):
         term = self.request.query_params.get('term')
         return Section.objects.filter(
             subject=dept, course_num=course_num, term_code=term
-        ).order_by('id').select_related('instructor').prefetch_related('meetings')
+        ).order_by('id')
+
+class ListBulkSectionsView(APIView):
+    """ API endpoint for viewing the sections of several courses at once, used by
+        /api/sections/bulk when restoring the user's saved courses.
+        This view returns the serialized sections of each course, in the same format as
+        /api/sections
+    """
+    # Most students take fewer courses than this, so it's only to bound the work done
+    max_courses = 20
+
+    @_conditional(term=True, grades=True)
+    def get(self, request):
+        """ Gets the sections of every course in the courses param, such as
+            ?term=201931&courses=CSCE 121&courses=MATH 151, in the format
+            {"CSCE 121": [...], "MATH 151": [...]}. Uses the same number of queries
+            however many courses there are. Supports ?fields=... like /api/sections
+        """
+        term = self.request.query_params.get('term') or ''
+        courses = [course.split() for course
+                   in self.request.query_params.getlist('courses')]
+        try:
+            fields = parse_section_fields(self.request.query_params.get('fields'))
+        except ValueError as err:
+            return Response(str(err), status=400)
+
+        if (not term.isdigit() or not courses or len(courses) > self.max_courses
+                or any(len(course) != 2 for course in courses)):
+            return Response(status=400)
+
+        courses_filter = reduce(or_, (Q(subject=dept.upper(), course_num=course_num)
+                                      for dept, course_num in courses))
+        sections = (Section.objects.filter(courses_filter, term_code=term)
+                    .order_by('id'))
+
+        formatted_data = {f"{dept.upper()} {course_num}": []
+                          for dept, course_num in courses}
+        # The subject and course_num are needed to tell which course a section is in,
+        # but are only returned if they were asked for
+        serialized_fields = None if fields is None else fields | {'subject', 'course_num'}
+        for section in serialize_sections(sections, fields=serialized_fields):
+            course = f"{section['subject']} {section['course_num']}"
+            formatted_data[course].append(section if fields is None
+                                          else only_fields(section, fields))
+
+        return Response(formatted_data)
+
+def format_terms(terms) -> Dict[str, str]:
+    """ Formats the given Terms in the format
+        {"Fall 2018 - College Station": "201831", ...}, sorted by descending year with
+        terms in College Station first. Used by /api/terms and /sessions/bootstrap
+    """
+    def term_code_value(model):
+        """ Comparison key function for terms, when sorted in reverse order this
+            sorts departments in descending year, with terms in College Station first
+        """
+        term = model.code
+        return term - 2 * (term % 10)
+
+    serializer = TermSerializer(sorted(terms, key=term_code_value, reverse=True),
+                                many=True)
+    return {obj['desc']: obj['code'] for obj in serializer.data}
 
 class RetrieveTermView(generics.ListAPIView):
     """ API endpoint for viewing terms, used by /api/terms.
 
         This view returns all the terms
     """
-    def get_queryset(self):
-        def term_code_value(model):
-            """ Comparison key function for terms, when sorted in reverse order this
-                sorts departments in descending year, with terms in College Station first
-            """
-            term = model.code
-            return term - 2 * (term % 10)
+    @_conditional(all_terms=True)
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
 
-        return sorted(Term.objects.all().only('code'),
-                      key=term_code_value, reverse=True)
+    def get_queryset(self):
+        return Term.objects.all().only('code')
 
     def list(self, request): # pylint: disable=arguments-differ
         """ Overrides default behavior of list method so terms are ouput in
-           the format {"201831": "Fall 2018 - College Station", ...} Does this by creating
-           a new dictionary called formatted_data
+           the format given by format_terms
         """
-        queryset = self.get_queryset()
-        serializer = TermSerializer(queryset, many=True)
-        formatted_data = {obj['desc']: obj['code'] for obj in serializer.data}
-        return Response(formatted_data)
+        return Response(format_terms(self.get_queryset()))
 
     serializer_class = TermSerializer
 
@@ -67,13 +262,22 @@ class RetrieveCourseSearchView(generics.ListAPIView):
     """ API endpoint for viewing list of courses searched off of
         searchText parameter
     """
+    @_conditional(term=True)
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+    def _get_searches(self):
+        """ Gets the search param formatted for searching by title and by id """
+        # Spaces are desired when searching by title, but not by id
+        title_search = self.request.query_params.get('search').upper().replace("%20", " ")
+        id_search = title_search.replace(" ", "")
+        return title_search, id_search
+
     def get_queryset(self):
         """ Overrides default behavior of get_queryset() to work using
             search and term parameter in the url
         """
-        # Spaces are desired when searching by title, but not by id
-        title_search = self.request.query_params.get('search').upper().replace("%20", " ")
-        id_search = title_search.replace(" ", "")
+        title_search, id_search = self._get_searches()
         term = self.request.query_params.get('term')
         # Get all courses that match by id or title
         matching_id = Course.objects.filter(
@@ -89,7 +293,17 @@ class RetrieveCourseSearchView(generics.ListAPIView):
         """ Overrides default behavior of list method so terms are ouput in
            the format {'results': ["CSCE 181", "CSCE 315", ...]} Does this by creating
            a new dictionary called formatted_data
+
+           If the term exists, the courses are searched in memory with search_courses,
+           which gives the same results as get_queryset without querying them
         """
+        last_updated = _term_last_updated(request)
+        if last_updated is not None:
+            title_search, id_search = self._get_searches()
+            results = search_courses(request.query_params.get('term'), last_updated,
+                                     title_search, id_search, 25)
+            return Response({'results': results})
+
         queryset = self.get_queryset()
         serializer = CourseSearchSerializer(queryset, many=True)
         formatted_data = {'results': [obj['course'] for obj in serializer.data]}
@@ -97,6 +311,25 @@ class RetrieveCourseSearchView(generics.ListAPIView):
 
     serializer_class = CourseSearchSerializer
 
+class RankedCourseSearchView(APIView):
+    """ API endpoint for searching courses by title, instructor or CRN, used by
+        /api/course/search/ranked. Unlike /api/course/search, the search can be anywhere
+        in the title and can be misspelled
+    """
+
+    @_conditional(term=True)
+    def get(self, request):
+        """ Returns the best matching courses in the format
+            {'results': ["CSCE 221 - DATA STRUC & ALGORITHMS", ...]}
+        """
+        search = (self.request.query_params.get('search') or '').strip()
+        term = self.request.query_params.get('term') or ''
+
+        if not search or not term.isdigit():
+            return Response(status=400)
+
+        return Response({'results': rank_courses(term, search, 25)})
+
 class RetrieveGradesView(APIView):
     """ API endpoint for viewing grade counts and avg gpa of instructor for all
         their sections for that course. All terms taken into account
@@ -106,14 +339,56 @@ class RetrieveGradesView(APIView):
         """ Overrides default behavior of get_object() to work using
             instructor, subject, and course parameter in the url
         """
+        params = self.request.query_params
+        if not all(params.get(name) for name in ('instructor', 'subject', 'course_num')):
+            return Response(status=400)
+
+        return self._instructor_performance(request)
+
+    @_conditional(grades=True)
+    @single_flight
+    def _instructor_performance(self, request):
+        """ Gets the grades once the params have been validated, so invalid requests
+            aren't coalesced or looked up
+        """
         instructor = self.request.query_params.get('instructor')
         subject = self.request.query_params.get('subject').upper()
         course_num = self.request.query_params.get('course_num')
         honors = self.request.query_params.get('honors')
-        data = Grades.objects.instructor_performance(subject, course_num,
-                                                     instructor, honors)
+        data = GradeRollup.objects.instructor_performance(subject, course_num,
+                                                          instructor, honors)
         return Response(data)
 
+class RetrieveCourseConflictsView(APIView):
+    """ API endpoint for viewing which courses can never be taken alongside a course,
+        used by /api/course/conflicts
+    """
+
+    def get(self, request):
+        """ Returns the courses in the format {'results': ["MATH 151", ...]} using the
+            conflict graph saved by scrape_courses
+        """
+        dept = self.request.query_params.get('dept')
+        course_num = self.request.query_params.get('course_num')
+        term = self.request.query_params.get('term')
+
+        if not dept or not course_num or not term:
+            return Response(status=400)
+
+        course_id = generate_course_id(dept.upper(), course_num, term)
+        conflicts = (CourseConflict.objects
+                     .filter(Q(course_id=course_id) | Q(other_course_id=course_id),
+                             compatible_pairs=0)
+                     .select_related('course', 'other_course'))
+
+        courses = sorted((
+            conflict.other_course if conflict.course_id == course_id else conflict.course
+            for conflict in conflicts
+        ), key=lambda course: (course.dept, course.course_num))
+        formatted_data = {'results': [f"{course.dept} {course.course_num}"
+                                      for course in courses]}
+        return Response(formatted_data)
+
 @api_view(['GET'])
 def get_last_updated(request):
     """ Takes in a term and attempts to retrieve when that term was last updated.
@@ -0,0 +1,99 @@
+""" Session engine that caches sessions in front of the database, used for both the auth
+    session and the data sessions from retrieve_data_session.
+
+    Like Django's cached_db engine, sessions are written through: they're saved to the
+    database first and then to the cache, so the database always has every session and
+    nothing is lost if the cache is cleared.
+
+    The cache (settings.SESSION_CACHE_ALIAS) is local to the machine, so a session that's
+    changed on one instance can be out of date on others. Since a session is saved as a
+    whole, saving an out of date copy would undo the changes made elsewhere, so:
+
+    - Sessions are only cached for settings.SESSION_CACHE_TIMEOUT seconds after they were
+      last read from the database or saved, instead of until they expire. This bounds
+      how long another instance serves an out of date copy to requests that only read it.
+    - Requests that can change the session (anything but GET, HEAD and OPTIONS) read it
+      from the database, see cache_reads and user_sessions/middleware.py.
+    - A session read from the cache, i.e. by a GET request that saves something it
+      derived, is only saved if it wasn't saved elsewhere since it was cached. Otherwise
+      the save is skipped and the cached copy is dropped, so the newer session is read
+      next time. Its expire_date, which changes whenever it's saved, is used to tell.
+
+    Logging out or flushing a session deletes it from the database and this machine's
+    cache, and gives the browser a new session key, so the old session isn't requested
+    again. Other machines keep the old session cached for at most SESSION_CACHE_TIMEOUT
+    seconds, but only serve it to requests that only read it.
+"""
+
+from django.conf import settings
+from django.contrib.sessions.backends import cached_db
+
+class SessionStore(cached_db.SessionStore):
+    """ Cached, database backed sessions that are only cached for a short time, and
+        aren't saved over newer changes made elsewhere
+    """
+    # Entries are (expire_date, data) instead of cached_db's data
+    cache_key_prefix = 'user_sessions.cached_db'
+
+    def __init__(self, session_key=None):
+        super().__init__(session_key)
+        # Whether the session can be read from the cache. Set to False before it's
+        # loaded if the session may be changed
+        self.cache_reads = True
+        # The expire_date of the session in the database as of when it was cached, if it
+        # was read from the cache. None if it was read from the database
+        self._cached_stamp = None
+        # The expire_date the session was last saved with
+        self._saved_stamp = None
+
+    def _cache_session(self, stamp, data):
+        timeout = min(self.get_expiry_age(expiry=stamp), settings.SESSION_CACHE_TIMEOUT)
+        self._cache.set(self.cache_key, (stamp, data), timeout)
+
+    def load(self):
+        cached = None
+        if self.cache_reads:
+            try:
+                cached = self._cache.get(self.cache_key)
+            except Exception: # pylint: disable=broad-except
+                # Same as cached_db, since some caches raise on invalid keys
+                cached = None
+
+        if cached is not None:
+            self._cached_stamp, data = cached
+            return data
+
+        self._cached_stamp = None
+        session = self._get_session_from_db()
+        if not session:
+            return {}
+
+        data = self.decode(session.session_data)
+        self._cache_session(session.expire_date, data)
+        return data
+
+    def create_model_instance(self, data):
+        # Remember the expire_date that's saved, which is the session's new stamp
+        obj = super().create_model_instance(data)
+        self._saved_stamp = obj.expire_date
+        return obj
+
+    def save(self, must_create=False):
+        if must_create or self.session_key is None or self._cached_stamp is None:
+            # Skip cached_db's save, which caches the session until it expires
+            super(cached_db.SessionStore, self).save(must_create) # pylint: disable=bad-super-call
+        else:
+            obj = self.create_model_instance(self._get_session())
+            saved = (self.model.objects
+                     .filter(session_key=self.session_key, expire_date=self._cached_stamp)
+                     .update(session_data=obj.session_data, expire_date=obj.expire_date))
+            if not saved:
+                # Saved elsewhere (or deleted) since it was cached, so don't overwrite
+                # the newer session with this one
+                self._cache.delete(self.cache_key)
+                return
+
+        # The session is the same as the one in the database now. This also covers
+        # cycle_key, which saves the session under a new key
+        self._cached_stamp = None
+        self._cache_session(self._saved_stamp, self._session)
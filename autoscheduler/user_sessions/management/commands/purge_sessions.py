@@ -0,0 +1,189 @@
+import time
+from datetime import timedelta
+from typing import Callable, List, Tuple
+from django.conf import settings
+from django.contrib.auth.models import User # pylint: disable=imported-auth-user
+from django.contrib.sessions.models import Session
+from django.core.management import base
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+from user_sessions.models import UserTermState, UserToDataSession
+
+def _delete_in_batches(model, queryset, batch_size: int, pause: float) -> int:
+    """ Deletes the rows of model in queryset batch_size at a time, and returns how many
+        were deleted. queryset must only include rows that should be deleted, and is
+        queried again for each batch.
+
+        Each batch is deleted by primary key in its own transaction, so only the rows in
+        the batch are locked, and only for as long as it takes to delete them
+    """
+    pk_name = model._meta.pk.name # pylint: disable=protected-access
+    deleted = 0
+    while True:
+        pks = list(queryset.values_list(pk_name, flat=True)[:batch_size])
+        if not pks:
+            return deleted
+
+        model.objects.filter(pk__in=pks).delete()
+        deleted += len(pks)
+        if len(pks) < batch_size:
+            return deleted
+        time.sleep(pause)
+
+def _unused_sessions():
+    """ Sessions that aren't the data session of any user """
+    return (Session.objects
+            .annotate(is_data_session=Exists(UserToDataSession.objects
+                                             .filter(session_key=OuterRef('pk'))))
+            .filter(is_data_session=False))
+
+def purge_expired_sessions(batch_size: int, pause: float) -> int:
+    """ Deletes expired sessions, except data sessions, which retrieve_data_session keeps
+        unexpired. Returns how many were deleted
+    """
+    expired = (_unused_sessions().filter(expire_date__lt=timezone.now())
+               .order_by('expire_date'))
+    return _delete_in_batches(Session, expired, batch_size, pause)
+
+def _walk_sessions(sessions, delete: Callable[[List[Session]], List[str]],
+                   batch_size: int, pause: float) -> int:
+    """ Walks through sessions batch_size at a time, deleting the sessions whose keys
+        delete(batch) returns, and returns how many were deleted.
+
+        Walks in (expire_date, session_key) order, since sessions that are kept would
+        otherwise be returned again for every batch
+    """
+    sessions = sessions.order_by('expire_date', 'pk')
+    deleted = 0
+    last_expire_date, last_key = None, None
+    while True:
+        batch = sessions
+        if last_key is not None:
+            batch = sessions.filter(Q(expire_date__gt=last_expire_date)
+                                    | Q(expire_date=last_expire_date, pk__gt=last_key))
+        batch = list(batch[:batch_size])
+        if not batch:
+            return deleted
+
+        keys = delete(batch)
+        Session.objects.filter(pk__in=keys).delete()
+        deleted += len(keys)
+
+        last_expire_date, last_key = batch[-1].expire_date, batch[-1].pk
+        if len(batch) < batch_size:
+            return deleted
+        time.sleep(pause)
+
+def _split_by_user(batch: List[Session]) -> Tuple[List[str], List[str]]:
+    """ Gets the keys of the anonymous sessions in batch, and of the sessions logged in
+        as a user that was deleted. The rest are logged in as a user that exists.
+
+        Data sessions are copied from the session the user logged in with, so they're
+        logged in as their user too
+    """
+    user_ids = {session.pk: session.get_decoded().get('_auth_user_id')
+                for session in batch}
+    existing = {str(user_id) for user_id in User.objects.filter(
+        pk__in=[user_id for user_id in user_ids.values()
+                if user_id is not None and str(user_id).isdigit()]
+    ).values_list('pk', flat=True)}
+
+    anonymous = [key for key, user_id in user_ids.items() if user_id is None]
+    deleted_users = [key for key, user_id in user_ids.items()
+                     if user_id is not None and str(user_id) not in existing]
+    return anonymous, deleted_users
+
+def purge_inactive_sessions(days: int, batch_size: int, pause: float) -> int:
+    """ Deletes the sessions of anonymous users that haven't been saved in the last
+        given number of days, along with any state they saved. Returns how many were
+        deleted.
+
+        Sessions don't record when they were last used, but their expire_date is set to
+        SESSION_COOKIE_AGE from when they were last saved, which happens whenever they're
+        changed. Sessions of logged in users are kept, since they're only saved when
+        the user logs in, unless the user was deleted
+    """
+    cutoff = (timezone.now() - timedelta(days=days)
+              + timedelta(seconds=settings.SESSION_COOKIE_AGE))
+    sessions = _unused_sessions().filter(expire_date__lt=cutoff)
+
+    def not_logged_in(batch: List[Session]) -> List[str]:
+        anonymous, deleted_users = _split_by_user(batch)
+        return anonymous + deleted_users
+
+    return _walk_sessions(sessions, not_logged_in, batch_size, pause)
+
+def purge_orphaned_data(batch_size: int, pause: float) -> dict:
+    """ Deletes UserToDataSessions whose session was deleted, and the sessions, data
+        sessions and term states of users that were deleted. Returns how many of each
+        were deleted
+    """
+    user_exists = Exists(User.objects.filter(pk=OuterRef('user_id')))
+    deleted_users = (UserToDataSession.objects.annotate(user_exists=user_exists)
+                     .filter(user_exists=False))
+
+    # Delete the sessions first, so their UserToDataSessions are deleted in the next step
+    data_sessions = _delete_in_batches(
+        Session,
+        Session.objects.filter(pk__in=deleted_users.values('session_key')),
+        batch_size, pause)
+    # Sessions that are logged in as a deleted user, including data sessions that
+    # aren't any user's anymore. They'd otherwise be kept until they expire
+    deleted_users_sessions = _walk_sessions(
+        _unused_sessions(), lambda batch: _split_by_user(batch)[1], batch_size, pause)
+
+    missing = (UserToDataSession.objects
+               .annotate(session_exists=Exists(Session.objects
+                                               .filter(pk=OuterRef('session_key'))))
+               .filter(Q(session_exists=False) | Q(pk__in=deleted_users.values('pk')))
+               .order_by('pk'))
+    user_to_data_sessions = _delete_in_batches(UserToDataSession, missing, batch_size,
+                                               pause)
+
+    term_states = _delete_in_batches(
+        UserTermState,
+        (UserTermState.objects.annotate(user_exists=user_exists)
+         .filter(user_exists=False).order_by('pk')),
+        batch_size, pause)
+
+    return {
+        'data sessions of deleted users': data_sessions,
+        'other sessions of deleted users': deleted_users_sessions,
+        'UserToDataSessions without a session': user_to_data_sessions,
+        'term states of deleted users': term_states,
+    }
+
+class Command(base.BaseCommand):
+    """ Purges expired sessions and data that no session or user refers to anymore, so
+        django_session and the tables that refer to it don't grow without bound.
+
+        Rows are deleted a batch at a time in short transactions, pausing between
+        batches, so the sessions requests are using aren't locked for long.
+        Sessions expire 10 years after they're last saved (see SESSION_COOKIE_AGE), so
+        anonymous users' sessions are only deleted before that with --inactive-days
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', '-b', type=int, default=1000,
+                            help="The number of rows to delete at a time")
+        parser.add_argument('--pause', '-p', type=float, default=0.1,
+                            help="The number of seconds to wait between batches")
+        parser.add_argument('--inactive-days', '-i', type=int, default=None,
+                            help="Also delete anonymous users' sessions, and the "
+                                 "courses and schedules they saved, if they haven't "
+                                 "been changed in this many days")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        pause = options['pause']
+        start = time.time()
+
+        deleted = {'expired sessions': purge_expired_sessions(batch_size, pause)}
+        if options['inactive_days'] is not None:
+            deleted['inactive anonymous sessions'] = purge_inactive_sessions(
+                options['inactive_days'], batch_size, pause)
+        deleted.update(purge_orphaned_data(batch_size, pause))
+
+        for name, count in deleted.items():
+            print(f'Deleted {count} {name}')
+        print(f'Finished in {(time.time() - start):.2f} seconds')
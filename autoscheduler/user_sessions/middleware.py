@@ -0,0 +1,14 @@
+from django.contrib.sessions import middleware
+
+# Methods of requests that don't change the session
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+class SessionMiddleware(middleware.SessionMiddleware):
+    """ Django's SessionMiddleware, except requests that can change the session read it
+        from the database instead of the cache, so they never save changes on top of an
+        out of date copy. See user_sessions/cached_db.py
+    """
+    def process_request(self, request):
+        super().process_request(request)
+        if request.method not in SAFE_METHODS:
+            request.session.cache_reads = False
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.28 on 2026-10-19 00:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_sessions', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='usertodatasession',
+            name='user_id',
+            field=models.IntegerField(db_index=True),
+        ),
+    ]
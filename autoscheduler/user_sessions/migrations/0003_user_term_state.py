@@ -0,0 +1,28 @@
+# Generated by Django 2.2.28 on 2026-10-19 00:26
+
+import django.contrib.postgres.fields.jsonb
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_sessions', '0002_user_id_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserTermState',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('user_id', models.IntegerField()),
+                ('term', models.CharField(max_length=6)),
+                ('kind', models.CharField(max_length=32)),
+                ('value', django.contrib.postgres.fields.jsonb.JSONField(null=True)),
+            ],
+            options={
+                'db_table': 'user_term_states',
+                'unique_together': {('user_id', 'term', 'kind')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.28 on 2026-10-19 00:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_sessions', '0003_user_term_state'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usertermstate',
+            name='version',
+            field=models.IntegerField(default=0),
+        ),
+    ]
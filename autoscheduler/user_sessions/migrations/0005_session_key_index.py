@@ -0,0 +1,18 @@
+# Generated by Django 2.2.28 on 2026-10-19 00:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_sessions', '0004_user_term_state_version'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='usertodatasession',
+            name='session_key',
+            field=models.CharField(db_index=True, max_length=40),
+        ),
+    ]
@@ -1,3 +1,4 @@
 from .user_to_data_session import UserToDataSession
+from .user_term_state import UserTermState
 
-__all__ = ["UserToDataSession"]
+__all__ = ["UserToDataSession", "UserTermState"]
@@ -0,0 +1,19 @@
+from django.contrib.postgres.fields import JSONField
+from django.db import models
+
+class UserTermState(models.Model):
+    """ One kind of state a logged in user saved for a term, such as their courses or
+        schedules. Each kind is its own row, so it can be saved without rewriting the
+        rest of the user's state. See user_sessions/utils/term_state.py
+    """
+    user_id = models.IntegerField()
+    term = models.CharField(max_length=6)
+    kind = models.CharField(max_length=32) # i.e. courses
+    value = JSONField(null=True)
+    # Incremented whenever value is saved, so patches made against an old value can be
+    # rejected
+    version = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = "user_term_states"
+        unique_together = ('user_id', 'term', 'kind')
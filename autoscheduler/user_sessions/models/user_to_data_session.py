@@ -2,8 +2,8 @@ from django.db import models
 
 class UserToDataSession(models.Model):
     """ Stores the id of a user and the session that holds their data """
-    user_id = models.IntegerField()
-    session_key = models.CharField(max_length=40)
+    user_id = models.IntegerField(db_index=True)
+    session_key = models.CharField(max_length=40, db_index=True)
 
     class Meta:
         db_table = "user_to_data_session"
@@ -0,0 +1,51 @@
+from datetime import datetime, timezone
+from rest_framework.test import APITestCase
+from django.contrib.sessions.models import Session
+from scraper.models import Term
+
+class BootstrapAPITests(APITestCase):
+    """ Tests /sessions/bootstrap """
+    def setUp(self):
+        """ Delete sessions table and create the terms before each test """
+        Session.objects.all().delete()
+        self.last_updated = datetime(2020, 8, 1, tzinfo=timezone.utc)
+        Term.objects.bulk_create([
+            Term(code='202031', last_updated=self.last_updated),
+            Term(code='202111', last_updated=self.last_updated),
+        ])
+
+    def test_bootstrap_without_last_term_only_returns_terms(self):
+        """ Tests that /sessions/bootstrap only returns the terms if the user hasn't
+            selected a term
+        """
+        # Act
+        response = self.client.get('/sessions/bootstrap')
+
+        # Assert
+        self.assertEqual(response.json(), {
+            'terms': {'Spring 2021 - College Station': '202111',
+                      'Fall 2020 - College Station': '202031'},
+        })
+
+    def test_bootstrap_returns_state_of_last_term(self):
+        """ Tests that /sessions/bootstrap returns the same state for the last term as
+            the endpoints it replaces
+        """
+        # Arrange
+        self.client.put('/sessions/set_last_term?term=202031')
+        self.client.put('/sessions/save_courses', {
+            'term': '202031', 'courses': [{'course': 'CSCE 121'}],
+        }, format='json')
+        expected_schedules = self.client.get(
+            '/sessions/get_saved_schedules?term=202031').json()
+        expected_updated = self.client.get('/api/get_last_updated?term=202031').json()
+
+        # Act
+        response = self.client.get('/sessions/bootstrap').json()
+
+        # Assert
+        self.assertEqual(response['term'], '202031')
+        self.assertEqual(response['lastUpdated'], expected_updated)
+        self.assertEqual(response['courses'], [{'course': 'CSCE 121'}])
+        self.assertEqual(response['availabilities'], [])
+        self.assertEqual(response['schedules'], expected_schedules)
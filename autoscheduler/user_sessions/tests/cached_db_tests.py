@@ -0,0 +1,123 @@
+import json
+import django.test
+from django.contrib.sessions.backends import db
+from django.contrib.sessions.models import Session
+from django.core.cache import caches
+from user_sessions.cached_db import SessionStore
+
+class CachedDBSessionTests(django.test.TestCase):
+    """ Tests the cached session engine in user_sessions/cached_db.py """
+    def setUp(self):
+        caches['sessions'].clear()
+
+    def test_save_writes_through_to_database(self):
+        """ Tests that saving a session saves it to the database as well as the cache """
+        # Arrange
+        session = SessionStore()
+        session['term'] = '202031'
+
+        # Act
+        session.save()
+
+        # Assert
+        saved = Session.objects.get(pk=session.session_key)
+        self.assertEqual(saved.get_decoded(), {'term': '202031'})
+
+    def test_cached_session_is_loaded_without_queries(self):
+        """ Tests that a session that was just saved is loaded from the cache """
+        # Arrange
+        session = SessionStore()
+        session['term'] = '202031'
+        session.save()
+
+        # Act
+        with self.assertNumQueries(0):
+            loaded = dict(SessionStore(session_key=session.session_key))
+
+        # Assert
+        self.assertEqual(loaded, {'term': '202031'})
+
+    def test_session_is_read_from_database_once_cache_times_out(self):
+        """ Tests that sessions are only cached for SESSION_CACHE_TIMEOUT seconds, so a
+            session changed on another instance is eventually loaded from the database
+        """
+        # Arrange
+        with self.settings(SESSION_CACHE_TIMEOUT=0):
+            session = SessionStore()
+            session['term'] = '202031'
+            session.save()
+        # Change the session like another instance would
+        other = Session.objects.get(pk=session.session_key)
+        other.session_data = session.encode({'term': '202111'})
+        other.save()
+
+        # Act
+        loaded = dict(SessionStore(session_key=session.session_key))
+
+        # Assert
+        self.assertEqual(loaded, {'term': '202111'})
+
+    def test_cached_session_isnt_saved_over_newer_changes(self):
+        """ Tests that a session read from the cache isn't saved if it was saved
+            elsewhere since it was cached, since that would undo those changes
+        """
+        # Arrange
+        session = SessionStore()
+        session['courses'] = ['CSCE 121']
+        session.save()
+        cached = SessionStore(session_key=session.session_key)
+        cached.load()
+        # Save it like another instance would, without changing this one's cache
+        other = db.SessionStore(session_key=session.session_key)
+        other['courses'] = ['CSCE 121', 'MATH 151']
+        other.save()
+
+        # Act
+        cached['term'] = '202031'
+        cached.save()
+
+        # Assert
+        saved = Session.objects.get(pk=session.session_key).get_decoded()
+        self.assertEqual(saved, {'courses': ['CSCE 121', 'MATH 151']})
+        self.assertEqual(dict(SessionStore(session_key=session.session_key)), saved)
+
+    def test_cached_session_is_saved_if_unchanged(self):
+        """ Tests that a session read from the cache is saved if it wasn't saved
+            elsewhere since it was cached
+        """
+        # Arrange
+        session = SessionStore()
+        session['courses'] = ['CSCE 121']
+        session.save()
+        cached = SessionStore(session_key=session.session_key)
+
+        # Act
+        cached['term'] = '202031'
+        cached.save()
+
+        # Assert
+        saved = Session.objects.get(pk=session.session_key).get_decoded()
+        self.assertEqual(saved, {'courses': ['CSCE 121'], 'term': '202031'})
+
+    def test_requests_that_change_the_session_read_it_from_the_database(self):
+        """ Tests that requests other than GET, HEAD and OPTIONS don't use an out of date
+            cached session, so they don't save their changes over newer ones
+        """
+        # Arrange
+        self.client.put('/sessions/set_last_term?term=202031')
+        session_key = self.client.session.session_key
+        self.client.get('/sessions/get_last_term')
+        # Change the session like another instance would
+        row = Session.objects.get(pk=session_key)
+        row.session_data = SessionStore().encode({'term': '202111', 'other': 1})
+        row.save()
+
+        # Act
+        request = {'term': '202111', 'courses': [{'course': 'CSCE 121'}]}
+        self.client.put('/sessions/save_courses', json.dumps(request),
+                        content_type='application/json')
+
+        # Assert
+        saved = Session.objects.get(pk=session_key).get_decoded()
+        self.assertEqual(saved['202111']['courses'], [{'course': 'CSCE 121'}])
+        self.assertEqual(saved['other'], 1)
@@ -0,0 +1,108 @@
+from datetime import timedelta
+import django.test
+from django.conf import settings
+from django.contrib.auth.models import User # pylint: disable=imported-auth-user
+from django.contrib.sessions.backends.db import SessionStore
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.utils import timezone
+from user_sessions.models import UserTermState, UserToDataSession
+
+def _create_session(key: str, expire_date, data: dict = None) -> Session:
+    """ Creates a session with the given key, expire_date and data """
+    return Session.objects.create(session_key=key, expire_date=expire_date,
+                                  session_data=SessionStore().encode(data or {}))
+
+def _remaining_sessions() -> set:
+    return set(Session.objects.values_list('session_key', flat=True))
+
+class PurgeSessionsTests(django.test.TestCase):
+    """ Tests the purge_sessions command """
+    def setUp(self):
+        self.now = timezone.now()
+        self.user = User.objects.create_user(username="user")
+
+    def test_purge_sessions_deletes_expired_sessions_except_data_sessions(self):
+        """ Tests that expired sessions are deleted in batches, but expired data sessions
+            and unexpired sessions are kept
+        """
+        # Arrange
+        for i in range(5):
+            _create_session(f'expired{i}', self.now - timedelta(days=i + 1))
+        _create_session('data', self.now - timedelta(days=1))
+        _create_session('current', self.now + timedelta(days=1))
+        UserToDataSession.objects.create(user_id=self.user.id, session_key='data')
+
+        # Act
+        call_command('purge_sessions', batch_size=2, pause=0)
+
+        # Assert
+        self.assertEqual(_remaining_sessions(), {'data', 'current'})
+
+    def test_purge_sessions_inactive_days_only_deletes_anonymous_sessions(self):
+        """ Tests that --inactive-days deletes anonymous sessions that haven't been saved
+            recently, but keeps logged in users' sessions and recent sessions
+        """
+        # Arrange
+        age = timedelta(seconds=settings.SESSION_COOKIE_AGE)
+        old = self.now + age - timedelta(days=60)
+        for i in range(3):
+            _create_session(f'logged_in{i}', old, {'_auth_user_id': str(self.user.id)})
+            _create_session(f'anonymous{i}', old + timedelta(seconds=i))
+        _create_session('recent', self.now + age)
+
+        # Act
+        call_command('purge_sessions', batch_size=2, pause=0, inactive_days=30)
+
+        # Assert
+        self.assertEqual(_remaining_sessions(),
+                         {'logged_in0', 'logged_in1', 'logged_in2', 'recent'})
+
+    def test_purge_sessions_deletes_orphaned_data(self):
+        """ Tests that UserToDataSessions without a session, and the data sessions and
+            term states of deleted users, are deleted
+        """
+        # Arrange
+        deleted_user = User.objects.create_user(username="deleted")
+        future = self.now + timedelta(days=1)
+        _create_session('kept', future)
+        _create_session('deleted_user', future)
+        UserToDataSession.objects.bulk_create([
+            UserToDataSession(user_id=self.user.id, session_key='kept'),
+            UserToDataSession(user_id=self.user.id, session_key='missing'),
+            UserToDataSession(user_id=deleted_user.id, session_key='deleted_user'),
+        ])
+        UserTermState.objects.bulk_create([
+            UserTermState(user_id=user.id, term='202031', kind='courses', value=[])
+            for user in (self.user, deleted_user)
+        ])
+        deleted_user.delete()
+
+        # Act
+        call_command('purge_sessions', pause=0)
+
+        # Assert
+        self.assertEqual(_remaining_sessions(), {'kept'})
+        self.assertEqual(list(UserToDataSession.objects.values_list('session_key',
+                                                                    flat=True)),
+                         ['kept'])
+        self.assertEqual(list(UserTermState.objects.values_list('user_id', flat=True)),
+                         [self.user.id])
+
+    def test_purge_sessions_deletes_sessions_of_deleted_users(self):
+        """ Tests that sessions logged in as a deleted user, such as data sessions that
+            were replaced, are deleted even though they haven't expired
+        """
+        # Arrange
+        deleted_user = User.objects.create_user(username="deleted")
+        future = self.now + timedelta(days=1)
+        _create_session('orphaned', future, {'_auth_user_id': str(deleted_user.id)})
+        _create_session('logged_in', future, {'_auth_user_id': str(self.user.id)})
+        _create_session('anonymous', future)
+        deleted_user.delete()
+
+        # Act
+        call_command('purge_sessions', batch_size=1, pause=0)
+
+        # Assert
+        self.assertEqual(_remaining_sessions(), {'logged_in', 'anonymous'})
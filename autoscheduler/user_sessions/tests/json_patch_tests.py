@@ -0,0 +1,63 @@
+import unittest
+from user_sessions.utils.json_patch import PatchError, apply_patch
+
+class JSONPatchTests(unittest.TestCase):
+    """ Tests user_sessions/utils/json_patch.py """
+    def test_apply_patch_applies_each_operation(self):
+        """ Tests that every kind of operation is applied in order """
+        # Arrange
+        document = {'courses': [{'course': 'CSCE 121'}, {'course': 'MATH 151'}],
+                    'a/b': 1}
+        patch = [
+            {'op': 'replace', 'path': '/courses/0/course', 'value': 'CSCE 221'},
+            {'op': 'add', 'path': '/courses/-', 'value': {'course': 'ENGR 102'}},
+            {'op': 'remove', 'path': '/courses/1'},
+            {'op': 'copy', 'from': '/courses/0', 'path': '/first'},
+            {'op': 'move', 'from': '/a~1b', 'path': '/count'},
+            {'op': 'test', 'path': '/count', 'value': 1},
+        ]
+        expected = {
+            'courses': [{'course': 'CSCE 221'}, {'course': 'ENGR 102'}],
+            'first': {'course': 'CSCE 221'},
+            'count': 1,
+        }
+
+        # Act
+        result = apply_patch(document, patch)
+
+        # Assert
+        self.assertEqual(result, expected)
+
+    def test_apply_patch_copies_are_separate(self):
+        """ Tests that a copied value can be changed without changing the original """
+        # Arrange
+        patch = [
+            {'op': 'copy', 'from': '/0', 'path': '/1'},
+            {'op': 'replace', 'path': '/1/checked', 'value': False},
+        ]
+
+        # Act
+        result = apply_patch([{'checked': True}], patch)
+
+        # Assert
+        self.assertEqual(result, [{'checked': True}, {'checked': False}])
+
+    def test_apply_patch_raises_for_invalid_patches(self):
+        """ Tests that PatchError is raised for operations that can't be applied """
+        # Arrange
+        patches = [
+            [{'op': 'remove', 'path': '/3'}],
+            [{'op': 'add', 'path': '/01', 'value': 1}],
+            [{'op': 'replace', 'path': '/missing/key', 'value': 1}],
+            [{'op': 'test', 'path': '/0', 'value': 2}],
+            [{'op': 'move', 'from': '/0', 'path': '/0/a'}],
+            [{'op': 'add', 'path': '/0'}],
+            [{'op': 'unknown', 'path': '/0'}],
+            {'op': 'remove', 'path': '/0'},
+        ]
+
+        for patch in patches:
+            with self.subTest(patch=patch):
+                # Act + Assert
+                with self.assertRaises(PatchError):
+                    apply_patch([1], patch)
@@ -0,0 +1,141 @@
+from rest_framework.test import APIRequestFactory, APITestCase
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.auth.models import User # pylint: disable=imported-auth-user
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from user_sessions.cached_db import SessionStore
+from user_sessions.models import UserTermState
+from user_sessions.utils.term_state import VersionConflict, patch_term_state
+
+class PatchAPITests(APITestCase):
+    """ Tests patching saved state with PATCH requests to the save_* endpoints """
+    def setUp(self):
+        """ Delete sessions table before each test to create a new session """
+        Session.objects.all().delete()
+        cache.clear()
+
+    def _save_and_patch_courses(self):
+        """ Saves two courses, then unchecks the first one with a patch """
+        response = self.client.put('/sessions/save_courses', {
+            'term': '202031',
+            'courses': [{'course': 'CSCE 121', 'checked': True},
+                        {'course': 'MATH 151', 'checked': True}],
+        }, format='json')
+        version = response.json()['version']
+
+        return self.client.patch('/sessions/save_courses', {
+            'term': '202031', 'version': version,
+            'patch': [{'op': 'replace', 'path': '/0/checked', 'value': False}],
+        }, format='json')
+
+    def test_patch_courses_anonymous(self):
+        """ Tests that an anonymous user's courses can be patched """
+        # Act
+        response = self._save_and_patch_courses()
+
+        # Assert
+        self.assertEqual(response.json(), {'version': 2})
+        courses = self.client.get('/sessions/get_saved_courses?term=202031').json()
+        self.assertEqual(courses, [{'course': 'CSCE 121', 'checked': False},
+                                   {'course': 'MATH 151', 'checked': True}])
+
+    def test_patch_courses_logged_in(self):
+        """ Tests that a logged in user's courses are patched in UserTermState """
+        # Arrange
+        user = User.objects.create_user(username="user")
+        self.client.force_login(user)
+
+        # Act
+        response = self._save_and_patch_courses()
+
+        # Assert
+        self.assertEqual(response.json(), {'version': 2})
+        state = UserTermState.objects.get(user_id=user.id, term='202031', kind='courses')
+        self.assertEqual(state.value[0], {'course': 'CSCE 121', 'checked': False})
+        self.assertEqual(state.version, 2)
+
+    def test_failed_patch_of_unsaved_state_saves_nothing(self):
+        """ Tests that a patch to state a logged in user never saved doesn't create it
+            if the patch can't be applied
+        """
+        # Arrange
+        user = User.objects.create_user(username="user")
+        self.client.force_login(user)
+
+        # Act
+        response = self.client.patch('/sessions/save_courses', {
+            'term': '202031', 'version': 0,
+            'patch': [{'op': 'remove', 'path': '/0'}],
+        }, format='json')
+
+        # Assert
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(UserTermState.objects.filter(user_id=user.id).exists())
+
+    def test_patch_against_old_version_conflicts(self):
+        """ Tests that a patch made against an old version is rejected with 409 and the
+            current state, and isn't applied
+        """
+        # Arrange
+        self._save_and_patch_courses()
+
+        # Act
+        response = self.client.patch('/sessions/save_courses', {
+            'term': '202031', 'version': 1,
+            'patch': [{'op': 'remove', 'path': '/0'}],
+        }, format='json')
+
+        # Assert
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['version'], 2)
+        self.assertEqual(len(response.json()['courses']), 2)
+
+    def test_anonymous_patch_against_version_saved_meanwhile_conflicts(self):
+        """ Tests that an anonymous user's patch is checked against the saved session,
+            so a request that loaded the session before another one patched it can't
+            patch the same version again
+        """
+        # Arrange
+        self._save_and_patch_courses()
+        session_key = self.client.session.session_key
+
+        # A request that loaded the session when the courses were version 2
+        request = APIRequestFactory().patch('/sessions/save_courses')
+        request.user = AnonymousUser()
+        request.session = SessionStore(session_key=session_key)
+        request.session.cache_reads = False
+        request.session.keys()
+
+        self.client.patch('/sessions/save_courses', {
+            'term': '202031', 'version': 2,
+            'patch': [{'op': 'remove', 'path': '/0'}],
+        }, format='json')
+
+        # Act + Assert
+        with self.assertRaises(VersionConflict) as conflict:
+            patch_term_state(request, '202031', 'courses', 2,
+                             [{'op': 'remove', 'path': '/0'}])
+        self.assertEqual(conflict.exception.version, 3)
+        courses = self.client.get('/sessions/get_saved_courses?term=202031').json()
+        self.assertEqual(courses, [{'course': 'MATH 151', 'checked': True}])
+
+    def test_patch_schedules_saves_selected_schedule(self):
+        """ Tests that patching schedules also saves selectedSchedule if it's given """
+        # Arrange
+        self.client.put('/sessions/save_schedules', {
+            'term': '202031', 'schedules': [], 'selectedSchedule': None,
+        }, format='json')
+
+        # Act
+        response = self.client.patch('/sessions/save_schedules', {
+            'term': '202031', 'version': 1, 'selectedSchedule': 0,
+            'patch': [{'op': 'add', 'path': '/-',
+                       'value': {'name': 'Schedule 1', 'sections': [], 'locked': True}}],
+        }, format='json')
+
+        # Assert
+        self.assertEqual(response.json(), {'version': 2})
+        saved = self.client.session['202031']
+        self.assertEqual(saved['selected_schedule'], 0)
+        self.assertEqual([schedule['name'] for schedule in saved['schedules']],
+                         ['Schedule 1'])
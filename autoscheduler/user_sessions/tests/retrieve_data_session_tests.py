@@ -2,6 +2,7 @@ import django.test
 
 from django.contrib.sessions.models import Session
 from django.contrib.sessions.backends.db import SessionStore
+from django.core.cache import cache, caches
 from django.contrib.auth.models import User, AnonymousUser # pylint: disable=imported-auth-user
 from user_sessions.models.user_to_data_session import UserToDataSession
 from user_sessions.utils.retrieve_data_session import retrieve_data_session
@@ -19,8 +20,20 @@ class RetrieveDataSessionTests(django.test.TestCase):
         User.objects.all().delete()
         Session.objects.all().delete()
         UserToDataSession.objects.all().delete()
+        cache.clear()
+        caches['sessions'].clear()
         self.factory = django.test.RequestFactory()
 
+    def _create_existing_user_request(self):
+        """ Creates a request from a user who already has a data session """
+        request = self.factory.get("SOME URL")
+        request.user = User.objects.create_user(username="existing_user")
+        data_session = SessionStore()
+        data_session.create()
+        UserToDataSession(user_id=request.user.id,
+                          session_key=data_session.session_key).save()
+        return request, data_session.session_key
+
     def test_creates_entry_in_user_to_data_session_table_for_new_logged_in_user(self):
         """ Checks that retrieve_data_session creates an entry in user_to_data_session
             table for the user if the user does not already have one
@@ -169,3 +182,47 @@ class RetrieveDataSessionTests(django.test.TestCase):
         # Assert
         self.assertNotEqual(original_key, actual_key)
         self.assertIsNotNone(Session.objects.get(pk=actual_key))
+
+    def test_modified_data_session_is_saved(self):
+        """ Checks that changes to the data session are saved """
+        # Arrange
+        request, session_key = self._create_existing_user_request()
+
+        # Act
+        with retrieve_data_session(request) as data_session:
+            data_session['term'] = '202031'
+
+        # Assert
+        self.assertEqual(Session.objects.get(pk=session_key).get_decoded(),
+                         {'term': '202031'})
+
+    def test_read_only_data_session_is_not_saved(self):
+        """ Checks that retrieve_data_session never saves a read_only data session """
+        # Arrange
+        request, session_key = self._create_existing_user_request()
+
+        # Act
+        with retrieve_data_session(request, read_only=True) as data_session:
+            data_session['term'] = '202031'
+
+        # Assert
+        self.assertEqual(Session.objects.get(pk=session_key).get_decoded(), {})
+
+    def test_unmodified_data_session_is_loaded_without_queries(self):
+        """ Checks that once the user's data session key and the session are cached,
+            retrieving it doesn't query the database, and doesn't save it
+        """
+        # Arrange
+        request, session_key = self._create_existing_user_request()
+        with retrieve_data_session(request):
+            pass
+        request = self.factory.get("SOME URL")
+        request.user = User.objects.get(username="existing_user")
+
+        # Act
+        with self.assertNumQueries(0):
+            with retrieve_data_session(request) as data_session:
+                actual_key = data_session.session_key
+
+        # Assert
+        self.assertEqual(actual_key, session_key)
@@ -1,7 +1,10 @@
 from datetime import time
 from rest_framework.test import APITestCase
 from django.contrib.sessions.models import Session
-from scraper.models import Section, Meeting, Instructor
+from django.utils import timezone
+from scraper.management.commands.utils.section_payloads import save_section_payloads
+from scraper.models import Section, Meeting, Instructor, Term
+from user_sessions.utils.schedule_snapshot import SNAPSHOT_KEY
 
 def create_models(term: str):
     """ Creates the models for saved schedules tests """
@@ -159,3 +162,128 @@ class SchedulesAPITests(APITestCase):
         # Assert
         self.assertEqual(response.json(), expected)
         self.assertEqual(response.status_code, 200)
+
+    def test_get_saved_schedules_normalized_gives_section_ids(self):
+        """ Tests that /sessions/get_saved_schedules?normalized=true gives the ids of each
+            schedule's sections, and each section once
+        """
+        # Arrange
+        term = '202031'
+        create_models(term)
+
+        session = self.client.session
+        session_input = [{'name': 'Schedule 1', 'sections': [1], 'locked': False},
+                         {'name': 'Schedule 2', 'sections': [1], 'locked': True}]
+        session[term] = {'schedules': session_input, 'selected_schedule': 0}
+        session.save()
+
+        expected_schedules = [
+            {'name': 'Schedule 1', 'sections': [1], 'locked': False},
+            {'name': 'Schedule 2', 'sections': [1], 'locked': True},
+        ]
+
+        # Act
+        response = self.client.get(
+            f'/sessions/get_saved_schedules?term={term}&normalized=true')
+
+        # Assert
+        self.assertEqual(response.json()['schedules'], expected_schedules)
+        self.assertEqual(list(response.json()['sections']), ['1'])
+
+    def test_save_schedules_saves_snapshot_of_section_courses(self):
+        """ Tests that /sessions/save_schedules saves which course each section is in
+            along with the schedules, instead of copies of the sections
+        """
+        # Arrange
+        term = '202031'
+        create_models(term)
+        Term.objects.create(code=term, last_updated=timezone.now())
+
+        # Act
+        self.client.put('/sessions/save_schedules', {
+            'term': term, 'schedules': [{'name': 'Schedule 1', 'sections': [1]}],
+        }, format='json')
+
+        # Assert
+        snapshot = self.client.session[term][SNAPSHOT_KEY]
+        self.assertEqual(snapshot['courses'], {'1': ['CSCE', '121']})
+
+    def test_get_saved_schedules_does_not_save_snapshot(self):
+        """ Tests that /sessions/get_saved_schedules doesn't change the session """
+        # Arrange
+        term = '202031'
+        create_models(term)
+        Term.objects.create(code=term, last_updated=timezone.now())
+
+        session = self.client.session
+        session[term] = {'schedules': [{'name': 'Schedule 1', 'sections': [1]}]}
+        session.save()
+
+        # Act
+        self.client.get(f'/sessions/get_saved_schedules?term={term}')
+
+        # Assert
+        self.assertNotIn(SNAPSHOT_KEY, self.client.session[term])
+
+    def test_get_saved_schedules_serves_sections_from_payloads(self):
+        """ Tests that /sessions/get_saved_schedules serves the sections from their
+            courses' payloads instead of serializing them
+        """
+        # Arrange
+        term = '202031'
+        create_models(term)
+        Term.objects.create(code=term, last_updated=timezone.now())
+        save_section_payloads([term])
+
+        self.client.put('/sessions/save_schedules', {
+            'term': term, 'schedules': [{'name': 'Schedule 1', 'sections': [1]}],
+        }, format='json')
+        Section.objects.filter(id=1).update(crn=12345)
+
+        # Act
+        response = self.client.get(f'/sessions/get_saved_schedules?term={term}')
+
+        # Assert
+        self.assertEqual(response.json()['schedules'][0]['sections'][0]['crn'], 0)
+
+    def test_get_saved_schedules_only_includes_requested_fields(self):
+        """ Tests that /sessions/get_saved_schedules?fields=... only includes those
+            fields of sections served from their courses' payloads
+        """
+        # Arrange
+        term = '202031'
+        create_models(term)
+        Term.objects.create(code=term, last_updated=timezone.now())
+        save_section_payloads([term])
+
+        self.client.put('/sessions/save_schedules', {
+            'term': term, 'schedules': [{'name': 'Schedule 1', 'sections': [1]}],
+        }, format='json')
+
+        # Act
+        response = self.client.get(f'/sessions/get_saved_schedules?term={term}'
+                                   '&fields=crn')
+
+        # Assert
+        self.assertEqual(response.json()['schedules'][0]['sections'],
+                         [{'id': 1, 'crn': 0}])
+
+    def test_get_saved_schedules_serializes_sections_without_payloads(self):
+        """ Tests that /sessions/get_saved_schedules serializes sections whose course
+            doesn't have a payload
+        """
+        # Arrange
+        term = '202031'
+        create_models(term)
+        Term.objects.create(code=term, last_updated=timezone.now())
+
+        self.client.put('/sessions/save_schedules', {
+            'term': term, 'schedules': [{'name': 'Schedule 1', 'sections': [1]}],
+        }, format='json')
+        Section.objects.filter(id=1).update(crn=12345)
+
+        # Act
+        response = self.client.get(f'/sessions/get_saved_schedules?term={term}')
+
+        # Assert
+        self.assertEqual(response.json()['schedules'][0]['sections'][0]['crn'], 12345)
@@ -0,0 +1,97 @@
+from unittest import mock
+from rest_framework.test import APITestCase
+from django.contrib.auth.models import User # pylint: disable=imported-auth-user
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.cache import cache
+from django.db import DatabaseError
+from user_sessions import cached_db
+from user_sessions.models import UserTermState, UserToDataSession
+
+class TermStateTests(APITestCase):
+    """ Tests that logged in users' state is stored in UserTermState """
+    def setUp(self):
+        """ Log in as a user whose state is still stored in their data session """
+        cache.clear()
+        self.user = User.objects.create_user(username="user")
+        self.client.force_login(self.user)
+
+        self.data_session = SessionStore()
+        self.data_session['term'] = '202031'
+        self.data_session['202031'] = {'courses': [{'course': 'CSCE 121'}],
+                                       'availabilities': []}
+        self.data_session.create()
+        UserToDataSession(user_id=self.user.id,
+                          session_key=self.data_session.session_key).save()
+
+    def test_state_is_moved_out_of_data_session(self):
+        """ Tests that the state in the user's data session is moved to UserTermState the
+            first time it's accessed, and is still returned
+        """
+        # Act
+        response = self.client.get('/sessions/get_saved_courses?term=202031')
+
+        # Assert
+        self.assertEqual(response.json(), [{'course': 'CSCE 121'}])
+        self.assertEqual(
+            set(UserTermState.objects.filter(user_id=self.user.id)
+                .values_list('term', 'kind')),
+            {('202031', 'courses'), ('202031', 'availabilities')})
+        data_session = SessionStore(session_key=self.data_session.session_key)
+        self.assertEqual(dict(data_session), {'term': '202031'})
+
+    def test_save_courses_only_saves_courses(self):
+        """ Tests that /sessions/save_courses only changes the courses, and leaves the
+            rest of the user's state as it was
+        """
+        # Arrange
+        request = {'courses': [{'course': 'MATH 151'}], 'term': '202031'}
+
+        # Act
+        self.client.put('/sessions/save_courses', request, format='json')
+
+        # Assert
+        states = dict(UserTermState.objects.filter(user_id=self.user.id, term='202031')
+                      .values_list('kind', 'value'))
+        self.assertEqual(states, {'courses': [{'course': 'MATH 151'}],
+                                  'availabilities': []})
+
+    def test_new_data_session_is_migrated(self):
+        """ Tests that the state in a user's data session is moved to UserTermState if
+            their data session is replaced after their old one was migrated
+        """
+        # Arrange
+        self.client.get('/sessions/get_saved_courses?term=202031')
+        new_session = SessionStore()
+        new_session['202111'] = {'courses': [{'course': 'MATH 151'}]}
+        new_session.create()
+        UserToDataSession.objects.filter(user_id=self.user.id).update(
+            session_key=new_session.session_key)
+        # Forget the old data session's key, like a request on another process would
+        cache.delete(f'data-session:{self.user.id}')
+
+        # Act
+        response = self.client.get('/sessions/get_saved_courses?term=202111')
+
+        # Assert
+        self.assertEqual(response.json(), [{'course': 'MATH 151'}])
+
+    def test_failed_migration_is_rolled_back(self):
+        """ Tests that the rows are rolled back if the data session can't be saved
+            without the migrated state, so the state isn't migrated twice
+        """
+        # Arrange
+        with mock.patch.object(cached_db.SessionStore, 'save',
+                               side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                self.client.get('/sessions/get_saved_courses?term=202031')
+        rows_after_failure = UserTermState.objects.filter(user_id=self.user.id).count()
+
+        # Act
+        response = self.client.get('/sessions/get_saved_courses?term=202031')
+
+        # Assert
+        self.assertEqual(rows_after_failure, 0)
+        self.assertEqual(response.json(), [{'course': 'CSCE 121'}])
+        self.assertEqual(UserTermState.objects.filter(user_id=self.user.id).count(), 2)
+        data_session = SessionStore(session_key=self.data_session.session_key)
+        self.assertEqual(dict(data_session), {'term': '202031'})
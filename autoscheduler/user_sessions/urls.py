@@ -2,7 +2,7 @@ from django.urls import path
 from user_sessions.views import(
     get_last_term, set_last_term, save_courses, get_saved_courses, get_full_name,
     get_saved_availabilities, save_availabilities, get_saved_schedules, save_schedules,
-    logout,
+    logout, bootstrap,
 )
 
 urlpatterns = [
@@ -17,4 +17,5 @@ urlpatterns = [
     path('get_saved_schedules', get_saved_schedules),
     path('save_schedules', save_schedules),
     path('logout', logout),
+    path('bootstrap', bootstrap),
 ]
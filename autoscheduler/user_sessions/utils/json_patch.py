@@ -0,0 +1,134 @@
+""" Applies JSON Patches (RFC 6902) to saved state, so the frontend can send only what
+    changed instead of the whole state.
+
+    A patch is a list of operations like {"op": "replace", "path": "/0/checked",
+    "value": true}, where path is a JSON Pointer (RFC 6901). Every operation in the RFC
+    is supported: add, remove, replace, move, copy and test.
+"""
+
+from copy import deepcopy
+from typing import Any, List, Tuple
+
+class PatchError(ValueError):
+    """ Raised when a patch is malformed or can't be applied to the document """
+
+def _parse_pointer(pointer: Any) -> List[str]:
+    """ Splits a JSON Pointer into its unescaped reference tokens """
+    if not isinstance(pointer, str) or (pointer and not pointer.startswith('/')):
+        raise PatchError(f'Invalid path: {pointer}')
+
+    return [token.replace('~1', '/').replace('~0', '~')
+            for token in pointer.split('/')[1:]]
+
+def _array_index(array: list, token: str, inclusive: bool = False) -> int:
+    """ Gets the index in array referred to by token. If inclusive, the index can be
+        len(array), which "-" refers to
+    """
+    if token == '-' and inclusive:
+        return len(array)
+
+    # Leading zeros aren't allowed
+    if not token.isdigit() or (token != '0' and token.startswith('0')):
+        raise PatchError(f'Invalid array index: {token}')
+
+    index = int(token)
+    if index > len(array) or (index == len(array) and not inclusive):
+        raise PatchError(f'Array index out of range: {token}')
+
+    return index
+
+def _resolve(document: Any, tokens: List[str]) -> Any:
+    """ Gets the value tokens refer to in document """
+    for token in tokens:
+        if isinstance(document, list):
+            document = document[_array_index(document, token)]
+        elif isinstance(document, dict) and token in document:
+            document = document[token]
+        else:
+            raise PatchError(f'Path not found: /{"/".join(tokens)}')
+
+    return document
+
+def _parent(document: Any, path: Any) -> Tuple[Any, str]:
+    """ Gets the container of the value path refers to, and the last token of path """
+    tokens = _parse_pointer(path)
+    if not tokens:
+        raise PatchError('The whole document can only be replaced')
+
+    parent = _resolve(document, tokens[:-1])
+    if not isinstance(parent, (dict, list)):
+        raise PatchError(f'Path not found: {path}')
+
+    return parent, tokens[-1]
+
+def _add(document: Any, path: Any, value: Any) -> Any:
+    if path == '':
+        return value
+
+    parent, token = _parent(document, path)
+    if isinstance(parent, list):
+        parent.insert(_array_index(parent, token, inclusive=True), value)
+    else:
+        parent[token] = value
+
+    return document
+
+def _remove(document: Any, path: Any) -> Tuple[Any, Any]:
+    """ Removes the value at path, returning the document and the removed value """
+    parent, token = _parent(document, path)
+    if isinstance(parent, list):
+        return document, parent.pop(_array_index(parent, token))
+    if token not in parent:
+        raise PatchError(f'Path not found: {path}')
+
+    return document, parent.pop(token)
+
+def _get_value(operation: dict) -> Any:
+    if 'value' not in operation:
+        raise PatchError(f'{operation["op"]} requires a value')
+    return operation['value']
+
+def _apply_operation(document: Any, operation: Any) -> Any:
+    """ Applies one operation of a patch, returning the new document """
+    if not isinstance(operation, dict) or 'op' not in operation:
+        raise PatchError(f'Invalid operation: {operation}')
+
+    op, path = operation['op'], operation.get('path')
+    if op == 'add':
+        return _add(document, path, _get_value(operation))
+    if op == 'remove':
+        return _remove(document, path)[0]
+    if op == 'replace':
+        if path == '':
+            return _get_value(operation)
+        document, _ = _remove(document, path)
+        return _add(document, path, _get_value(operation))
+    if op in ('move', 'copy'):
+        from_path = operation.get('from')
+        if op == 'move':
+            if path != from_path and str(path).startswith(f'{from_path}/'):
+                raise PatchError('A value can\'t be moved into one of its children')
+            document, value = _remove(document, from_path)
+        else:
+            # Copy the value so the copy and the original can be patched separately
+            value = deepcopy(_resolve(document, _parse_pointer(from_path)))
+        return _add(document, path, value)
+    if op == 'test':
+        if _resolve(document, _parse_pointer(path)) != _get_value(operation):
+            raise PatchError(f'Test failed: {path}')
+        return document
+
+    raise PatchError(f'Invalid operation: {op}')
+
+def apply_patch(document: Any, patch: Any) -> Any:
+    """ Applies patch to document, returning the patched document. document is changed
+        in place, and is left partially patched if PatchError is raised, so it should
+        be a copy if it's used after a failed patch
+    """
+    if not isinstance(patch, list):
+        raise PatchError('A patch must be a list of operations')
+
+    for operation in patch:
+        document = _apply_operation(document, operation)
+
+    return document
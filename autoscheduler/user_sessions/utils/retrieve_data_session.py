@@ -1,19 +1,73 @@
 from datetime import datetime, timedelta, timezone
 from contextlib import contextmanager
-from django.contrib.sessions.backends.db import SessionStore
+from importlib import import_module
+from django.conf import settings
 from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from user_sessions.middleware import SAFE_METHODS
 from user_sessions.models import UserToDataSession
 
+# Data sessions use the same (cached) engine as request.session
+SessionStore = import_module(settings.SESSION_ENGINE).SessionStore
+
+# How long a user's data session key is cached for
+_CACHE_TIMEOUT = 60 * 60
+# Data sessions are kept unexpired for 10 years, so a cached one only has to be checked
+# again once it's close to expiring
+_EXPIRY_MARGIN = timedelta(days=1)
+
+def _cache_key(user_id: int) -> str:
+    return f'data-session:{user_id}'
+
+def _get_data_session(user_id: int, cache_reads: bool) -> SessionStore:
+    """ Gets the user's data session, using the cached session key if there is one.
+        The session is only read from the cache if cache_reads is given, see
+        user_sessions/cached_db.py.
+        Raises UserToDataSession.DoesNotExist or Session.DoesNotExist if the user
+        doesn't have one
+    """
+    now = datetime.now(tz=timezone.utc)
+    cached = cache.get(_cache_key(user_id))
+    if cached is not None and cached[1] > now + _EXPIRY_MARGIN:
+        session_key, expire_date = cached
+    else:
+        session_key = UserToDataSession.objects.get(user_id=user_id).session_key
+        session = Session.objects.get(pk=session_key)
+
+        # Keep session unexpired (SessionStore doesn't work for expired sessions)
+        if session.expire_date <= now:
+            session.expire_date = now + timedelta(weeks=520)
+            session.save()
+        expire_date = session.expire_date
+
+    data_session = SessionStore(session_key=session_key)
+    data_session.cache_reads = cache_reads
+    # Load the session now. If it was deleted since its key was cached, SessionStore
+    # clears its key
+    data_session.keys()
+    if data_session.session_key is None:
+        cache.delete(_cache_key(user_id))
+        raise Session.DoesNotExist
+
+    cache.set(_cache_key(user_id), (session_key, expire_date), _CACHE_TIMEOUT)
+    return data_session
+
 @contextmanager
-def retrieve_data_session(request):
+def retrieve_data_session(request, read_only: bool = False):
     """ Checks if the user already has a session assigned to them in which
         to store their data. If so, saves the session id of that session to
         their current session. Otherwise, creates a session for them, and a
         user_to_data_session entry that associates them with the session
         before saving that session id to their current session
+
+        The data session is only saved if it was modified, and never if read_only is
+        given. Nested values have to be reassigned for the change to be noticed, i.e.
+        data_session[term] = {...} instead of data_session[term][key] = value.
+        The data session is reused if it's retrieved again during the same request
     """
     # Get user id
     user_id = request.user.id
+    data_session = getattr(request, '_data_session', None)
     # Session stuff
     try:
         if user_id is None:
@@ -22,35 +76,32 @@ def retrieve_data_session(request):
             yield data_session
         else:
         # If user is logged in and model exists, uses the session in the model
-            session_key = UserToDataSession.objects.get(user_id=user_id).session_key
-            session = Session.objects.get(pk=session_key)
-
-            # Keep session unexpired (SessionStore doesn't work for expired sessions)
-            now = datetime.now(tz=timezone.utc)
-            if session.expire_date <= now:
-                session.expire_date = now + timedelta(weeks=520)
-                session.save()
+            if data_session is None:
+                data_session = _get_data_session(user_id,
+                                                 request.method in SAFE_METHODS)
+                request._data_session = data_session # pylint: disable=protected-access
 
-            data_session = SessionStore(session_key=session_key)
-            # Ensure a Session object exists matching the UserToDataSession
             yield data_session
     except (UserToDataSession.DoesNotExist, Session.DoesNotExist):
         # The user is logged in but a data session doesn't exist.
         # Create the model before returning the corresponding data session
-        # Create a session object
+        # Create a session object, copying the data from the session used before
+        # logging in to it. This is to prevent user progress from being lost on their
+        # first login. Both go through SessionStore so the cached sessions stay current,
+        # and the session is copied from the database so the copy isn't out of date
+        request_session = SessionStore(session_key=request.session.session_key)
+        request_session.cache_reads = False
         data_session = SessionStore()
+        data_session.update(request_session.items())
         data_session.create()
         session_key = data_session.session_key
-        # Copy data from session used before logging in to the data session.
-        # This is to prevent user progress from being lost on their first login
-        request_session_object = Session.objects.get(pk=request.session.session_key)
-        data_session_object = Session.objects.get(pk=session_key)
-        data_session_object.session_data = request_session_object.session_data
-        data_session_object.save()
         # Create a user_to_data_session entry (deleting any that might already exist)
         UserToDataSession.objects.filter(user_id=user_id).delete()
         UserToDataSession(user_id=user_id, session_key=session_key).save()
+        cache.delete(_cache_key(user_id))
         data_session = SessionStore(session_key=session_key)
+        request._data_session = data_session # pylint: disable=protected-access
         yield data_session
     finally:
-        data_session.save()
+        if data_session is not None and data_session.modified and not read_only:
+            data_session.save()
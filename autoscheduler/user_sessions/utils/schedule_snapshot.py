@@ -0,0 +1,116 @@
+""" Snapshots of which course each section of a user's saved schedules is in, so loading
+    them can serve the sections from their courses' SectionPayloads instead of
+    serializing every section again on every page load.
+
+    The snapshot is built when the schedules are saved, and saved in the term's state
+    along with the version of the term's data (when the term and the grades were last
+    scraped) it was built from. Loading the schedules never saves anything: sections
+    that aren't in the snapshot, or every section if it isn't current anymore, have
+    their course looked up instead, and sections whose course doesn't have a payload are
+    serialized.
+"""
+
+import json
+from typing import AbstractSet, Dict, Iterable, List, Optional, Set, Tuple
+from django.db.models import Subquery
+from scheduler.views import assemble_schedules
+from scraper.models import GradesUpdate, Section, SectionPayload, Term
+from scraper.serializers import only_fields, serialize_sections
+
+# The key of the snapshot in the term's state
+SNAPSHOT_KEY = 'schedules_snapshot'
+
+def data_version(term: str) -> Optional[str]:
+    """ Gets the version of the term's data, which changes whenever its sections or
+        the grades are scraped again. Returns None if the term doesn't exist
+    """
+    if not term.isdigit():
+        return None
+
+    grades_updated = GradesUpdate.objects.values('last_updated')[:1]
+    stamps = (Term.objects.filter(code=term)
+              .annotate(grades_updated=Subquery(grades_updated))
+              .values_list('last_updated', 'grades_updated').first())
+    if stamps is None:
+        return None
+
+    return '|'.join(str(stamp) for stamp in stamps)
+
+def _saved_section_ids(schedules: Iterable[Iterable[int]]) -> Set[int]:
+    return {section_id for schedule in schedules for section_id in schedule}
+
+def _lookup_courses(section_ids: Iterable[int]) -> Dict[int, Tuple[str, str]]:
+    """ Gets the (subject, course_num) of each of the sections that exist """
+    return {section_id: (subject, course_num) for section_id, subject, course_num
+            in Section.objects.filter(id__in=section_ids)
+            .values_list('id', 'subject', 'course_num')}
+
+def build_snapshot(term: str, schedules: List[List[int]]) -> Optional[dict]:
+    """ Builds the snapshot of the sections of the given schedules, which are lists of
+        section ids. Returns None if the term doesn't exist
+    """
+    version = data_version(term)
+    if version is None:
+        return None
+
+    courses = _lookup_courses(_saved_section_ids(schedules))
+    # JSON objects can only have string keys, so the ids are strings in the snapshot
+    return {
+        'version': version,
+        'courses': {str(section_id): list(course)
+                    for section_id, course in courses.items()},
+    }
+
+def _section_courses(term: str, section_ids: Set[int], snapshot: Optional[dict]
+                    ) -> Dict[int, Tuple[str, str]]:
+    """ Gets the (subject, course_num) of each section, from the snapshot if it's
+        current. Sections that don't exist are left out
+    """
+    courses = {}
+    # Snapshots from before they only had the courses don't have them
+    if (snapshot is not None and 'courses' in snapshot
+            and snapshot.get('version') == data_version(term)):
+        courses = {int(section_id): tuple(course)
+                   for section_id, course in snapshot['courses'].items()
+                   if int(section_id) in section_ids}
+
+    missing = section_ids.difference(courses)
+    if missing:
+        courses.update(_lookup_courses(missing))
+
+    return courses
+
+def serialize_saved_schedules(term: str, schedules: List[List[int]],
+                              snapshot: Optional[dict],
+                              fields: Optional[AbstractSet[str]] = None) -> List[List]:
+    """ Serializes the sections of the saved schedules like _serialize_schedules, using
+        the snapshot to find the payloads of the sections' courses. If fields (see
+        parse_section_fields) is given, only those fields of the sections are included
+    """
+    section_ids = _saved_section_ids(schedules)
+    courses = _section_courses(term, section_ids, snapshot)
+
+    sections = {}
+    if courses and term.isdigit():
+        wanted = set(courses.values())
+        subjects, course_nums = zip(*wanted)
+        payloads = (SectionPayload.objects
+                    .filter(term_code=term, subject__in=set(subjects),
+                            course_num__in=set(course_nums))
+                    .values_list('subject', 'course_num', 'data'))
+        for subject, course_num, data in payloads:
+            # The filter matches a few other courses too
+            if (subject, course_num) not in wanted:
+                continue
+            sections.update(
+                (section['id'], section if fields is None
+                 else only_fields(section, fields))
+                for section in json.loads(bytes(data)) if section['id'] in section_ids
+            )
+
+    missing = set(courses).difference(sections)
+    if missing:
+        sections.update((section['id'], section) for section in serialize_sections(
+            Section.objects.filter(id__in=missing), fields=fields))
+
+    return assemble_schedules(schedules, sections)
@@ -0,0 +1,193 @@
+""" Gets and sets the state a user saved for a term, such as their courses,
+    availabilities and schedules.
+
+    Logged in users' state is stored in UserTermState, one row per term and kind of state,
+    so saving one kind doesn't rewrite the rest. Their state used to be stored in their
+    data session as {term: {kind: value}}, so the first time their state is accessed,
+    it's moved out of the data session. Anonymous users' state is still stored in their
+    session, since they don't have a user id and their session is short lived.
+
+    Each kind of state has a version, which is incremented whenever it's saved, so it can
+    be patched without overwriting changes made since the patch was made. State that has
+    never been saved is version 0.
+"""
+
+from copy import deepcopy
+from typing import Any, Dict, Tuple
+from django.core.cache import cache
+from django.db import transaction
+from user_sessions.models import UserTermState
+from user_sessions.utils.json_patch import apply_patch
+from user_sessions.utils.retrieve_data_session import retrieve_data_session
+
+# The key of the versions of anonymous users' state, in their state for each term
+_VERSIONS_KEY = '_versions'
+
+class VersionConflict(Exception):
+    """ Raised when state is patched, but it's been saved since the version the patch
+        was made against. Has the current value and version of the state
+    """
+    def __init__(self, value: Any, version: int):
+        super().__init__(f'The current version is {version}')
+        self.value = value
+        self.version = version
+
+# How long a data session is remembered to have been migrated for. The cache is per
+# process, so this only saves checking the data session again for a while
+_MIGRATED_TIMEOUT = 60 * 60
+
+def _migrated_cache_key(data_session_key: str) -> str:
+    return f'term-state-migrated:{data_session_key}'
+
+def _migrate_data_session(request):
+    """ Moves the logged in user's term states out of their data session, if they
+        haven't been already
+    """
+    user_id = request.user.id
+    # The data session is saved when retrieve_data_session exits, so this saves it in
+    # the same transaction as the rows. Otherwise a failure in between would leave the
+    # terms in the data session, and they'd be migrated again the next time
+    with transaction.atomic(), retrieve_data_session(request) as data_session:
+        # Keyed by the data session, since the user gets a new one if theirs is deleted
+        migrated_key = _migrated_cache_key(data_session.session_key)
+        if cache.get(migrated_key):
+            return
+
+        terms = [key for key, value in data_session.items()
+                 if key.isdigit() and isinstance(value, dict)]
+
+        if terms:
+            # If another request migrated them first, keep its (possibly newer) rows
+            UserTermState.objects.bulk_create([
+                UserTermState(user_id=user_id, term=term, kind=kind, value=value,
+                              version=data_session[term].get(_VERSIONS_KEY, {})
+                              .get(kind, 0))
+                for term in terms for kind, value in data_session[term].items()
+                if kind != _VERSIONS_KEY
+            ], ignore_conflicts=True)
+
+            for term in terms:
+                del data_session[term]
+
+    # Only remember the migration once the rows are committed, in case this is part of
+    # a transaction that's rolled back
+    transaction.on_commit(lambda: cache.set(migrated_key, True, _MIGRATED_TIMEOUT))
+
+def get_versioned_term_states(request, term: str
+                              ) -> Tuple[Dict[str, Any], Dict[str, int]]:
+    """ Gets every kind of state the user saved for the term like get_term_states, and
+        the version of each, i.e. {'courses': 3}
+    """
+    if request.user.id is None:
+        with retrieve_data_session(request, read_only=True) as data_session:
+            states = dict(data_session.get(term, {}))
+        versions = states.pop(_VERSIONS_KEY, {})
+        return states, {kind: versions.get(kind, 0) for kind in states}
+
+    _migrate_data_session(request)
+    rows = list(UserTermState.objects.filter(user_id=request.user.id, term=term)
+                .values_list('kind', 'value', 'version'))
+    return ({kind: value for kind, value, _ in rows},
+            {kind: version for kind, _, version in rows})
+
+def get_term_states(request, term: str) -> Dict[str, Any]:
+    """ Gets every kind of state the user saved for the term, i.e. {'courses': [...]} """
+    return get_versioned_term_states(request, term)[0]
+
+def get_term_state(request, term: str, kind: str, default: Any = None) -> Any:
+    """ Gets one kind of state the user saved for the term, or default if there isn't
+        one
+    """
+    if request.user.id is None:
+        return get_term_states(request, term).get(kind, default)
+
+    _migrate_data_session(request)
+    value = (UserTermState.objects.filter(user_id=request.user.id, term=term, kind=kind)
+             .values_list('value', flat=True).first())
+    # Values can be null, but then they're the same as not being saved
+    return default if value is None else value
+
+def set_term_states(request, term: str, states: Dict[str, Any]) -> Dict[str, int]:
+    """ Saves the given kinds of state for the term, i.e. {'courses': [...]}. Other kinds
+        of state for the term are left as they are. Returns the new version of each
+        kind that was saved
+    """
+    if request.user.id is None:
+        with retrieve_data_session(request) as data_session:
+            term_state = data_session.get(term, {})
+            versions = dict(term_state.get(_VERSIONS_KEY, {}))
+            versions.update((kind, versions.get(kind, 0) + 1) for kind in states)
+            data_session[term] = {**term_state, **states, _VERSIONS_KEY: versions}
+        return {kind: versions[kind] for kind in states}
+
+    _migrate_data_session(request)
+    versions = {}
+    with transaction.atomic():
+        for kind, value in states.items():
+            state, created = UserTermState.objects.select_for_update().get_or_create(
+                user_id=request.user.id, term=term, kind=kind,
+                defaults={'value': value, 'version': 1})
+            if not created:
+                state.value = value
+                state.version += 1
+                state.save(update_fields=['value', 'version'])
+            versions[kind] = state.version
+
+    return versions
+
+def _patch_session_term_state(request, term: str, kind: str, version: int,
+                              patch: Any) -> int:
+    """ patch_term_state for anonymous users, whose state is in request.session.
+        The session's row is locked while the version is checked and the patched state
+        is saved, and the version is checked against the saved session rather than the
+        copy loaded at the start of the request, so two requests patching the same
+        version can't both succeed
+    """
+    session = request.session
+    with transaction.atomic():
+        stored = None
+        if session.session_key is not None:
+            stored = (session.model.objects.select_for_update()
+                      .filter(session_key=session.session_key)
+                      .values_list('session_data', flat=True).first())
+        term_state = (session if stored is None else session.decode(stored)).get(term, {})
+
+        versions = dict(term_state.get(_VERSIONS_KEY, {}))
+        current = versions.get(kind, 0)
+        if current != version:
+            raise VersionConflict(term_state.get(kind), current)
+        # The value is still in the session, so don't change it if the patch fails
+        value = apply_patch(deepcopy(term_state.get(kind)), patch)
+
+        versions[kind] = current + 1
+        session[term] = {**term_state, kind: value, _VERSIONS_KEY: versions}
+        session.save()
+
+    return versions[kind]
+
+def patch_term_state(request, term: str, kind: str, version: int, patch: Any) -> int:
+    """ Applies patch, a JSON Patch (see utils/json_patch.py), to one kind of state the
+        user saved for the term, and returns its new version.
+
+        Raises VersionConflict if the state isn't version anymore, or PatchError if
+        the patch can't be applied. The state isn't changed if either is raised
+    """
+    if request.user.id is None:
+        return _patch_session_term_state(request, term, kind, version, patch)
+
+    _migrate_data_session(request)
+    with transaction.atomic():
+        # Create the state if it's never been saved, so a request saving it at the same
+        # time waits for this one instead of both inserting it. It's rolled back if the
+        # version conflicts or the patch fails
+        state, _ = UserTermState.objects.select_for_update().get_or_create(
+            user_id=request.user.id, term=term, kind=kind,
+            defaults={'value': None, 'version': 0})
+        if state.version != version:
+            raise VersionConflict(state.value, state.version)
+
+        state.value = apply_patch(state.value, patch)
+        state.version += 1
+        state.save()
+
+    return state.version
@@ -4,46 +4,111 @@ from rest_framework.parsers import JSONParser
 from django.contrib.auth.models import User # pylint: disable=imported-auth-user
 from django.contrib import auth
 from user_sessions.utils.retrieve_data_session import retrieve_data_session
-from scheduler.views import _serialize_schedules
+from user_sessions.utils.schedule_snapshot import (
+    SNAPSHOT_KEY, build_snapshot, serialize_saved_schedules,
+)
+from user_sessions.utils.json_patch import PatchError
+from user_sessions.utils.term_state import (
+    VersionConflict, get_term_state, get_term_states, get_versioned_term_states,
+    patch_term_state, set_term_states,
+)
+from scheduler.speculative_generation import enqueue_generation, supersede
+from scheduler.views import (
+    generate_schedules, normalize_schedules, section_fields, wants_normalized_schedules,
+)
+from scraper.models import Term
+from scraper.views import format_terms
+
+def _patch_state_in_session(request, key: str):
+    """ Function that applies the JSON Patch (see utils/json_patch.py) in the patch of
+        the request body to the given key in the user's state for the term. Must have
+        term, patch and version in the body of the request, where version is the version
+        of the state the patch was made against.
+        Used for PATCH requests to save_courses, save_availabilities and save_schedules
+
+        Responds with the new version of the state. If the state was saved since version,
+        nothing is changed, and it responds with 409 and the current version and value
+        of the state, i.e. {'version': 4, 'courses': [...]}
+    """
+    patch = request.data.get('patch')
+    version = request.data.get('version')
+    term = request.data.get('term')
+
+    if patch is None or term is None or not isinstance(version, int):
+        return Response('Request body must contain patch, version and term', status=400)
+
+    try:
+        version = patch_term_state(request, term, key, version, patch)
+    except PatchError as err:
+        return Response(str(err), status=400)
+    except VersionConflict as conflict:
+        return Response({'version': conflict.version, key: conflict.value}, status=409)
+
+    return Response({'version': version})
 
 def _set_state_in_session(request, key: str):
-    """ Function that sets the given key in our session to the value of the key in the
-        request body. Must have term and the given key in the body of the request.
+    """ Function that sets the given key in the user's state for the term (see
+        utils/term_state.py) to the value of the key in the request body. Must have term
+        and the given key in the body of the request. For PATCH requests, patches the
+        state instead, as in _patch_state_in_session. Responds with the new version of
+        the state.
         Used for save_courses and save_availabilities
+
+        The body can also contain generate, the body of the scheduler/generate request
+        for the saved state, to generate its schedules in the background. They're
+        generated with only the section fields in ?fields=..., which should be the same
+        as the fields the scheduler/generate request will ask for
     """
 
-    objs = request.data.get(key)
     term = request.data.get('term')
+    try:
+        fields = section_fields(request)
+    except ValueError as err:
+        return Response(str(err), status=400)
 
-    if objs is None or term is None:
-        return Response(f'Request body must contain {key} and term', status=400)
+    if request.method == 'PATCH':
+        response = _patch_state_in_session(request, key)
+        if response.status_code != 200:
+            return response
+    else:
+        objs = request.data.get(key)
 
-    with retrieve_data_session(request) as data_session:
-        data_session.setdefault(term, {})[key] = objs
+        if objs is None or term is None:
+            return Response(f'Request body must contain {key} and term', status=400)
 
-        return Response()
+        versions = set_term_states(request, term, {key: objs})
+        response = Response({'version': versions[key]})
+
+    # The saved state changed, so any schedules being generated for it are stale.
+    # If given, start generating schedules for the new state in the background
+    generate_body = request.data.get('generate')
+    if generate_body is None:
+        supersede(request.session.session_key, term)
+    else:
+        enqueue_generation(request.session.session_key, term, generate_body, fields,
+                           generate_schedules)
+
+    return response
 
 def _get_state_from_session(request, key: str, default: any = []): #pylint: disable=dangerous-default-value
-    """ Retrieves the value for the respective key from the session. Must have a term as
-        a query parameter. Used for get_courses and get_availabilities.
+    """ Retrieves the value for the respective key from the user's state for the term.
+        Must have a term as a query parameter. Used for get_courses and
+        get_availabilities.
 
         default param is the backup/default key to be used if the key does not exist in
-        the session.
+        the user's state.
     """
 
     term = request.query_params.get('term')
     if not term:
         return None
 
-    with retrieve_data_session(request) as data_session:
-        response = data_session.get(term, {}).get(key, default)
-
-        return response
+    return get_term_state(request, term, key, default)
 
 @api_view(['GET'])
 def get_last_term(request):
     """ API endpoint that returns JSON containing last term for the user's session. """
-    with retrieve_data_session(request) as data_session:
+    with retrieve_data_session(request, read_only=True) as data_session:
         term = data_session.get('term')
         response = {}
         if term:
@@ -63,12 +128,12 @@ def set_last_term(request):
         data_session['term'] = term
         return Response()
 
-@api_view(['PUT'])
+@api_view(['PUT', 'PATCH'])
 @parser_classes([JSONParser])
 def save_courses(request):
     """ API endpoint that saves course cards for user's current term. Note that this
         doesn't check the formatting, it assumes the frontend can deal with it when
-        it's retrieved later
+        it's retrieved later. PATCH requests patch the saved courses instead
     """
     return _set_state_in_session(request, 'courses')
 
@@ -104,24 +169,34 @@ def get_saved_availabilities(request):
 
     return Response(availabilities)
 
-@api_view(['PUT'])
+@api_view(['PUT', 'PATCH'])
 @parser_classes([JSONParser])
 def save_availabilities(request):
-    """ Saves availabilities for the given user in the session """
+    """ Saves availabilities for the given user in the session, or patches them for
+        PATCH requests
+    """
     return _set_state_in_session(request, 'availabilities')
 
-@api_view(['GET'])
-def get_saved_schedules(request):
-    """ Returns the saved schedules from the session for the requested term """
-    schedules = _get_state_from_session(request, 'schedules')
-    # selected_schedule should default to None if it is not available
-    selected_schedule = _get_state_from_session(request, 'selected_schedule', None)
+def _snapshot_schedules(term: str, schedules: list) -> dict:
+    """ Builds the snapshot of the saved schedules, to save along with them """
+    return {SNAPSHOT_KEY: build_snapshot(term, [schedule['sections']
+                                                for schedule in schedules or []])}
 
-    if schedules is None:
-        return Response(status=400)
+def _saved_schedules(request, term: str, term_state: dict, fields) -> dict:
+    """ Builds the response of get_saved_schedules from the user's state for the term """
+    schedules = term_state.get('schedules') or []
+    # selected_schedule should default to None if it is not available
+    selected_schedule = term_state.get('selected_schedule')
 
+    # Serve the sections from their courses' payloads, see utils/schedule_snapshot.py
     section_tuples = [schedule['sections'] for schedule in schedules]
-    serialized = _serialize_schedules(section_tuples)
+    serialized = serialize_saved_schedules(term, section_tuples,
+                                           term_state.get(SNAPSHOT_KEY), fields)
+
+    normalized = None
+    if wants_normalized_schedules(request):
+        normalized = normalize_schedules(serialized)
+        serialized = normalized['schedules']
 
     ret = {
         'selectedSchedule': selected_schedule,
@@ -135,28 +210,102 @@ def get_saved_schedules(request):
         } for schedule, sections in zip(schedules, serialized)],
     }
 
-    return Response(ret)
+    if normalized is not None:
+        ret['sections'] = normalized['sections']
 
-@api_view(['PUT'])
+    return ret
+
+@api_view(['GET'])
+def get_saved_schedules(request):
+    """ Returns the saved schedules from the session for the requested term. With
+        ?normalized=true, each schedule's sections are their ids, and the sections are
+        in sections as given by normalize_schedules. With ?fields=..., only those
+        fields of the sections are included
+    """
+    term = request.query_params.get('term')
+    if not term:
+        return Response(status=400)
+
+    try:
+        fields = section_fields(request)
+    except ValueError as err:
+        return Response(str(err), status=400)
+
+    return Response(_saved_schedules(request, term, get_term_states(request, term),
+                                     fields))
+
+@api_view(['PUT', 'PATCH'])
 @parser_classes([JSONParser])
 def save_schedules(request):
-    """ Saves schedules for the given user in the session """
-    schedules = request.data.get('schedules')
+    """ Saves schedules for the given user in the session. For PATCH requests, patches
+        the schedules as in _patch_state_in_session, and also saves selectedSchedule if
+        it's given. Either way, the snapshot of the schedules is saved along with them
+    """
     selected_schedule = request.data.get('selectedSchedule')
     term = request.data.get('term')
 
+    if request.method == 'PATCH':
+        response = _patch_state_in_session(request, 'schedules')
+        if response.status_code == 200:
+            states = _snapshot_schedules(term, get_term_state(request, term, 'schedules'))
+            if 'selectedSchedule' in request.data:
+                states['selected_schedule'] = selected_schedule
+            set_term_states(request, term, states)
+        return response
+
+    schedules = request.data.get('schedules')
+
     # We don't care if selectedSchedule is None
     if schedules is None or term is None:
         return Response('Request body must contain schedules and term', status=400)
 
-    with retrieve_data_session(request) as data_session:
-        data_session.setdefault(term, {})['schedules'] = schedules
-        data_session.setdefault(term, {})['selected_schedule'] = selected_schedule
+    versions = set_term_states(request, term, {'schedules': schedules,
+                                               'selected_schedule': selected_schedule,
+                                               **_snapshot_schedules(term, schedules)})
 
-        return Response()
+    return Response({'version': versions['schedules']})
 
 @api_view(['POST'])
 def logout(request):
     """ Logs out the user and redirects to index"""
     auth.logout(request)
     return Response()
+
+@api_view(['GET'])
+def bootstrap(request):
+    """ API endpoint that returns the state the frontend needs on page load in one
+        response, instead of it calling each endpoint in turn. Returns the terms as
+        given by /api/terms, and the user's last term as given by get_last_term.
+        If there is a last term, also returns when it was last updated and the user's
+        courses, availabilities and schedules for it, as given by get_last_updated,
+        get_saved_courses, get_saved_availabilities and get_saved_schedules, and the
+        versions to patch them against. Takes the same normalized and fields query
+        params as get_saved_schedules
+    """
+    try:
+        fields = section_fields(request)
+    except ValueError as err:
+        return Response(str(err), status=400)
+
+    with retrieve_data_session(request, read_only=True) as data_session:
+        term = data_session.get('term')
+
+    terms = Term.objects.all().only('code', 'last_updated')
+    ret = {'terms': format_terms(terms)}
+    if not term:
+        return Response(ret)
+
+    term_state, versions = get_versioned_term_states(request, term)
+    ret.update({
+        'term': term,
+        'lastUpdated': next((model.last_updated for model in terms
+                             if str(model.code) == term), None),
+        'courses': term_state.get('courses', []),
+        'availabilities': term_state.get('availabilities', []),
+        'schedules': _saved_schedules(request, term, term_state, fields),
+        # The versions to patch the state against. See _patch_state_in_session
+        'versions': {kind: versions.get(kind, 0)
+                     for kind in ('courses', 'availabilities', 'schedules')},
+    })
+
+    return Response(ret)